@@ -0,0 +1,84 @@
+"""
+Memory usage of command objects.
+
+Compares the bytes per command of the slot-based ``Command`` with the former layout
+that had an instance ``__dict__`` and a new empty ``kwargs`` dict per command.
+
+    $ python benchmarks/bench_memory.py
+"""
+
+from __future__ import annotations
+
+import tracemalloc
+
+from collections_undo import UndoManager
+from collections_undo._command import Command, CommandGroup
+from collections_undo._store import ColumnarStack
+
+N = 100_000
+
+
+class DictCommand:
+    """Command with the former ``__dict__`` based layout."""
+
+    def __init__(self, func, args, kwargs, size=0.0):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.size = size
+
+
+def bytes_per_object(factory, n: int = N) -> float:
+    """Measure the average bytes of the objects created by ``factory(i)``."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [factory(i) for i in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    # exclude the list that holds the objects
+    return (after - before) / n - 8
+
+
+def main():
+    """Print the memory usage of the command objects."""
+    mgr = UndoManager()
+
+    @mgr.undoable
+    def f(x):
+        pass
+
+    @f.undo_def
+    def f(x):
+        pass
+
+    args = (0,)
+    before = bytes_per_object(lambda i: DictCommand(f, args, {}))
+    after = bytes_per_object(lambda i: Command(f, args, {}))
+    print(f"Command ({N} objects)")
+    print(f"  before: {before:7.1f} bytes/command")
+    print(f"  after : {after:7.1f} bytes/command")
+
+    cmds = [Command(f, args, {}) for _ in range(4)]
+    group = bytes_per_object(lambda i: CommandGroup(cmds))
+    print(f"CommandGroup of 4 commands: {group:7.1f} bytes/group")
+
+    # history of f(i) with a distinct int argument for each command
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    history = [Command(f, (i,), {}) for i in range(N)]
+    list_size = (tracemalloc.get_traced_memory()[0] - before) / N
+    tracemalloc.stop()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    stack = ColumnarStack(history)
+    columnar_size = (tracemalloc.get_traced_memory()[0] - before) / N
+    tracemalloc.stop()
+    del history, stack
+    print(f"History of f(i) ({N} commands)")
+    print(f"  list    : {list_size:7.1f} bytes/command")
+    print(f"  columnar: {columnar_size:7.1f} bytes/command")
+
+
+if __name__ == "__main__":
+    main()
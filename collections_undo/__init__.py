@@ -1,19 +1,25 @@
 __version__ = "0.0.8"
 
-from . import abc, containers, fmt
+from . import abc, containers, fmt, reduce
+from ._budget import MemoryBudget, get_memory_budget
 from ._const import empty
+from ._macro import Macro
 from ._stack import UndoManager, get_undo_manager
 from ._undoable import is_undoable
 
 __all__ = [
     "UndoManager",
     "get_undo_manager",
+    "MemoryBudget",
+    "get_memory_budget",
+    "Macro",
     "is_undoable",
     "empty",
     "arguments",
     "abc",
     "containers",
     "fmt",
+    "reduce",
 ]
 
 
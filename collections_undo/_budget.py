@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import weakref
+from collections import OrderedDict
+from functools import partial
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections_undo._stack import ManagerState, UndoManager
+
+
+class MemoryBudget:
+    """
+    A memory budget shared by multiple undo managers.
+
+    Registered managers report the change of their stack size every time a command
+    is added, undone, redone or removed, so the total size is always available
+    without visiting all the managers. When the total size exceeds ``maxsize``, the
+    oldest commands of the least recently used managers are removed.
+
+    Examples
+    --------
+    >>> budget = MemoryBudget(maxsize=1e8)
+    >>> mgr = UndoManager(measure=...)
+    >>> budget.register(mgr)
+    """
+
+    def __init__(self, maxsize: float = float("inf")):
+        self._maxsize = float(maxsize)
+        self._states: OrderedDict[int, weakref.ref[ManagerState]] = OrderedDict()
+        self._sizes: dict[int, float] = {}
+        self._total = 0.0
+
+    def __repr__(self) -> str:
+        cls_name = type(self).__name__
+        return (
+            f"{cls_name}(maxsize={self._maxsize}, total_size={self._total}, "
+            f"n_managers={len(self)})"
+        )
+
+    def __len__(self) -> int:
+        """Number of registered managers."""
+        return len(self._states)
+
+    @property
+    def maxsize(self) -> float:
+        """Maximum total size of all the registered managers."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: float) -> None:
+        self._maxsize = float(value)
+        self._evict()
+
+    @property
+    def total_size(self) -> float:
+        """Total size of all the registered managers."""
+        return self._total
+
+    def register(self, mgr: UndoManager) -> None:
+        """Register an undo manager to this budget."""
+        state = mgr._state
+        if state.budget is self:
+            return None
+        if state.budget is not None:
+            state.budget.unregister(mgr)
+        _id = id(state)
+        self._states[_id] = weakref.ref(state, partial(self._forget, _id))
+        size = state.stack_undo_size + state.stack_redo_size
+        self._sizes[_id] = size
+        self._total += size
+        state.budget = self
+        self._evict()
+        return None
+
+    def unregister(self, mgr: UndoManager) -> None:
+        """Unregister an undo manager from this budget."""
+        state = mgr._state
+        if state.budget is not self:
+            raise ValueError(f"{mgr!r} is not registered.")
+        state.budget = None
+        self._forget(id(state))
+        return None
+
+    def _forget(self, _id: int, ref=None) -> None:
+        self._states.pop(_id, None)
+        self._total -= self._sizes.pop(_id, 0.0)
+        return None
+
+    def _update(self, state: ManagerState, delta: float) -> None:
+        """Update the size of a manager state and mark it as recently used."""
+        _id = id(state)
+        self._sizes[_id] += delta
+        self._total += delta
+        self._states.move_to_end(_id)
+        if self._total > self._maxsize:
+            self._evict()
+        return None
+
+    def _evict(self) -> None:
+        """Remove the oldest commands of the least recently used managers."""
+        n_skipped = 0
+        while self._total > self._maxsize and n_skipped < len(self._states):
+            _id = next(iter(self._states))
+            state = self._states[_id]()
+            if state is None:
+                self._forget(_id)
+                continue
+            if self._sizes[_id] <= 0 or (cmd := state.pop_oldest()) is None:
+                self._states.move_to_end(_id)
+                n_skipped += 1
+                continue
+            n_skipped = 0
+            self._sizes[_id] -= cmd.size
+            self._total -= cmd.size
+        return None
+
+
+_GLOBAL_BUDGET = MemoryBudget()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """
+    Get the process-wide memory budget.
+
+    Undo managers created by ``get_undo_manager`` are registered to this budget. The
+    budget is unlimited by default.
+
+    Examples
+    --------
+    >>> get_memory_budget().maxsize = 1e9
+    """
+    return _GLOBAL_BUDGET
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import inspect
 from abc import ABC, abstractmethod
-from functools import lru_cache
-from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping
+from array import array
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Sequence
 
 from collections_undo._reversible import ReversibleFunction
 
@@ -13,7 +14,34 @@ if TYPE_CHECKING:
     from typing_extensions import Self
 
 
+class _EmptyKwargs(Mapping[str, Any]):
+    """Immutable empty mapping shared by the commands without keyword arguments."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __repr__(self) -> str:
+        return "{}"
+
+    def __reduce__(self) -> str:
+        # unpickled as the shared instance
+        return "_EMPTY_KWARGS"
+
+
+_EMPTY_KWARGS: Mapping[str, Any] = _EmptyKwargs()
+
+
 class _CommandBase(ABC):
+    __slots__ = ()
+
     size: int
 
     @abstractmethod
@@ -33,11 +61,6 @@ class _CommandBase(ABC):
         """Format the command."""
 
 
-@lru_cache(maxsize=128)
-def _bind_args(self: Command):
-    return inspect.signature(self.func._func_fw).bind(*self.args, **self.kwargs)
-
-
 class Command(_CommandBase):
     """
     Undoable command object.
@@ -57,16 +80,18 @@ class Command(_CommandBase):
         should be removed from the stack.
     """
 
+    __slots__ = ("func", "args", "kwargs", "size")
+
     def __init__(
         self,
         func: ReversibleFunction,
         args: tuple[Any, ...],
-        kwargs: dict[str, Any],
+        kwargs: Mapping[str, Any],
         size: float = 0.0,
     ):
         self.func = func
         self.args = args
-        self.kwargs = kwargs
+        self.kwargs = kwargs or _EMPTY_KWARGS
         self.size = size
 
     def __repr__(self) -> str:
@@ -88,7 +113,9 @@ class Command(_CommandBase):
         return self.func.function_id
 
     def bind_args(self) -> inspect.BoundArguments:
-        return _bind_args(self)
+        """Bind the arguments to the signature of the function."""
+        binder = self.func.binder
+        return inspect.BoundArguments(binder.signature, binder(self.args, self.kwargs))
 
     @classmethod
     def merge(
@@ -97,6 +124,14 @@ class Command(_CommandBase):
         formatter: FormatterType | None = None,
         invert: bool = False,
     ) -> CommandGroup:
+        """
+        Merge commands into a command group.
+
+        Runs of consecutive commands of the same batchable function are collapsed
+        into a single ``BatchCommand``.
+        """
+        if not invert:
+            cmds = _collapse_batches(cmds)
         group = CommandGroup(cmds, formatter=formatter, invert=invert)
         return group
 
@@ -119,23 +154,36 @@ class Command(_CommandBase):
             return self.func.format_reverse_call(*self.args, **self.kwargs)
         return self.func.format_forward_call(*self.args, **self.kwargs)
 
-    def reduce_with(self, cmd: Command) -> Self:
-        """Automatically merge the command with the given command."""
+    def reduce_with(self, cmd: Command) -> Self | None:
+        """
+        Automatically merge the command with the given command.
+
+        None is returned if the reduce rule does not reduce the commands.
+        """
         rule = cmd.func._reduce_rule
         if rule is None:
             raise ValueError(f"Automerge rule is not defined for {cmd.func}.")
         if self.func is not cmd.func:
             raise ValueError("Cannot merge different functions.")
-        _args, _kwargs = rule(
-            Arguments(self.bind_args().arguments),
-            Arguments(cmd.bind_args().arguments),
+        binder = self.func.binder
+        out = rule(
+            Arguments(binder(self.args, self.kwargs)),
+            Arguments(binder(cmd.args, cmd.kwargs)),
         )
+        if out is None:
+            return None
+        elif isinstance(out, Mapping):
+            _args, _kwargs = binder.unbind(out)
+        else:
+            _args, _kwargs = out
         return self.__class__(self.func, _args, _kwargs)
 
 
 class CommandGroup(_CommandBase):
     """A group of commands."""
 
+    __slots__ = ("_commands", "_formatter", "_invert", "_size")
+
     def __init__(
         self,
         commands: Iterable[_CommandBase],
@@ -143,6 +191,7 @@ class CommandGroup(_CommandBase):
         invert: bool = False,
     ):
         self._commands = list(commands)
+        self._size = sum(cmd.size for cmd in self._commands)
         if formatter is None:
             self._formatter = type(self)._format_default
         else:
@@ -159,10 +208,13 @@ class CommandGroup(_CommandBase):
         if not isinstance(cmd, _CommandBase):
             raise TypeError(f"{cmd} is not a command")
         self._commands.append(cmd)
+        self._size += cmd.size
 
     def pop(self) -> _CommandBase:
         """Pop the last command."""
-        return self._commands.pop()
+        cmd = self._commands.pop()
+        self._size -= cmd.size
+        return cmd
 
     def __getitem__(self, index: int) -> _CommandBase:
         """Get the command at the given index."""
@@ -201,9 +253,9 @@ class CommandGroup(_CommandBase):
         return out
 
     @property
-    def size(self) -> int:
+    def size(self) -> float:
         """The total size of the command."""
-        return sum(cmd.size for cmd in self._commands)
+        return self._size
 
     def format(self, fmt: Callable | None = None) -> str:
         if fmt is not None:
@@ -214,7 +266,87 @@ class CommandGroup(_CommandBase):
         return "\n".join(cmd.format() for cmd in self)
 
 
+class BatchCommand(_CommandBase):
+    """
+    A run of commands of the same function.
+
+    The commands are called and reverted by the batched implementations of the
+    function (see ``ReversibleFunction.set_batch``).
+    """
+
+    __slots__ = ("func", "arguments", "size", "sizes")
+
+    def __init__(
+        self,
+        func: ReversibleFunction,
+        arguments: list[tuple[tuple[Any, ...], dict[str, Any]]],
+        size: float = 0.0,
+        sizes: Sequence[float] | None = None,
+    ):
+        self.func = func
+        self.arguments = arguments
+        self.size = size
+        if sizes is None:
+            # spread the total size evenly
+            sizes = [size / len(arguments)] * len(arguments) if arguments else []
+        self.sizes = array("d", sizes)
+
+    def __repr__(self) -> str:
+        _cls = type(self).__name__
+        return f"{_cls}<{self.func.__name__} x {len(self.arguments)}>"
+
+    @property
+    def commands(self) -> list[Command]:
+        """List of commands."""
+        return [
+            Command(self.func, args, kwargs, size)
+            for (args, kwargs), size in zip(self.arguments, self.sizes)
+        ]
+
+    def _call_with_callback(self):
+        out = self._call_raw()
+        self.func._mgr.append(self)
+        return out
+
+    def _call_raw(self):
+        return self.func._call_batch_raw(self.arguments)
+
+    def _revert(self):
+        return self.func._revert_batch(self.arguments[::-1])
+
+    def format(self) -> str:
+        _fmt = self.func.format_forward_call
+        return "\n".join(_fmt(*args, **kwargs) for args, kwargs in self.arguments)
+
+
+def _batch_key(cmd: _CommandBase):
+    if isinstance(cmd, Command) and cmd.func.is_batchable:
+        return cmd.func
+    return object()  # never grouped
+
+
+def _collapse_batches(cmds: Iterable[_CommandBase]) -> list[_CommandBase]:
+    """Collapse runs of batchable commands into batch commands."""
+    out: list[_CommandBase] = []
+    for key, group in groupby(cmds, key=_batch_key):
+        run = list(group)
+        if len(run) > 1:
+            out.append(
+                BatchCommand(
+                    key,
+                    [(cmd.args, cmd.kwargs) for cmd in run],
+                    size=sum(cmd.size for cmd in run),
+                    sizes=[cmd.size for cmd in run],
+                )
+            )
+        else:
+            out.extend(run)
+    return out
+
+
 class Arguments(Mapping[str, Any]):
+    __slots__ = ("_dict", "_keys")
+
     def __init__(self, *args, **kwargs):
         self._dict = dict(*args, **kwargs)
         self._keys = list(self._dict.keys())
@@ -231,6 +363,9 @@ class Arguments(Mapping[str, Any]):
     def __getattr__(self, key: str):
         return self.__getitem__(key)
 
+    def __reduce__(self):
+        return type(self), (self._dict,)
+
     def __iter__(self):
         return iter(self._keys)
 
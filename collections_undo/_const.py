@@ -9,6 +9,9 @@ class _Empty:
     def __str__(self) -> str:
         return "<empty>"
 
+    def __reduce__(self):
+        return "empty"
+
 
 empty = _Empty()
 
@@ -1,12 +1,25 @@
 from ._dict import UndoableDict, AbstractUndoableDict
 from ._list import UndoableList, AbstractUndoableList
+from ._arraylist import UndoableArrayList
+from ._ndarray import UndoableNDArray, AbstractUndoableNDArray
+from ._persistent import UndoablePersistentList
+from ._sqlite import UndoableSqliteDict
+from ._text import UndoableText
 from ._set import UndoableSet, AbstractUndoableSet
+from ._intset import UndoableIntSet
 
 __all__ = [
     "UndoableDict",
     "AbstractUndoableDict",
     "UndoableList",
     "AbstractUndoableList",
+    "UndoableArrayList",
+    "UndoableNDArray",
+    "AbstractUndoableNDArray",
+    "UndoablePersistentList",
+    "UndoableSqliteDict",
+    "UndoableText",
     "UndoableSet",
     "AbstractUndoableSet",
+    "UndoableIntSet",
 ]
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Iterable, Iterator, Sequence, SupportsIndex, TypeVar
+
+from collections_undo._containers._list import AbstractUndoableList
+
+_T = TypeVar("_T", int, float)
+
+
+class UndoableArrayList(AbstractUndoableList[_T]):
+    """
+    An undoable list of numbers backed by ``array.array``.
+
+    All the modifications are recorded as a command that replaces a range of the
+    array, with the old and new items stored as packed bytes. Undo and redo copy
+    the bytes back into the buffer at once. Extended slices are recorded as the
+    range of the indices and the packed items at the indices.
+
+    >>> lst = UndoableArrayList("d", [0.0, 1.0, 2.0])
+    >>> lst[1:] = [10.0, 20.0]
+    >>> lst.view()  # zero-copy read access
+    """
+
+    _mgr = AbstractUndoableList._mgr
+
+    def __init__(self, typecode: str, iterable: Iterable[_T] = (), /):
+        self._array = array(typecode, iterable)
+
+    def __repr__(self) -> str:
+        clsname = type(self).__name__
+        return f"{clsname}({self.typecode!r}, {self._array.tolist()!r})"
+
+    @property
+    def typecode(self) -> str:
+        """Typecode of the array."""
+        return self._array.typecode
+
+    @property
+    def itemsize(self) -> int:
+        """Size of an item in bytes."""
+        return self._array.itemsize
+
+    def view(self) -> memoryview:
+        """
+        Return a read-only memoryview of the buffer.
+
+        Note that the length of the list cannot be changed while the view is not
+        released.
+        """
+        return memoryview(self._array).toreadonly()
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, key):
+        return self._array[key]
+
+    def __iter__(self) -> Iterator[_T]:
+        return iter(self._array)
+
+    def _raw_setitem(self, key, val) -> None:
+        if isinstance(key, slice):
+            val = array(self.typecode, val)
+        self._array[key] = val
+
+    def _raw_delitem(self, key) -> None:
+        del self._array[key]
+
+    def _raw_insert(self, index: int, val: _T) -> None:
+        self._array.insert(index, val)
+
+    def _raw_insert_many(self, index: int, values: Iterable[_T]) -> None:
+        self._array[index:index] = array(self.typecode, values)
+
+    def _raw_delete_range(self, start: int, stop: int) -> None:
+        del self._array[start:stop]
+
+    def _raw_permute(self, perm: Sequence[int]) -> None:
+        _array = self._array
+        _array[: len(perm)] = array(self.typecode, [_array[i] for i in perm])
+
+    def _raw_reverse(self) -> None:
+        self._array.reverse()
+
+    def _raw_splice(self, start: int, n_old: int, data: bytes) -> None:
+        """Replace ``n_old`` items from ``start`` with the packed items."""
+        stop = start + n_old
+        if len(data) == n_old * self.itemsize:
+            with memoryview(self._array) as mv:
+                mv[start:stop] = memoryview(data).cast(self.typecode)
+        else:
+            values = array(self.typecode)
+            values.frombytes(data)
+            self._array[start:stop] = values
+        return None
+
+    # commands
+
+    @_mgr.undoable(name="splice")
+    def _splice(self, start: int, new: bytes, old: bytes):
+        self._raw_splice(start, len(old) // self.itemsize, new)
+
+    @_splice.undo_def
+    def _splice(self, start: int, new: bytes, old: bytes):
+        self._raw_splice(start, len(new) // self.itemsize, old)
+
+    @_splice.set_footprint
+    def _splice_footprint(self, start: int, new: bytes, old: bytes):
+        if len(new) != len(old):
+            # the following items are shifted
+            return (), (range(start, sys.maxsize),)
+        return (), (range(start, start + len(new) // self.itemsize),)
+
+    @_splice.set_macro_steps
+    def _splice_macro_steps(self, start: int, new: bytes, old: bytes):
+        values = array(self.typecode)
+        values.frombytes(new)
+        key = slice(start, start + len(old) // self.itemsize)
+        return [("__setitem__", (key, values.tolist()), {})]
+
+    def _values(self, data: bytes) -> array:
+        values = array(self.typecode)
+        values.frombytes(data)
+        return values
+
+    @_mgr.undoable(name="__setitem__")
+    def _setitem_strided(self, indices: range, new: bytes, old: bytes):
+        self._array[_as_slice(indices)] = self._values(new)
+
+    @_setitem_strided.undo_def
+    def _setitem_strided(self, indices: range, new: bytes, old: bytes):
+        self._array[_as_slice(indices)] = self._values(old)
+
+    @_setitem_strided.set_footprint
+    def _setitem_strided_footprint(self, indices: range, new: bytes, old: bytes):
+        return (), (indices,)
+
+    @_setitem_strided.set_macro_steps
+    def _setitem_strided_macro_steps(self, indices: range, new: bytes, old: bytes):
+        values = self._values(new).tolist()
+        return [("__setitem__", (_as_slice(indices), values), {})]
+
+    @_mgr.undoable(name="__delitem__")
+    def _delete_strided(self, indices: range, old: bytes):
+        del self._array[_as_slice(indices)]
+
+    @_delete_strided.undo_def
+    def _delete_strided(self, indices: range, old: bytes):
+        # indices are ascending, so each item is inserted at its final position
+        _array = self._array
+        start = indices[0]
+        tail = array(self.typecode)
+        src = start
+        for idx, val in zip(indices, self._values(old)):
+            n = idx - start - len(tail)
+            tail.extend(_array[src : src + n])
+            tail.append(val)
+            src += n
+        tail.extend(_array[src:])
+        _array[start:] = tail
+
+    @_delete_strided.set_footprint
+    def _delete_strided_footprint(self, indices: range, old: bytes):
+        return (), (range(indices[0], sys.maxsize),)
+
+    @_delete_strided.set_macro_steps
+    def _delete_strided_macro_steps(self, indices: range, old: bytes):
+        return [("__delitem__", (_as_slice(indices),), {})]
+
+    @_mgr.undoable(name="append")
+    def _append(self, index: int, data: bytes):
+        self._raw_splice(index, 0, data)
+
+    @_append.undo_def
+    def _append(self, index: int, data: bytes):
+        self._raw_splice(index, len(data) // self.itemsize, b"")
+
+    @_append.set_footprint
+    def _append_footprint(self, index: int, data: bytes):
+        return (), (range(index, sys.maxsize),)
+
+    @_append.set_macro_steps
+    def _append_macro_steps(self, index: int, data: bytes):
+        return [("extend", (self._values(data).tolist(),), {})]
+
+    @_mgr.undoable(name="sort")
+    def _sort(self, new: bytes, old: bytes):
+        self._raw_splice(0, len(old) // self.itemsize, new)
+
+    @_sort.undo_def
+    def _sort(self, new: bytes, old: bytes):
+        self._raw_splice(0, len(new) // self.itemsize, old)
+
+    @_sort.set_footprint
+    def _sort_footprint(self, new: bytes, old: bytes):
+        return (), (range(0, len(new) // self.itemsize),)
+
+    @_sort.set_macro_steps
+    def _sort_macro_steps(self, new: bytes, old: bytes):
+        # the sorted items are those of the recorded list
+        return None
+
+    def _replace(self, start: int, stop: int, values: array) -> None:
+        """Replace items in [start, stop) with the values as a command."""
+        return self._splice(start, values.tobytes(), self._array[start:stop].tobytes())
+
+    # reimplemented methods
+
+    def __setitem__(self, key, val) -> None:
+        n = len(self)
+        if not isinstance(key, slice):
+            key = range(n)[key]
+            return self._replace(key, key + 1, array(self.typecode, [val]))
+        values = array(self.typecode, val)
+        start, stop, step = key.indices(n)
+        if step == 1:
+            return self._replace(start, max(start, stop), values)
+        indices = range(start, stop, step)
+        if len(indices) != len(values):
+            raise ValueError(
+                f"attempt to assign sequence of size {len(values)} to extended "
+                f"slice of size {len(indices)}"
+            )
+        if len(indices) == 0:
+            return None
+        old = self._array[_as_slice(indices)]
+        return self._setitem_strided(indices, values.tobytes(), old.tobytes())
+
+    def __delitem__(self, key) -> None:
+        n = len(self)
+        if not isinstance(key, slice):
+            key = range(n)[key]
+            return self._replace(key, key + 1, array(self.typecode))
+        start, stop, step = key.indices(n)
+        if step == 1:
+            return self._replace(start, max(start, stop), array(self.typecode))
+        indices = range(start, stop, step)
+        if len(indices) == 0:
+            return None
+        if step < 0:
+            indices = indices[::-1]
+        old = self._array[_as_slice(indices)]
+        return self._delete_strided(indices, old.tobytes())
+
+    def append(self, value: _T) -> None:
+        """Append a value to the end of the list."""
+        values = array(self.typecode, [value])
+        if self._is_appending:
+            with self._mgr.reducing():
+                return self._tail(len(self), values)
+        return self._append(len(self), values.tobytes())
+
+    def insert(self, index: SupportsIndex, val: _T) -> None:
+        """Insert a value at the index."""
+        n = len(self)
+        index = index.__index__()
+        if index < 0:
+            index = max(index + n, 0)
+        else:
+            index = min(index, n)
+        return self._replace(index, index, array(self.typecode, [val]))
+
+    def extend(self, values: Iterable[_T]) -> None:
+        """Extend the list with given values."""
+        n = len(self)
+        return self._replace(n, n, array(self.typecode, values))
+
+    def clear(self) -> None:
+        """Clear the list."""
+        return self._replace(0, len(self), array(self.typecode))
+
+    def sort(self, *, key=None, reverse: bool = False) -> None:
+        """Sort the list in place."""
+        old = self._array
+        new = array(self.typecode, sorted(old, key=key, reverse=reverse))
+        return self._sort(new.tobytes(), old.tobytes())
+
+
+def _as_slice(indices: range) -> slice:
+    """Convert a non-empty range of indices into a slice."""
+    stop = indices.stop if indices.stop >= 0 else None
+    return slice(indices.start, stop, indices.step)
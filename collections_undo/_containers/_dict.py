@@ -1,17 +1,45 @@
 from __future__ import annotations
 from abc import abstractmethod
 
-from typing import Hashable, Iterator, Mapping, MutableMapping, TypeVar
+from typing import (
+    Any,
+    Hashable,
+    Iterator,
+    Literal,
+    Mapping,
+    MutableMapping,
+    TypeVar,
+)
 from collections_undo._stack import UndoManager
 from collections_undo._const import empty
+from collections_undo._reduce import last_write_wins
 
 _K = TypeVar("_K", bound=Hashable)
 _V = TypeVar("_V")
 
 
 class AbstractUndoableDict(MutableMapping[_K, _V]):
+    """
+    An undoable mutable mapping.
+
+    Subclasses can choose how ``update`` finds the values that are not changed and
+    need not be recorded, by "identity" (default) or "equality".
+
+    >>> class MyDict(UndoableDict, update_compare="equality"):
+    ...     pass
+    """
+
     _mgr = UndoManager()
 
+    def __init_subclass__(
+        cls,
+        update_compare: Literal["identity", "equality"] | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init_subclass__(**kwargs)
+        if update_compare is not None:
+            cls._update_compare = _check_compare(update_compare)
+
     def __repr__(self) -> str:
         clsname = type(self).__name__
         s = ", ".join(f"{k}={v!r}" for k, v in self.items())
@@ -37,6 +65,34 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
     def _raw_delitem(self, key: _K) -> None:
         ...
 
+    def _raw_update(self, values: Mapping[_K, _V]) -> None:
+        """Set all the items. Override this for a faster implementation."""
+        for key, value in values.items():
+            self._raw_setitem(key, value)
+        return None
+
+    def _raw_get_storage(self) -> Any:
+        """
+        Return the object that stores the items, or None if not supported.
+
+        If supported, ``clear`` swaps the storage with an empty one instead of
+        copying all the items.
+        """
+        return None
+
+    def _raw_set_storage(self, storage: Any | None) -> None:
+        """
+        Set the storage object, or a new empty one if None is given.
+
+        The default implementation only supports None and removes all the items.
+        Override this together with ``_raw_get_storage``.
+        """
+        if storage is not None:
+            raise TypeError(f"{type(self).__name__} does not support storage swap.")
+        for key in list(self):
+            self._raw_delitem(key)
+        return None
+
     def __setitem__(self, key: _K, value: _V) -> None:
         self._setitem(key, value, self.get(key, empty))
 
@@ -52,6 +108,31 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
             self._raw_setitem(key, old_value)
         return None
 
+    _setitem.reduce_rule(last_write_wins("key", keep="old_value"))
+
+    @_setitem.set_footprint
+    def _setitem_footprint(self, key: _K, value: _V, old_value: _V):
+        return (), (key,)
+
+    @_setitem.set_macro_steps
+    def _setitem_macro_steps(self, key: _K, value: _V, old_value: _V):
+        return [("__setitem__", (key, value), {})]
+
+    @_setitem.set_batch
+    def _setitem_batch(self, arguments: list[tuple[tuple, dict]]):
+        self._raw_update({args[0]: args[1] for args, _ in arguments})
+        return None
+
+    @_setitem.set_batch_inv
+    def _setitem_batch_inv(self, arguments: list[tuple[tuple, dict]]):
+        # arguments are in the reverting order so the oldest value comes last
+        old_values = {args[0]: args[2] for args, _ in arguments}
+        for key in [k for k, v in old_values.items() if v is empty]:
+            del old_values[key]
+            self._raw_delitem(key)
+        self._raw_update(old_values)
+        return None
+
     def __delitem__(self, key: _K) -> None:
         self._delitem(key, self[key])
 
@@ -63,12 +144,34 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
     def _delitem(self, key: _K, value: _V) -> None:
         return self._raw_setitem(key, value)
 
+    @_delitem.set_footprint
+    def _delitem_footprint(self, key: _K, value: _V):
+        return (), (key,)
+
+    @_delitem.set_macro_steps
+    def _delitem_macro_steps(self, key: _K, value: _V):
+        return [("__delitem__", (key,), {})]
+
     # reimplemented methods
 
     def clear(self) -> None:
         """Clear the dictonary."""
+        if (storage := self._raw_get_storage()) is not None:
+            return self._clear_storage(storage)
         return self._clear(dict(self))
 
+    @_mgr.undoable(name="clear")
+    def _clear_storage(self, storage: Any):
+        self._raw_set_storage(None)
+
+    @_clear_storage.undo_def
+    def _clear_storage(self, storage: Any):
+        self._raw_set_storage(storage)
+
+    @_clear_storage.set_macro_steps
+    def _clear_storage_macro_steps(self, storage: Any):
+        return [("clear", (), {})]
+
     @_mgr.undoable(name="clear")
     def _clear(self, values: dict[_K, _V]) -> None:
         while True:
@@ -81,9 +184,16 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
 
     @_clear.undo_def
     def _clear(self, value: dict[_K, _V]):
-        self._update._call_raw(value, {})
+        self._raw_update(value)
         return None
 
+    @_clear.set_macro_steps
+    def _clear_macro_steps(self, values: dict[_K, _V]):
+        return [("clear", (), {})]
+
+    # how to find unchanged values in update, set by the class keyword
+    _update_compare: Literal["identity", "equality"] = "identity"
+
     def update(self, other=(), /, **kwargs):
         """Update the dictionary with the given arguments."""
         values = {}
@@ -100,22 +210,45 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
         for key, value in kwargs.items():
             values[key] = value
 
-        old_values = {k: self.get(k, empty) for k in values.keys()}
-        return self._update(values, old_values)
+        # only record the changed items
+        keys: list[_K] = []
+        new_values: list[_V] = []
+        old_values: list[_V] = []
+        by_equality = self._update_compare == "equality"
+        for key, value in values.items():
+            old = self.get(key, empty)
+            if old is value or (by_equality and _is_equal(old, value)):
+                continue
+            keys.append(key)
+            new_values.append(value)
+            old_values.append(old)
+        if keys:
+            self._update(tuple(keys), tuple(new_values), tuple(old_values))
+        return None
 
     @_mgr.undoable(name="update")
-    def _update(self, values: dict[_K, _V], old_values: dict[_K, _V]) -> None:
-        for key, value in values.items():
-            self._raw_setitem(key, value)
+    def _update(self, keys: tuple[_K, ...], values: tuple, old_values: tuple) -> None:
+        self._raw_update(dict(zip(keys, values)))
         return None
 
     @_update.undo_def
-    def _update(self, values: dict[_K, _V], old_values: dict[_K, _V]) -> None:
-        for key, value in old_values.items():
+    def _update(self, keys: tuple[_K, ...], values: tuple, old_values: tuple) -> None:
+        restore = {}
+        for key, value in zip(keys, old_values):
             if value is empty:
                 self._raw_delitem(key)
             else:
-                self._raw_setitem(key, value)
+                restore[key] = value
+        self._raw_update(restore)
+        return None
+
+    @_update.set_footprint
+    def _update_footprint(self, keys: tuple[_K, ...], values: tuple, old_values: tuple):
+        return (), keys
+
+    @_update.set_macro_steps
+    def _update_macro_steps(self, keys, values, old_values):
+        # unchanged items are not recorded so the update cannot be replayed
         return None
 
     def undo(self):
@@ -127,6 +260,25 @@ class AbstractUndoableDict(MutableMapping[_K, _V]):
         return self._mgr.redo()
 
 
+def _is_equal(old: Any, value: Any) -> bool:
+    """True if the old value equals the value, False if it cannot be decided."""
+    if old is empty:
+        return False
+    try:
+        return bool(old == value)
+    except Exception:
+        # such as arrays that cannot be converted to bool
+        return False
+
+
+def _check_compare(compare: str) -> Literal["identity", "equality"]:
+    if compare not in ("identity", "equality"):
+        raise ValueError(
+            f"update_compare must be 'identity' or 'equality', got {compare!r}."
+        )
+    return compare
+
+
 class UndoableDict(AbstractUndoableDict[_K, _V]):
     def __init__(self, *args, **kwargs) -> None:
         self._dict = dict(*args, **kwargs)
@@ -145,3 +297,12 @@ class UndoableDict(AbstractUndoableDict[_K, _V]):
 
     def _raw_delitem(self, key: _K) -> None:
         del self._dict[key]
+
+    def _raw_update(self, values: Mapping[_K, _V]) -> None:
+        self._dict.update(values)
+
+    def _raw_get_storage(self) -> dict[_K, _V]:
+        return self._dict
+
+    def _raw_set_storage(self, storage: dict[_K, _V] | None) -> None:
+        self._dict = {} if storage is None else storage
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import zlib
+from operator import index
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from collections_undo._containers._set import AbstractUndoableSet
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+# masks larger than this number of bytes are compressed
+_COMPRESS_THRESHOLD = 1024
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+def _as_item(value: Any) -> int:
+    value = index(value)
+    if value < 0:
+        raise ValueError(f"Item must be non-negative, got {value}.")
+    return value
+
+
+def _build_mask(values: Iterable[int], skip_invalid: bool = False) -> int:
+    """Convert integers into a bit mask, skipping non-members if ``skip_invalid``."""
+    buf = bytearray()
+    for value in values:
+        try:
+            value = _as_item(value)
+        except (TypeError, ValueError):
+            if skip_invalid:
+                continue
+            raise
+        i = value >> 3
+        if i >= len(buf):
+            buf.extend(bytes(max(i + 1 - len(buf), len(buf))))
+        buf[i] |= 1 << (value & 7)
+    return int.from_bytes(buf, "little")
+
+
+class UndoableIntSet(AbstractUndoableSet[int]):
+    """
+    An undoable set of non-negative integers backed by a bitmap.
+
+    Every modification is recorded as a XOR mask of the changed bytes, which is
+    compressed if large. The same command undoes and redoes the modification, so
+    selecting or deselecting millions of items costs one compact command.
+
+    >>> s = UndoableIntSet(range(1_000_000))
+    >>> s -= range(0, 1_000_000, 2)  # one command
+    >>> s.undo()
+    """
+
+    _mgr = AbstractUndoableSet._mgr
+
+    def __init__(self, iterable: Iterable[int] = (), /):
+        self._bits = bytearray()
+        self._len = 0
+        self._raw_update(iterable)
+
+    def __contains__(self, x: Any) -> bool:
+        try:
+            x = _as_item(x)
+        except (TypeError, ValueError):
+            return False
+        i = x >> 3
+        return i < len(self._bits) and bool(self._bits[i] >> (x & 7) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        for i, byte in enumerate(self._bits):
+            if byte:
+                base = i << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base + bit
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _raw_add(self, value: int) -> None:
+        if value not in self:
+            self._raw_xor_int(1 << _as_item(value))
+
+    def _raw_discard(self, value: int) -> None:
+        if value in self:
+            self._raw_xor_int(1 << value)
+
+    def _raw_update(self, values: Iterable[int]) -> None:
+        mask = self._mask_of(values)
+        self._raw_xor_int(mask & ~self._as_int())
+
+    def _raw_difference_update(self, values: Iterable[int]) -> None:
+        mask = self._mask_of(values, skip_invalid=True)
+        self._raw_xor_int(mask & self._as_int())
+
+    def _as_int(self) -> int:
+        return int.from_bytes(self._bits, "little")
+
+    def _mask_of(self, values: Iterable[int], skip_invalid: bool = False) -> int:
+        if isinstance(values, UndoableIntSet):
+            return values._as_int()
+        return _build_mask(values, skip_invalid)
+
+    def _raw_xor(self, offset: int, mask: bytes) -> None:
+        """XOR the bytes from the offset with the mask."""
+        stop = offset + len(mask)
+        if stop > len(self._bits):
+            self._bits.extend(bytes(stop - len(self._bits)))
+        old = int.from_bytes(self._bits[offset:stop], "little")
+        new = old ^ int.from_bytes(mask, "little")
+        self._bits[offset:stop] = new.to_bytes(len(mask), "little")
+        self._len += _popcount(new) - _popcount(old)
+        return None
+
+    def _raw_xor_int(self, diff: int) -> None:
+        if diff:
+            offset, mask = self._split_diff(diff)
+            self._raw_xor(offset, mask)
+        return None
+
+    def _split_diff(self, diff: int) -> tuple[int, bytes]:
+        """Split a non-zero XOR mask into the byte offset and the changed bytes."""
+        offset = ((diff & -diff).bit_length() - 1) >> 3
+        diff >>= offset << 3
+        return offset, diff.to_bytes((diff.bit_length() + 7) >> 3, "little")
+
+    def _apply_diff(self, diff: int) -> None:
+        """Record the XOR mask as a command."""
+        if not diff:
+            return None
+        offset, mask = self._split_diff(diff)
+        compressed = len(mask) > _COMPRESS_THRESHOLD
+        if compressed:
+            mask = zlib.compress(mask)
+        return self._xor(offset, mask, compressed)
+
+    @_mgr.undoable(name="xor")
+    def _xor(self, offset: int, mask: bytes, compressed: bool):
+        self._raw_xor(offset, zlib.decompress(mask) if compressed else mask)
+
+    @_xor.undo_def
+    def _xor(self, offset: int, mask: bytes, compressed: bool):
+        self._raw_xor(offset, zlib.decompress(mask) if compressed else mask)
+
+    @_xor.set_macro_steps
+    def _xor_macro_steps(self, offset: int, mask: bytes, compressed: bool):
+        # the mask is the difference from the recorded set
+        return None
+
+    # reimplemented methods
+
+    def add(self, value: int) -> None:
+        value = _as_item(value)
+        if value not in self:
+            self._apply_diff(1 << value)
+        return None
+
+    def discard(self, value: int) -> None:
+        if value in self:
+            self._apply_diff(1 << value)
+        return None
+
+    def clear(self) -> None:
+        """Clear the set."""
+        return self._apply_diff(self._as_int())
+
+    def __ior__(self, it) -> Self:
+        self._apply_diff(self._mask_of(it) & ~self._as_int())
+        return self
+
+    def __iand__(self, it) -> Self:
+        # values that cannot be members are not in the intersection
+        self._apply_diff(self._as_int() & ~self._mask_of(it, skip_invalid=True))
+        return self
+
+    def __ixor__(self, it) -> Self:
+        self._apply_diff(self._mask_of(it))
+        return self
+
+    def __isub__(self, it) -> Self:
+        self._apply_diff(self._as_int() & self._mask_of(it, skip_invalid=True))
+        return self
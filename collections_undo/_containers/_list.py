@@ -1,7 +1,10 @@
 from __future__ import annotations
+import sys
 from abc import abstractmethod
 
-from typing import Iterable, Iterator, MutableSequence, TypeVar, SupportsIndex
+from array import array
+from contextlib import contextmanager
+from typing import Iterable, Iterator, MutableSequence, Sequence, TypeVar, SupportsIndex
 from collections_undo._stack import UndoManager
 
 _T = TypeVar("_T")
@@ -21,6 +24,18 @@ class AbstractUndoableList(MutableSequence[_T]):
     - ``__len__(self) -> int`` ... Get length of list.
     - ``__iter__(self) -> Iterator`` ... Iterate over list.
 
+    Optional Methods
+    ----------------
+    - ``_raw_insert_many(self, index, values)`` ... Insert ``values`` at ``index``.
+    - ``_raw_delete_range(self, start, stop)`` ... Delete items in ``[start, stop)``.
+    - ``_raw_setitem_runs(self, starts, runs)`` ... Set ``runs[i]`` to the items
+      starting from ``starts[i]``.
+    - ``_raw_permute(self, perm)`` ... Reorder items so that ``i``-th item is the
+      ``perm[i]``-th item before reordering.
+    - ``_raw_reverse(self)`` ... Reverse the items in place.
+
+    Bulk operations such as ``extend`` and ``clear`` call these methods. Override
+    them if the backend can insert or delete many items at once.
     """
 
     _mgr = UndoManager()
@@ -53,9 +68,52 @@ class AbstractUndoableList(MutableSequence[_T]):
     def _raw_insert(self, index: int, val: _T) -> None:
         ...
 
+    def _raw_insert_many(self, index: int, values: Iterable[_T]) -> None:
+        """Insert values at index. Override this for a faster implementation."""
+        for i, val in enumerate(values):
+            self._raw_insert(index + i, val)
+        return None
+
+    def _raw_delete_range(self, start: int, stop: int) -> None:
+        """Delete items in [start, stop). Override this for a faster implementation."""
+        for i in reversed(range(start, stop)):
+            self._raw_delitem(i)
+        return None
+
+    def _raw_setitem_runs(self, starts: Sequence[int], runs: list[list[_T]]) -> None:
+        """Set runs of items. Override this for a faster implementation."""
+        for start, run in zip(starts, runs):
+            if len(run) == 1:
+                self._raw_setitem(start, run[0])
+            else:
+                self._raw_setitem(slice(start, start + len(run)), run)
+        return None
+
+    def _raw_permute(self, perm: Sequence[int]) -> None:
+        """Reorder items. Override this for a faster implementation."""
+        self._raw_setitem(slice(0, len(perm)), [self[i] for i in perm])
+        return None
+
+    def _raw_reverse(self) -> None:
+        """Reverse items. Override this for a faster implementation."""
+        return self._raw_permute(range(len(self) - 1, -1, -1))
+
     def __setitem__(self, key: SupportsIndex, val: _T):
         if isinstance(key, slice):
             key = slice(*key.indices(len(self)))
+            val = list(val)
+            indices = range(key.start, key.stop, key.step)
+            if len(indices) == len(val):
+                if key.step < 0:
+                    # diff the items in ascending order
+                    indices = indices[::-1]
+                    key = slice(indices.start, indices.stop, indices.step)
+                    val.reverse()
+                # only store the changed items
+                starts, new_runs, old_runs = self._diff_runs(indices, val)
+                if len(starts) == 0:
+                    return None
+                return self._setitem_runs(key, starts, new_runs, old_runs)
         elif key < 0:
             key += len(self)
         return self._setitem(key, val)
@@ -69,27 +127,128 @@ class AbstractUndoableList(MutableSequence[_T]):
         _val = self[key]
         if isinstance(key, slice):
             _val = list(_val)
+            if key.step == 1:
+                # the slice may change the length
+                key = slice(key.start, key.start + len(val))
         return (key, _val), {}
 
+    @_setitem.set_footprint
+    def _setitem_footprint(self, key, val):
+        if isinstance(key, slice) and len(range(key.start, key.stop, key.step)) != len(
+            val
+        ):
+            # slice assignment that changes the length shifts the following items
+            return (), (range(key.start, sys.maxsize),)
+        return (), (key,)
+
+    @_setitem.batch_receiver
+    def _setitem(self, arguments: list[tuple[tuple, dict]]):
+        items: dict[int, _T] = {}
+        for (key, val), _ in arguments:
+            if isinstance(key, slice):
+                # slice assignment may change the length
+                for (key, val), _ in arguments:
+                    self._raw_setitem(key, val)
+                return None
+            items[key] = val
+        start, stop = min(items), max(items) + 1
+        if stop - start == len(items):
+            values = [items[i] for i in range(start, stop)]
+            self._raw_setitem(slice(start, stop), values)
+        else:
+            for key, val in items.items():
+                self._raw_setitem(key, val)
+        return None
+
+    def _diff_runs(
+        self, indices: range, values: list[_T]
+    ) -> tuple[array[int], list[list[_T]], list[list[_T]]]:
+        """Find runs of changed items. ``indices`` must be in ascending order."""
+        starts = array("q")
+        new_runs: list[list[_T]] = []
+        old_runs: list[list[_T]] = []
+        old_values = self[slice(indices.start, indices.stop, indices.step)]
+        prev = -2
+        for idx, old, new in zip(indices, old_values, values):
+            if old is new:
+                continue
+            if idx == prev + 1:
+                new_runs[-1].append(new)
+                old_runs[-1].append(old)
+            else:
+                starts.append(idx)
+                new_runs.append([new])
+                old_runs.append([old])
+            prev = idx
+        return starts, new_runs, old_runs
+
+    @_mgr.undoable(name="__setitem__")
+    def _setitem_runs(
+        self, key: slice, starts: array[int], new_runs: list, old_runs: list
+    ):
+        self._raw_setitem_runs(starts, new_runs)
+
+    @_setitem_runs.undo_def
+    def _setitem_runs(
+        self, key: slice, starts: array[int], new_runs: list, old_runs: list
+    ):
+        self._raw_setitem_runs(starts, old_runs)
+
+    @_setitem_runs.set_footprint
+    def _setitem_runs_footprint(self, key, starts, new_runs, old_runs):
+        return (), [range(i, i + len(run)) for i, run in zip(starts, new_runs)]
+
+    @_setitem_runs.set_macro_steps
+    def _setitem_runs_macro_steps(self, key, starts, new_runs, old_runs):
+        values = [val for run in new_runs for val in run]
+        if len(values) != len(range(key.start, key.stop, key.step)):
+            # unchanged items are not recorded so the call cannot be replayed
+            return None
+        return [("__setitem__", (key, values), {})]
+
     def __delitem__(self, key) -> None:
         if isinstance(key, slice):
-            key = slice(*key.indices(len(self)))
+            indices = range(*key.indices(len(self)))
+            if indices.step < 0:
+                # delete the items in ascending order
+                indices = indices[::-1]
+            key = slice(indices.start, indices.stop, indices.step)
         elif key < 0:
             key += len(self)
         return self._delitem_command(key, self[key])
 
     @_mgr.undoable
     def _delitem_command(self, key, val):
-        self._raw_delitem(key)
+        if isinstance(key, slice) and key.step == 1:
+            self._raw_delete_range(key.start, max(key.start, key.stop))
+        else:
+            self._raw_delitem(key)
 
     @_delitem_command.undo_def
     def _delitem_command(self, key, val):
         if isinstance(key, slice):
-            for i, idx in enumerate(range(key.start, key.stop, key.step)):
-                self._raw_insert(idx, val[i])
+            if key.step == 1:
+                self._raw_insert_many(key.start, val)
+            else:
+                for i, idx in enumerate(range(key.start, key.stop, key.step)):
+                    self._raw_insert(idx, val[i])
         else:
             self._raw_insert(key, val)
 
+    @_delitem_command.set_footprint
+    def _delitem_footprint(self, key, val):
+        # deletion shifts all the following items
+        if isinstance(key, slice):
+            indices = range(key.start, key.stop, key.step)
+            if len(indices) == 0:
+                return (), ()
+            key = min(indices)
+        return (), (range(key, sys.maxsize),)
+
+    @_delitem_command.set_macro_steps
+    def _delitem_macro_steps(self, key, val):
+        return [("__delitem__", (key,), {})]
+
     @_mgr.undoable
     def insert(self, index: int, val: _T):
         self._raw_insert(index, val)
@@ -98,20 +257,96 @@ class AbstractUndoableList(MutableSequence[_T]):
     def insert(self, index: int, val: _T):
         self._raw_delitem(index)
 
+    @insert.set_footprint
+    def _insert_footprint(self, index: int, val: _T):
+        # insertion shifts all the following items
+        return (), (range(index, sys.maxsize),)
+
+    @_mgr.undoable(name="append")
+    def _append(self, index: int, val: _T):
+        self._raw_insert(index, val)
+
+    @_append.undo_def
+    def _append(self, index: int, val: _T):
+        self._raw_delitem(index)
+
+    @_append.set_footprint
+    def _append_footprint(self, index: int, val: _T):
+        return (), (range(index, sys.maxsize),)
+
+    @_append.set_macro_steps
+    def _append_macro_steps(self, index: int, val: _T):
+        # the index depends on the length of the recorded list
+        return [("append", (val,), {})]
+
+    @_mgr.undoable(name="append")
+    def _tail(self, start: int, values: list[_T]):
+        self._raw_insert_many(start, values)
+
+    @_tail.undo_def
+    def _tail(self, start: int, values: list[_T]):
+        self._raw_delete_range(start, start + len(values))
+
+    @_tail.reduce_rule
+    def _tail_rule(self, args0, args1):
+        values = args0["values"]
+        if args1["start"] != args0["start"] + len(values):
+            return None
+        # the list of the older command is owned by it and it is replaced
+        values.extend(args1["values"])
+        return {"start": args0["start"], "values": values}
+
+    @_tail.set_footprint
+    def _tail_footprint(self, start: int, values: list[_T]):
+        return (), (range(start, sys.maxsize),)
+
+    @_tail.set_macro_steps
+    def _tail_macro_steps(self, start: int, values: list[_T]):
+        return [("extend", (list(values),), {})]
+
     # reimplemented methods
 
+    _is_appending = False
+
+    def append(self, value: _T) -> None:
+        """Append a value to the end of the list."""
+        if self._is_appending:
+            with self._mgr.reducing():
+                return self._tail(len(self), [value])
+        return self._append(len(self), value)
+
+    @contextmanager
+    def appending(self):
+        """
+        Merge consecutive appends into one command in this context.
+
+        The merged command stores the start index and the appended items in one
+        list, and undoing it deletes all of them at once.
+
+        >>> with lst.appending():
+        ...     for record in stream:
+        ...         lst.append(record)
+        """
+        was_appending = self._is_appending
+        self._is_appending = True
+        try:
+            yield self
+        finally:
+            self._is_appending = was_appending
+        return None
+
     def extend(self, values: Iterable[_T]) -> None:
         """Extend the list with given values."""
-        return self._extend(values)
+        return self._extend(list(values))
 
     @_mgr.undoable
     def _extend(self, values):
-        for val in values:
-            self._raw_insert(len(self), val)
+        self._raw_insert_many(len(self), values)
 
     @_extend.undo_def
     def _extend(self, values):
-        [self._raw_delitem(-1) for i in reversed(range(len(values)))]
+        n = len(self)
+        self._raw_delete_range(n - len(values), n)
 
     def clear(self) -> None:
         """Clear the list."""
@@ -119,15 +354,64 @@ class AbstractUndoableList(MutableSequence[_T]):
 
     @_mgr.undoable
     def _clear(self, data: list[_T]):
-        [self._raw_delitem(i) for i in reversed(range(len(self)))]
+        self._raw_delete_range(0, len(self))
 
     @_clear.undo_def
     def _clear(self, data: list[_T]):
-        self._extend._call_raw(data)
+        self._raw_insert_many(0, data)
+
+    @_clear.set_macro_steps
+    def _clear_macro_steps(self, data: list[_T]):
+        return [("clear", (), {})]
 
     def reverse(self) -> None:
-        n = len(self)
-        self[:] = [self[i] for i in range(n - 1, -1, -1)]
+        """Reverse the list in place."""
+        return self._reverse()
+
+    @_mgr.undoable(name="reverse")
+    def _reverse(self):
+        self._raw_reverse()
+
+    @_reverse.undo_def
+    def _reverse(self):
+        self._raw_reverse()
+
+    @_reverse.set_footprint
+    def _reverse_footprint(self):
+        return (), (range(0, sys.maxsize),)
+
+    def sort(self, *, key=None, reverse: bool = False) -> None:
+        """Sort the list in place."""
+        values = list(self)
+        if key is None:
+            _key = values.__getitem__
+        else:
+
+            def _key(i: int):
+                return key(values[i])
+
+        perm = array("q", sorted(range(len(values)), key=_key, reverse=reverse))
+        return self._permute(perm)
+
+    @_mgr.undoable(name="sort")
+    def _permute(self, perm: array[int]):
+        self._raw_permute(perm)
+
+    @_permute.undo_def
+    def _permute(self, perm: array[int]):
+        inv = array("q", bytes(perm.itemsize * len(perm)))
+        for i, j in enumerate(perm):
+            inv[j] = i
+        self._raw_permute(inv)
+
+    @_permute.set_footprint
+    def _permute_footprint(self, perm: array[int]):
+        return (), (range(0, len(perm)),)
+
+    @_permute.set_macro_steps
+    def _permute_macro_steps(self, perm: array[int]):
+        # the permutation is sorted by the items of the recorded list
+        return None
 
     def undo(self):
         """Undo the last operation."""
@@ -161,5 +445,20 @@ class UndoableList(AbstractUndoableList[_T]):
     def _raw_insert(self, index: int, val: _T):
         self._list.insert(index, val)
 
-    def sort(self, *, key=None, reverse=False):
-        self[:] = sorted(self._list, key=key, reverse=reverse)
+    def _raw_insert_many(self, index: int, values: Iterable[_T]) -> None:
+        self._list[index:index] = values
+
+    def _raw_delete_range(self, start: int, stop: int) -> None:
+        del self._list[start:stop]
+
+    def _raw_setitem_runs(self, starts: Sequence[int], runs: list[list[_T]]) -> None:
+        _list = self._list
+        for start, run in zip(starts, runs):
+            _list[start : start + len(run)] = run
+
+    def _raw_permute(self, perm: Sequence[int]) -> None:
+        _list = self._list
+        _list[: len(perm)] = [_list[i] for i in perm]
+
+    def _raw_reverse(self) -> None:
+        self._list.reverse()
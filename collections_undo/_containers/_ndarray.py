@@ -2,16 +2,25 @@ from __future__ import annotations
 from abc import abstractmethod, abstractproperty, ABC
 from operator import mul
 from functools import reduce
-from typing import Iterable, SupportsIndex, TYPE_CHECKING
+from itertools import chain
+import math
+from typing import Any, Iterable, SupportsIndex, TYPE_CHECKING
 from collections_undo._stack import UndoManager
 
 if TYPE_CHECKING:
+    import numpy as np
+    from typing_extensions import Self
+
     _Shape = tuple[int, ...]
 
 
-class AbstractUndoableNDArray(ABC):
+def _measure_nbytes(*args, **kwargs) -> float:
+    """Count the total bytes of the array arguments."""
+    return float(sum(getattr(arg, "nbytes", 0) for arg in chain(args, kwargs.values())))
 
-    _mgr = UndoManager()
+
+class AbstractUndoableNDArray(ABC):
+    _mgr = UndoManager(measure=_measure_nbytes)
 
     def __repr__(self) -> str:
         clsname = type(self).__name__
@@ -54,22 +63,56 @@ class AbstractUndoableNDArray(ABC):
     def _raw_concatenate(self, other, axis: int = 0) -> None:
         ...
 
+    def _raw_truncate(self, size: int, axis: int = 0) -> None:
+        """
+        Truncate the array to the size along the axis.
+
+        Override this to support ``concatenate``, which is undone by truncation.
+        """
+        raise TypeError(f"{type(self).__name__} does not support truncation.")
+
+    def _raw_inplace_op(self, op: str, operand) -> None:
+        """
+        Apply the ufunc of name ``op`` to the array in place.
+
+        Override this for a faster implementation.
+        """
+        self._raw_setitem(..., self._op_result(op, operand))
+        return None
+
+    def _op_result(self, op: str, operand):
+        """Return the result of the in-place operation as a new array."""
+        import numpy as np
+
+        out = np.array(self[...])
+        getattr(np, op)(out, operand, out=out, casting="same_kind")
+        return out
+
+    def _inverse_op(self, op: str, operand) -> tuple[str, Any] | None:
+        """
+        Return the inverse operation and operand if ``op`` is exactly invertible.
+
+        Override this method to record invertible operations without copying the
+        data. Otherwise, the modified region is copied.
+        """
+        return None
+
     def reshape(self, *shape):
         """Reshape array **inplace**"""
-        if len(shape) == 1 and hasattr(shape, "__iter__"):
-            shape = tuple(shape)
+        if len(shape) == 1 and hasattr(shape[0], "__iter__"):
+            shape = tuple(shape[0])
 
         # normalize shape
         if -1 in shape:
             _shape = list(shape)
-            missing = prod(self.shape) / prod(s for s in _shape if s > 0)
+            missing = prod(self.shape) // prod(s for s in _shape if s > 0)
             _shape[_shape.index(-1)] = missing
             shape = tuple(_shape)
         elif prod(shape) != prod(self.shape):
             raise ValueError(
                 f"Cannot reshape array of shape {self.shape} into shape {shape}."
             )
-        return self._reshape(shape)
+        return self._reshape(shape, self.shape)
 
     @_mgr.undoable
     def _reshape(self, shape: _Shape, old_shape: _Shape):
@@ -79,23 +122,37 @@ class AbstractUndoableNDArray(ABC):
     def _reshape(self, shape: _Shape, old_shape: _Shape):
         self._raw_reshape(old_shape)
 
+    @_reshape.set_macro_steps
+    def _reshape_macro_steps(self, shape: _Shape, old_shape: _Shape):
+        return [("reshape", (shape,), {})]
+
     def ravel(self):
         return self.reshape((self.size,))
 
-    def concatenate(self, other, axis=0):
+    def concatenate(self, other, axis: int = 0):
+        """Concatenate an array along the axis **inplace**."""
         if axis < 0:
             axis += self.ndim
-        sl = (slice(None),) * axis + (other.shape[axis])
-        return self._concatenate(other, None, axis=axis)
+        if not 0 <= axis < self.ndim:
+            raise ValueError(f"axis {axis} is out of bounds for {self.ndim}-D array.")
+        if type(self)._raw_truncate is AbstractUndoableNDArray._raw_truncate:
+            # refuse before modifying the array, as the command cannot be undone
+            raise TypeError(
+                f"{type(self).__name__} must implement _raw_truncate to concatenate."
+            )
+        return self._concatenate(other, self.shape[axis], axis=axis)
 
     @_mgr.undoable
-    def _concatenate(self, other, sl: slice, axis=0):
+    def _concatenate(self, other, size: int, axis: int = 0):
         return self._raw_concatenate(other, axis=axis)
 
     @_concatenate.undo_def
-    def _concatenate(self, other, sl: slice, axis=0):
-        old_shape = self.shape
-        # TODO:
+    def _concatenate(self, other, size: int, axis: int = 0):
+        return self._raw_truncate(size, axis=axis)
+
+    @_concatenate.set_macro_steps
+    def _concatenate_macro_steps(self, other, size: int, axis: int = 0):
+        return [("concatenate", (other,), {"axis": axis})]
 
     def __setitem__(self, key: SupportsIndex | tuple[SupportsIndex], val):
         if isinstance(key, tuple):
@@ -115,6 +172,52 @@ class AbstractUndoableNDArray(ABC):
         _val = self[key]
         return (key, _val), {}
 
+    def _apply_inplace(self, op: str, operand) -> Self:
+        if (inverse := self._inverse_op(op, operand)) is not None:
+            if _is_identity(op, operand):
+                # such as ``x += 0``, which changes nothing
+                return self
+            self._inplace_op(op, operand, *inverse)
+        else:
+            self[...] = self._op_result(op, operand)
+        return self
+
+    @_mgr.undoable(name="inplace_op")
+    def _inplace_op(self, op: str, operand, inverse_op: str, inverse_operand):
+        self._raw_inplace_op(op, operand)
+
+    @_inplace_op.undo_def
+    def _inplace_op(self, op: str, operand, inverse_op: str, inverse_operand):
+        self._raw_inplace_op(inverse_op, inverse_operand)
+
+    @_inplace_op.set_macro_steps
+    def _inplace_op_macro_steps(self, op: str, operand, inverse_op, inverse_operand):
+        return [(_INPLACE_METHODS[op], (operand,), {})]
+
+    def __iadd__(self, other) -> Self:
+        return self._apply_inplace("add", other)
+
+    def __isub__(self, other) -> Self:
+        return self._apply_inplace("subtract", other)
+
+    def __imul__(self, other) -> Self:
+        return self._apply_inplace("multiply", other)
+
+    def __itruediv__(self, other) -> Self:
+        return self._apply_inplace("true_divide", other)
+
+    def __ifloordiv__(self, other) -> Self:
+        return self._apply_inplace("floor_divide", other)
+
+    def __iand__(self, other) -> Self:
+        return self._apply_inplace("bitwise_and", other)
+
+    def __ior__(self, other) -> Self:
+        return self._apply_inplace("bitwise_or", other)
+
+    def __ixor__(self, other) -> Self:
+        return self._apply_inplace("bitwise_xor", other)
+
     def undo(self):
         """Undo the last operation."""
         return self._mgr.undo()
@@ -127,10 +230,400 @@ class AbstractUndoableNDArray(ABC):
 def _normalize_key(key, n):
     if isinstance(key, slice):
         key = slice(*key.indices(n))
-    elif key < 0:
-        key += len(n)
+    elif isinstance(key, int) and key < 0:
+        key += n
     return key
 
 
 def prod(x: Iterable[int]) -> int:
-    return reduce(mul, x, initial=1)
+    return reduce(mul, x, 1)
+
+
+# inverse of exactly invertible operations on integer arrays (modulo overflow)
+_INT_INVERSE = {
+    "add": "subtract",
+    "subtract": "add",
+    "bitwise_xor": "bitwise_xor",
+}
+
+
+# identity elements of the operations
+_IDENTITY = {
+    "add": 0,
+    "subtract": 0,
+    "multiply": 1,
+    "true_divide": 1,
+    "bitwise_or": 0,
+    "bitwise_xor": 0,
+}
+
+
+def _is_identity(op: str, operand: Any) -> bool:
+    """True if the operand is a scalar identity element of the operation."""
+    if (identity := _IDENTITY.get(op)) is None or getattr(operand, "ndim", 0) != 0:
+        return False
+    return bool(operand == identity)
+
+
+# in-place methods of the ufuncs, used to replay in-place operations
+_INPLACE_METHODS = {
+    "add": "__iadd__",
+    "subtract": "__isub__",
+    "multiply": "__imul__",
+    "true_divide": "__itruediv__",
+    "floor_divide": "__ifloordiv__",
+    "bitwise_and": "__iand__",
+    "bitwise_or": "__ior__",
+    "bitwise_xor": "__ixor__",
+}
+
+
+def _is_integer(key: Any) -> bool:
+    if isinstance(key, bool):
+        return False
+    try:
+        import numpy as np
+    except ImportError:
+        return isinstance(key, int)
+    return isinstance(key, (int, np.integer))
+
+
+def _can_cast_exactly(arr: np.ndarray, dtype: np.dtype) -> bool:
+    """True if the array can be cast to the dtype without changing any value."""
+    import numpy as np
+
+    if np.can_cast(arr.dtype, dtype, casting="safe"):
+        return True
+    if not np.can_cast(arr.dtype, dtype, casting="same_kind"):
+        return False
+    cast = arr.astype(dtype)
+    return np.array_equal(cast.astype(arr.dtype), arr, equal_nan=arr.dtype.kind in "fc")
+
+
+def _is_unchanged(new: np.ndarray, old: np.ndarray) -> bool:
+    """True if the contiguous arrays are identical, including the signs of zeros."""
+    import numpy as np
+
+    if new.dtype.hasobject:
+        return all(a is b for a, b in zip(new.flat, old.flat))
+    return np.array_equal(
+        new.reshape(-1).view(np.uint8), old.reshape(-1).view(np.uint8)
+    )
+
+
+def _index_bounds(indices: np.ndarray, n: int) -> tuple[int, int]:
+    """Bounds of integer indices along an axis of size n."""
+    import numpy as np
+
+    if indices.size == 0:
+        return 0, 0
+    if indices.min() < 0:
+        indices = np.where(indices < 0, indices + n, indices)
+    return int(indices.min()), int(indices.max()) + 1
+
+
+def _basic_region(key, shape: _Shape) -> tuple[tuple, tuple] | None:
+    """
+    Bounding region of a basic index.
+
+    Return the region as a tuple of slices and the index relative to the region, or
+    None if the index is not a basic one (such as a mask or an integer array).
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if not all(isinstance(k, slice) or k is ... or _is_integer(k) for k in key):
+        return None
+    n_ellipsis = sum(k is ... for k in key)
+    if n_ellipsis > 1 or len(key) - n_ellipsis > len(shape):
+        return None
+    if n_ellipsis:
+        i = next(i for i, k in enumerate(key) if k is ...)
+        fill = (slice(None),) * (len(shape) - len(key) + 1)
+        key = key[:i] + fill + key[i + 1 :]
+    else:
+        key = key + (slice(None),) * (len(shape) - len(key))
+
+    region = []
+    local = []
+    for k, n in zip(key, shape):
+        if isinstance(k, slice):
+            indices = range(*k.indices(n))
+            if len(indices) == 0:
+                region.append(slice(0, 0))
+                local.append(slice(0, 0))
+                continue
+            first, last = indices[0], indices[-1]
+            lo = min(first, last)
+            region.append(slice(lo, max(first, last) + 1))
+            stop = last - lo + (1 if indices.step > 0 else -1)
+            local.append(slice(first - lo, stop if stop >= 0 else None, indices.step))
+        else:
+            k = int(k)
+            if not -n <= k < n:
+                return None  # let numpy raise IndexError
+            if k < 0:
+                k += n
+            region.append(slice(k, k + 1))
+            local.append(0)
+    return tuple(region), tuple(local)
+
+
+class UndoableNDArray(AbstractUndoableNDArray):
+    """
+    An undoable array backed by a NumPy array.
+
+    ``__setitem__`` records only the bounding region of the written items as
+    contiguous copies of the new and old values, and undo/redo write them back in
+    place. The size of each command is its number of bytes. In-place operators that
+    are exactly invertible, such as adding an integer to an integer array or
+    multiplying a float array by a power of two, only record the operand.
+
+    Items are returned as copies. Use ``view`` for zero-copy read access.
+
+    >>> arr = UndoableNDArray(np.zeros((1000, 1000)))
+    >>> arr[10:20, 5] = 1  # stores two arrays of shape (10, 1)
+    >>> arr.undo()
+    """
+
+    _mgr = AbstractUndoableNDArray._mgr
+
+    def __init__(self, data: Any = (), dtype: Any = None):
+        import numpy as np
+
+        self._array = np.array(data, dtype=dtype)
+        # _array is always the first rows of _buffer
+        self._buffer = self._array
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._array!r})"
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if copy:
+            return self._array.astype(self.dtype if dtype is None else dtype)
+        if dtype is None or self.dtype == dtype:
+            return self.view()
+        if copy is False:
+            raise ValueError(
+                f"Cannot convert {self.dtype} array to {dtype} without copy."
+            )
+        return self._array.astype(dtype)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self._array.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, key):
+        import numpy as np
+
+        # return a copy so that in-place operations such as ``arr[1:3] += 1`` go
+        # through __setitem__
+        out = self._array[key]
+        if isinstance(out, np.ndarray) and np.may_share_memory(out, self._array):
+            out = out.copy()
+        return out
+
+    def view(self) -> np.ndarray:
+        """Return a read-only view of the array."""
+        out = self._array.view()
+        out.flags.writeable = False
+        return out
+
+    def _raw_setitem(self, key, val) -> None:
+        self._array[key] = val
+
+    def _raw_reshape(self, shape: _Shape) -> None:
+        self._buffer = self._array = self._array.reshape(shape)
+
+    def _raw_concatenate(self, other, axis: int = 0) -> None:
+        import numpy as np
+
+        arr = self._array
+        other = np.asarray(other)
+        # undo cannot restore the dtype if the array is upcast, and the values must
+        # not be wrapped or truncated by downcasting
+        if not _can_cast_exactly(other, arr.dtype):
+            raise TypeError(
+                f"Cannot concatenate {other.dtype} array to {arr.dtype} array "
+                "without changing the values."
+            )
+        other = other.astype(arr.dtype, copy=False)
+        if axis != 0 or other.ndim != arr.ndim or other.shape[1:] != arr.shape[1:]:
+            self._buffer = self._array = np.concatenate([arr, other], axis=axis)
+            return None
+        n0 = arr.shape[0]
+        n1 = n0 + other.shape[0]
+        capacity = self._buffer.shape[0]
+        if n1 > capacity:
+            # over-allocate like list to make repeated appends amortized O(1)
+            capacity = max(n1, capacity + (capacity >> 1))
+            buffer = np.empty((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            buffer[:n0] = arr
+            self._buffer = buffer
+        self._buffer[n0:n1] = other
+        self._array = self._buffer[:n1]
+        return None
+
+    def _raw_truncate(self, size: int, axis: int = 0) -> None:
+        self._array = self._array[(slice(None),) * axis + (slice(0, size),)]
+        if axis != 0:
+            self._buffer = self._array
+        return None
+
+    def _raw_inplace_op(self, op: str, operand) -> None:
+        import numpy as np
+
+        ufunc = getattr(np, op)
+        ufunc(self._array, operand, out=self._array, casting="same_kind")
+
+    def _inverse_op(self, op: str, operand) -> tuple[str, Any] | None:
+        import numpy as np
+
+        kind = self.dtype.kind
+        if np.ndim(operand) != 0 or isinstance(operand, np.ndarray):
+            return None
+        if kind in "iu" and _is_integer(operand):
+            if (inverse := _INT_INVERSE.get(op)) is not None:
+                return inverse, operand
+        elif kind == "b" and op == "bitwise_xor":
+            if isinstance(operand, (bool, np.bool_)):
+                return op, operand
+        elif kind == "f" and op in ("multiply", "true_divide"):
+            if isinstance(operand, (bool, np.bool_)) or not isinstance(
+                operand, (int, float, np.integer, np.floating)
+            ):
+                return None
+            if (exp := self._power_of_two(operand)) is None:
+                return None
+            if op == "true_divide":
+                exp = -exp
+            if self._can_scale_exactly(exp):
+                inverse = "true_divide" if op == "multiply" else "multiply"
+                return inverse, operand
+        return None
+
+    def _power_of_two(self, value) -> int | None:
+        """Return the exponent if the value is a power of two for the dtype."""
+        import numpy as np
+
+        if self.dtype.itemsize > 8:
+            return None  # longdouble
+        finfo = np.finfo(self.dtype)
+        try:
+            value = abs(float(value))
+        except OverflowError:
+            return None
+        if not float(finfo.tiny) <= value <= float(finfo.max):
+            return None
+        mantissa, exp = math.frexp(value)
+        return exp - 1 if mantissa == 0.5 else None
+
+    def _can_scale_exactly(self, exp: int) -> bool:
+        """True if multiplying by 2**exp neither overflows nor loses precision."""
+        import numpy as np
+
+        finfo = np.finfo(self.dtype)
+        arr = self._array
+        finite = np.isfinite(arr)
+        if exp > 0:
+            largest = float(np.max(np.abs(arr), where=finite, initial=0))
+            return largest <= float(finfo.max) / 2.0**exp
+        elif exp < 0:
+            smallest = float(
+                np.min(np.abs(arr), where=finite & (arr != 0), initial=np.inf)
+            )
+            return smallest == math.inf or smallest * 2.0**exp >= float(finfo.tiny)
+        return True
+
+    def concatenate(self, other, axis: int = 0) -> None:
+        """Concatenate an array along the axis **inplace**."""
+        import numpy as np
+
+        # copy the array so that redo is not affected by later changes of other
+        return super().concatenate(np.array(other), axis=axis)
+
+    def _touched_region(self, key) -> tuple[slice, ...] | None:
+        """Bounding region of any index, or None if no item is touched."""
+        import numpy as np
+
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = tuple(np.asarray(k) if isinstance(k, list) else k for k in key)
+        shape = self.shape
+        n_used = 0  # number of axes used by the key
+        for k in key:
+            if isinstance(k, np.ndarray) and k.dtype == bool:
+                n_used += k.ndim
+            elif k is not None and k is not ...:
+                n_used += 1
+        if n_used > len(shape):
+            raise IndexError(f"too many indices for {len(shape)}-D array.")
+
+        bounds: list[tuple[int, int]] = []
+        for k in key:
+            if k is None:
+                continue
+            elif k is ...:
+                n_fill = len(shape) - n_used
+                bounds.extend((0, n) for n in shape[len(bounds) : len(bounds) + n_fill])
+                n_used = len(shape)  # only one ellipsis is allowed
+            elif isinstance(k, np.ndarray) and k.dtype == bool:
+                if k.ndim == 0:
+                    if not k:
+                        return None
+                    continue
+                for idx, n in zip(np.nonzero(k), shape[len(bounds) :]):
+                    bounds.append(_index_bounds(idx, n))
+            elif isinstance(k, slice):
+                indices = range(*k.indices(shape[len(bounds)]))
+                if len(indices) == 0:
+                    return None
+                lo, hi = sorted((indices[0], indices[-1]))
+                bounds.append((lo, hi + 1))
+            elif isinstance(k, np.ndarray):
+                if k.dtype.kind not in "iu":
+                    raise IndexError("arrays used as indices must be of integer type.")
+                bounds.append(_index_bounds(k, shape[len(bounds)]))
+            else:
+                bounds.append(_index_bounds(np.asarray(k), shape[len(bounds)]))
+        bounds.extend((0, n) for n in shape[len(bounds) :])
+        if any(lo >= hi for lo, hi in bounds):
+            return None
+        return tuple(slice(lo, hi) for lo, hi in bounds)
+
+    def __setitem__(self, key, val) -> None:
+        if (basic := _basic_region(key, self.shape)) is not None:
+            region, local = basic
+            old = self._array[region].copy()
+            new = old.copy()
+            new[local] = val
+        elif (region := self._touched_region(key)) is not None:
+            # advanced indexing: write once to know the new values of the region
+            old = self._array[region].copy()
+            self._array[key] = val
+            new = self._array[region].copy()
+            self._array[region] = old
+        else:
+            return None
+        if new.size == 0 or _is_unchanged(new, old):
+            return None
+        return self._setitem_region(region, new, old)
+
+    @_mgr.undoable(name="__setitem__")
+    def _setitem_region(self, region: tuple[slice, ...], new, old):
+        self._array[region] = new
+
+    @_setitem_region.undo_def
+    def _setitem_region(self, region: tuple[slice, ...], new, old):
+        self._array[region] = old
+
+    @_setitem_region.set_macro_steps
+    def _setitem_region_macro_steps(self, region: tuple[slice, ...], new, old):
+        # the region includes the unchanged items of the recorded array
+        return None
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, TypeVar, Union
+
+from collections_undo._containers._list import AbstractUndoableList
+
+_T = TypeVar("_T")
+
+# maximum number of items in a leaf
+_CHUNK = 32
+
+
+class _Leaf:
+    __slots__ = ("items", "size")
+
+    height = 0
+
+    def __init__(self, items: tuple):
+        self.items = items
+        self.size = len(items)
+
+    def __repr__(self) -> str:
+        return f"<chunk of {self.size} items>"
+
+
+class _Node:
+    __slots__ = ("left", "right", "size", "height")
+
+    def __init__(self, left: _Tree, right: _Tree):
+        self.left = left
+        self.right = right
+        self.size = left.size + right.size
+        self.height = max(left.height, right.height) + 1
+
+    def __repr__(self) -> str:
+        return f"<tree of {self.size} items>"
+
+
+_Tree = Union[_Leaf, _Node]
+
+# Persistent vector as an AVL tree of leaf chunks. All the functions below return
+# new trees that share unchanged subtrees with the input. An empty tree is None.
+
+
+def _height(tree: _Tree | None) -> int:
+    return -1 if tree is None else tree.height
+
+
+def _balance(left: _Tree, right: _Tree) -> _Node:
+    """Join two trees whose heights differ by at most two."""
+    if left.height > right.height + 1:
+        if _height(left.left) >= _height(left.right):
+            return _Node(left.left, _Node(left.right, right))
+        mid = left.right
+        return _Node(_Node(left.left, mid.left), _Node(mid.right, right))
+    if right.height > left.height + 1:
+        if _height(right.right) >= _height(right.left):
+            return _Node(_Node(left, right.left), right.right)
+        mid = right.left
+        return _Node(_Node(left, mid.left), _Node(mid.right, right.right))
+    return _Node(left, right)
+
+
+def _join(a: _Tree | None, b: _Tree | None, chunk: int = _CHUNK) -> _Tree | None:
+    """Concatenate two trees. Adjacent leaves are merged up to ``chunk`` items."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if type(a) is _Leaf and type(b) is _Leaf and a.size + b.size <= chunk:
+        return _Leaf(a.items + b.items)
+    if a.height > b.height + 1:
+        return _balance(a.left, _join(a.right, b, chunk))
+    if b.height > a.height + 1:
+        return _balance(_join(a, b.left, chunk), b.right)
+    return _Node(a, b)
+
+
+def _split(
+    tree: _Tree | None, i: int, chunk: int = _CHUNK
+) -> tuple[_Tree | None, _Tree | None]:
+    """Split a tree into [0, i) and [i, size)."""
+    if tree is None or i <= 0:
+        return None, tree
+    if i >= tree.size:
+        return tree, None
+    if type(tree) is _Leaf:
+        return _Leaf(tree.items[:i]), _Leaf(tree.items[i:])
+    n_left = tree.left.size
+    if i < n_left:
+        left, right = _split(tree.left, i, chunk)
+        return left, _join(right, tree.right, chunk)
+    elif i > n_left:
+        left, right = _split(tree.right, i - n_left, chunk)
+        return _join(tree.left, left, chunk), right
+    return tree.left, tree.right
+
+
+def _build(values: Iterable, chunk: int = _CHUNK) -> _Tree | None:
+    """Build a balanced tree."""
+    items = tuple(values)
+    return _build_leaves(
+        [_Leaf(items[i : i + chunk]) for i in range(0, len(items), chunk)]
+    )
+
+
+def _build_leaves(leaves: list[_Leaf]) -> _Tree | None:
+    """Build a balanced tree from leaves."""
+
+    def _build_range(start: int, stop: int) -> _Tree | None:
+        if stop - start == 0:
+            return None
+        if stop - start == 1:
+            return leaves[start]
+        mid = (start + stop) // 2
+        return _Node(_build_range(start, mid), _build_range(mid, stop))
+
+    return _build_range(0, len(leaves))
+
+
+def _get(tree: _Tree, i: int):
+    while type(tree) is _Node:
+        n_left = tree.left.size
+        if i < n_left:
+            tree = tree.left
+        else:
+            tree = tree.right
+            i -= n_left
+    return tree.items[i]
+
+
+def _set(tree: _Tree, i: int, value) -> _Tree:
+    if type(tree) is _Leaf:
+        items = list(tree.items)
+        items[i] = value
+        return _Leaf(tuple(items))
+    n_left = tree.left.size
+    if i < n_left:
+        return _Node(_set(tree.left, i, value), tree.right)
+    return _Node(tree.left, _set(tree.right, i - n_left, value))
+
+
+def _insert(tree: _Tree | None, i: int, value) -> _Tree:
+    if tree is None:
+        return _Leaf((value,))
+    if type(tree) is _Leaf:
+        items = tree.items[:i] + (value,) + tree.items[i:]
+        if len(items) > _CHUNK:
+            half = len(items) // 2
+            return _Node(_Leaf(items[:half]), _Leaf(items[half:]))
+        return _Leaf(items)
+    n_left = tree.left.size
+    if i <= n_left:
+        return _balance(_insert(tree.left, i, value), tree.right)
+    return _balance(tree.left, _insert(tree.right, i - n_left, value))
+
+
+def _delete(tree: _Tree, i: int) -> _Tree | None:
+    if type(tree) is _Leaf:
+        items = tree.items[:i] + tree.items[i + 1 :]
+        return _Leaf(items) if items else None
+    n_left = tree.left.size
+    if i < n_left:
+        if (left := _delete(tree.left, i)) is None:
+            return tree.right
+        return _balance(left, tree.right)
+    if (right := _delete(tree.right, i - n_left)) is None:
+        return tree.left
+    return _balance(tree.left, right)
+
+
+def _iter(tree: _Tree | None) -> Iterator:
+    stack = [] if tree is None else [tree]
+    while stack:
+        tree = stack.pop()
+        if type(tree) is _Leaf:
+            yield from tree.items
+        else:
+            stack.append(tree.right)
+            stack.append(tree.left)
+
+
+class UndoablePersistentList(AbstractUndoableList[_T]):
+    """
+    An undoable list backed by a persistent vector.
+
+    Items are stored in a balanced tree of chunks. Every modification creates a new
+    version of the tree that shares the unchanged chunks with the previous one, so
+    a command only stores the new and old versions. Undo and redo just switch the
+    version, and ``clear`` or ``copy`` cost nothing.
+    """
+
+    _mgr = AbstractUndoableList._mgr
+
+    def __init__(self, iterable: Iterable[_T] = (), /):
+        self._root: _Tree | None = _build(iterable)
+
+    def __len__(self) -> int:
+        return 0 if self._root is None else self._root.size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return list(_iter(_split(_split(self._root, stop)[0], start)[1]))
+            return list(self)[key]
+        return _get(self._root, range(len(self))[key])
+
+    def __iter__(self) -> Iterator[_T]:
+        return _iter(self._root)
+
+    def copy(self) -> UndoablePersistentList[_T]:
+        """Return a copy of the list in O(1) time. The history is not copied."""
+        out = type(self).__new__(type(self))
+        out._root = self._root
+        return out
+
+    def _raw_setitem(self, key, val) -> None:
+        self._root = self._replaced(key, val)
+
+    def _raw_delitem(self, key) -> None:
+        self._root = self._deleted(key)
+
+    def _raw_insert(self, index: int, val: _T) -> None:
+        self._root = _insert(self._root, index, val)
+
+    def _raw_insert_many(self, index: int, values: Iterable[_T]) -> None:
+        left, right = _split(self._root, index)
+        self._root = _join(_join(left, _build(values)), right)
+
+    def _raw_delete_range(self, start: int, stop: int) -> None:
+        left, rest = _split(self._root, start)
+        self._root = _join(left, _split(rest, stop - start)[1])
+
+    def _replaced(self, key, val) -> _Tree | None:
+        """Tree with the item(s) replaced."""
+        if not isinstance(key, slice):
+            return _set(self._root, range(len(self))[key], val)
+        start, stop, step = key.indices(len(self))
+        if step == 1:
+            left, rest = _split(self._root, start)
+            right = _split(rest, max(stop - start, 0))[1]
+            return _join(_join(left, _build(val)), right)
+        items = list(self)
+        items[key] = val
+        return _build(items)
+
+    def _deleted(self, key) -> _Tree | None:
+        """Tree with the item(s) deleted."""
+        if not isinstance(key, slice):
+            return _delete(self._root, range(len(self))[key])
+        start, stop, step = key.indices(len(self))
+        if step == 1:
+            left, rest = _split(self._root, start)
+            return _join(left, _split(rest, max(stop - start, 0))[1])
+        items = list(self)
+        del items[key]
+        return _build(items)
+
+    # commands
+
+    @_mgr.undoable(name="update")
+    def _update_root(self, root: _Tree | None, old_root: _Tree | None):
+        self._root = root
+
+    @_update_root.undo_def
+    def _update_root(self, root: _Tree | None, old_root: _Tree | None):
+        self._root = old_root
+
+    @_update_root.set_macro_steps
+    def _update_root_macro_steps(self, root: _Tree | None, old_root: _Tree | None):
+        # the new tree is built from the items of the recorded list
+        return None
+
+    # reimplemented methods
+
+    def __setitem__(self, key, val) -> None:
+        if isinstance(key, slice):
+            val = list(val)
+        return self._update_root(self._replaced(key, val), self._root)
+
+    def __delitem__(self, key) -> None:
+        return self._update_root(self._deleted(key), self._root)
+
+    def insert(self, index: int, val: _T) -> None:
+        """Insert a value at the index."""
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        return self._update_root(_insert(self._root, index, val), self._root)
+
+    def extend(self, values: Iterable[_T]) -> None:
+        """Extend the list with given values."""
+        return self._update_root(_join(self._root, _build(values)), self._root)
+
+    def clear(self) -> None:
+        """Clear the list."""
+        return self._update_root(None, self._root)
+
+    def reverse(self) -> None:
+        """Reverse the list in place."""
+        return self._update_root(_build(reversed(list(self))), self._root)
+
+    def sort(self, *, key=None, reverse: bool = False) -> None:
+        """Sort the list in place."""
+        items = sorted(self, key=key, reverse=reverse)
+        return self._update_root(_build(items), self._root)
@@ -1,7 +1,15 @@
 from __future__ import annotations
 from abc import abstractmethod
 
-from typing import Hashable, Iterable, Iterator, MutableSet, TypeVar, TYPE_CHECKING
+from typing import (
+    Any,
+    Hashable,
+    Iterable,
+    Iterator,
+    MutableSet,
+    TypeVar,
+    TYPE_CHECKING,
+)
 from collections_undo._stack import UndoManager
 
 if TYPE_CHECKING:
@@ -37,6 +45,39 @@ class AbstractUndoableSet(MutableSet[_T]):
     def _raw_discard(self, value: _T) -> None:
         ...
 
+    def _raw_update(self, values: Iterable[_T]) -> None:
+        """Add all the values. Override this method for a faster implementation."""
+        for value in values:
+            self._raw_add(value)
+        return None
+
+    def _raw_difference_update(self, values: Iterable[_T]) -> None:
+        """Discard all the values. Override this method for a faster implementation."""
+        for value in values:
+            self._raw_discard(value)
+        return None
+
+    def _raw_get_storage(self) -> Any:
+        """
+        Return the object that stores the items, or None if not supported.
+
+        If supported, ``clear`` swaps the storage with an empty one instead of
+        copying all the items.
+        """
+        return None
+
+    def _raw_set_storage(self, storage: Any | None) -> None:
+        """
+        Set the storage object, or a new empty one if None is given.
+
+        The default implementation only supports None and removes all the items.
+        Override this together with ``_raw_get_storage``.
+        """
+        if storage is not None:
+            raise TypeError(f"{type(self).__name__} does not support storage swap.")
+        self._raw_difference_update(list(self))
+        return None
+
     def add(self, value: _T) -> None:
         if value not in self:
             self._add(value)
@@ -50,6 +91,10 @@ class AbstractUndoableSet(MutableSet[_T]):
     def _add(self, value: _T):
         self._raw_discard(value)
 
+    @_add.set_macro_steps
+    def _add_macro_steps(self, value: _T):
+        return [("add", (value,), {})]
+
     def discard(self, value: _T) -> None:
         if value in self:
             self._discard(value)
@@ -63,56 +108,74 @@ class AbstractUndoableSet(MutableSet[_T]):
     def _discard(self, value: _T) -> None:
         self._raw_add(value)
 
-    @_mgr.undoable(name="add_or_discard")
-    def _add_or_discard(self, values: Iterable[_T], add: Iterable[bool]) -> None:
+    @_discard.set_macro_steps
+    def _discard_macro_steps(self, value: _T):
+        return [("discard", (value,), {})]
+
+    @_mgr.undoable(name="add_and_discard")
+    def _add_and_discard(self, added: frozenset[_T], removed: frozenset[_T]):
         """This method is used for operators."""
-        for val, add in zip(values, add):
-            if add:
-                self._raw_add(val)
-            else:
-                self._raw_discard(val)
-        return None
+        self._raw_difference_update(removed)
+        self._raw_update(added)
+
+    @_add_and_discard.undo_def
+    def _add_and_discard(self, added: frozenset[_T], removed: frozenset[_T]):
+        self._raw_difference_update(added)
+        self._raw_update(removed)
 
-    @_add_or_discard.undo_def
-    def _add_or_discard(self, values: Iterable[_T], add: Iterable[bool]) -> None:
-        for val, add in zip(values, add):
-            if add:
-                self._raw_discard(val)
-            else:
-                self._raw_add(val)
+    @_add_and_discard.set_macro_steps
+    def _add_and_discard_macro_steps(self, added, removed):
+        # the items depend on the items of the recorded set
         return None
 
     # reimplemented methods
 
     def clear(self) -> None:
         """Clear the set."""
-        # NOTE: Must make a copy of the set because size changes during iteration.
-        self._add_or_discard(set(self), [False] * len(self))
+        if (storage := self._raw_get_storage()) is not None:
+            return self._clear_storage(storage)
+        self._add_and_discard(frozenset(), frozenset(self))
+        return None
+
+    @_mgr.undoable(name="clear")
+    def _clear_storage(self, storage: Any):
+        self._raw_set_storage(None)
+
+    @_clear_storage.undo_def
+    def _clear_storage(self, storage: Any):
+        self._raw_set_storage(storage)
+
+    @_clear_storage.set_macro_steps
+    def _clear_storage_macro_steps(self, storage: Any):
+        return [("clear", (), {})]
+
+    def _update_delta(self, added: frozenset[_T], removed: frozenset[_T]) -> None:
+        if added or removed:
+            self._add_and_discard(added, removed)
         return None
 
     def __ior__(self, it) -> Self:
-        _it = [val for val in it if val not in self]
-        self._add_or_discard(_it, [True] * len(_it))
+        self._update_delta(frozenset(val for val in it if val not in self), frozenset())
         return self
 
     def __iand__(self, it) -> Self:
-        cmp = self - it
-        self._add_or_discard(cmp, [False] * len(cmp))
+        if not isinstance(it, (set, frozenset)):
+            it = set(it)
+        self._update_delta(frozenset(), frozenset(val for val in self if val not in it))
         return self
 
     def __ixor__(self, it) -> Self:
         if it is self:
             self.clear()
         else:
-            if not isinstance(it, set):
+            if not isinstance(it, (set, frozenset)):
                 it = set(it)
-            _add = [value not in self for value in it]
-            self._add_or_discard(it, _add)
+            added = frozenset(val for val in it if val not in self)
+            self._update_delta(added, frozenset(it.difference(added)))
         return self
 
     def __isub__(self, it) -> Self:
-        _it = [val for val in it if val in self]
-        self._add_or_discard(_it, [False] * len(_it))
+        self._update_delta(frozenset(), frozenset(val for val in it if val in self))
         return self
 
     def undo(self):
@@ -142,3 +205,15 @@ class UndoableSet(AbstractUndoableSet[_T]):
 
     def _raw_discard(self, value: _T) -> None:
         self._set.discard(value)
+
+    def _raw_update(self, values: Iterable[_T]) -> None:
+        self._set.update(values)
+
+    def _raw_difference_update(self, values: Iterable[_T]) -> None:
+        self._set.difference_update(values)
+
+    def _raw_get_storage(self) -> set[_T]:
+        return self._set
+
+    def _raw_set_storage(self, storage: set[_T] | None) -> None:
+        self._set = set() if storage is None else storage
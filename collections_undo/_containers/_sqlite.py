@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+import pickle
+import sqlite3
+import weakref
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterator,
+    Mapping,
+    MutableSequence,
+    NamedTuple,
+    TypeVar,
+)
+
+from collections_undo._command import BatchCommand, Command, CommandGroup, _CommandBase
+from collections_undo._containers._dict import AbstractUndoableDict
+from collections_undo._reversible import ReversibleFunction
+from collections_undo._stack_utils import CallType
+from collections_undo._store import new_stack
+
+_V = TypeVar("_V")
+
+# key types that can be stored in SQLite as they are
+_KEY_TYPES = (str, int, float, bytes)
+
+# names of the public operations of the undoable methods
+_PUBLIC_NAMES = {
+    "_setitem": "__setitem__",
+    "_delitem": "__delitem__",
+    "_update": "update",
+    "_clear": "clear",
+    "_clear_storage": "clear",
+}
+
+
+class HistoryEntry(NamedTuple):
+    """An event in the history table."""
+
+    seq: int
+    event: str
+    steps: list[tuple[str, tuple, dict[str, Any]]] | None
+
+
+def _describe(cmd: _CommandBase) -> list[tuple[str, tuple, dict[str, Any]]]:
+    """Convert a command into a list of (name, args, kwargs)."""
+    if isinstance(cmd, Command):
+        name = cmd.func.__name__
+        return [(_PUBLIC_NAMES.get(name, name), cmd.args, dict(cmd.kwargs))]
+    elif isinstance(cmd, (CommandGroup, BatchCommand)):
+        out = []
+        for each in cmd.commands:
+            out.extend(_describe(each))
+        return out
+    raise TypeError(f"Cannot describe {cmd!r}.")
+
+
+class _CommandTable:
+    """
+    Commands of an UndoableSqliteDict stored in a table of its database.
+
+    A command of the undoable methods of the dictionary is pickled as the method
+    name and the arguments. Other commands, such as commands of other objects, are
+    kept in memory and only their row IDs are stored in the table.
+    """
+
+    def __init__(self, owner: UndoableSqliteDict):
+        # the table must not keep the dictionary alive
+        self._owner = weakref.ref(owner)
+        self._conn = owner._conn
+        self._name = f"{owner._table}_commands"
+        self._objects: dict[int, _CommandBase] = {}
+        self._names: dict[Callable, str] = {}
+        for cls in reversed(type(owner).__mro__):
+            for attr, value in vars(cls).items():
+                if isinstance(value, ReversibleFunction):
+                    self._names[value._func_fw] = attr
+        # commands are not restored when the database is opened again
+        self._conn.execute(f"DROP TABLE IF EXISTS {self._name}")
+        self._conn.execute(
+            f"CREATE TABLE {self._name} "
+            "(id INTEGER PRIMARY KEY, command BLOB, trash TEXT)"
+        )
+
+    def _method_name(self, func: ReversibleFunction) -> str | None:
+        fw = func._func_fw
+        if getattr(fw, "__self__", None) is not self._owner():
+            return None
+        return self._names.get(getattr(fw, "__func__", None))
+
+    def _dump(self, cmd: _CommandBase, trash: list[str]) -> tuple | None:
+        """Convert a command into a picklable tuple, or None if not supported."""
+        if type(cmd) is Command:
+            if (name := self._method_name(cmd.func)) is None:
+                return None
+            if name == "_clear_storage":
+                trash.append(cmd.args[0])
+            return ("call", name, cmd.args, dict(cmd.kwargs), cmd.size)
+        elif type(cmd) is BatchCommand:
+            if (name := self._method_name(cmd.func)) is None:
+                return None
+            return ("batch", name, cmd.arguments, cmd.size, cmd.sizes)
+        elif type(cmd) is CommandGroup:
+            children = []
+            for each in cmd:
+                if (child := self._dump(each, trash)) is None:
+                    return None
+                children.append(child)
+            return ("group", children, cmd._formatter, cmd._invert)
+        return None
+
+    def _load(self, data: tuple) -> _CommandBase:
+        kind = data[0]
+        if kind == "call":
+            _, name, args, kwargs, size = data
+            return Command(getattr(self._owner(), name), args, kwargs, size)
+        elif kind == "batch":
+            _, name, arguments, size, sizes = data
+            return BatchCommand(getattr(self._owner(), name), arguments, size, sizes)
+        _, children, formatter, invert = data
+        return CommandGroup(
+            [self._load(child) for child in children], formatter, invert
+        )
+
+    def add(self, cmd: _CommandBase) -> int:
+        """Store a command and return the row ID."""
+        trash: list[str] = []
+        blob = None
+        if (data := self._dump(cmd, trash)) is not None:
+            try:
+                blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                # such as a command group with a local formatter function
+                trash.clear()
+        cur = self._conn.execute(
+            f"INSERT INTO {self._name} (command, trash) VALUES (?, ?)",
+            (blob, ",".join(trash) or None),
+        )
+        row = cur.lastrowid
+        if blob is None:
+            self._objects[row] = cmd
+        return row
+
+    def get(self, row: int) -> _CommandBase:
+        if (cmd := self._objects.get(row)) is not None:
+            return cmd
+        (blob,) = self._conn.execute(
+            f"SELECT command FROM {self._name} WHERE id = ?", (row,)
+        ).fetchone()
+        return self._load(pickle.loads(blob))
+
+    def remove(self, rows: list[int]) -> None:
+        """Remove the commands of the rows."""
+        for row in rows:
+            self._objects.pop(row, None)
+        cur = self._conn.executemany(
+            f"DELETE FROM {self._name} WHERE id = ? AND trash IS NOT NULL",
+            ((row,) for row in rows),
+        )
+        if cur.rowcount > 0 and (owner := self._owner()) is not None:
+            # trash tables may not be referenced any more
+            owner._trash_pending = True
+        self._conn.executemany(
+            f"DELETE FROM {self._name} WHERE id = ?", ((row,) for row in rows)
+        )
+        return None
+
+    def referenced_trash(self) -> set[str]:
+        """Names of the trash tables that the stored commands refer to."""
+        out: set[str] = set()
+        for (names,) in self._conn.execute(
+            f"SELECT trash FROM {self._name} WHERE trash IS NOT NULL"
+        ):
+            out.update(names.split(","))
+        return out
+
+
+class _SqliteStack(MutableSequence[_CommandBase]):
+    """A command stack that only keeps the row IDs of the command table."""
+
+    def __init__(self, table: _CommandTable):
+        self._table = table
+        self._rows = array("q")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(n_commands={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._table.get(row) for row in self._rows[index]]
+        return self._table.get(self._rows[index])
+
+    def __setitem__(self, index, cmd: _CommandBase) -> None:
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment is not supported.")
+        index = range(len(self))[index]
+        del self[index]
+        self.insert(index, cmd)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            rows = self._rows[index].tolist()
+        else:
+            rows = [self._rows[index]]
+        del self._rows[index]
+        self._table.remove(rows)
+        return None
+
+    def insert(self, index: int, cmd: _CommandBase) -> None:
+        self._rows.insert(index, self._table.add(cmd))
+        return None
+
+    def clear(self) -> None:
+        rows = self._rows.tolist()
+        del self._rows[:]
+        self._table.remove(rows)
+        return None
+
+
+class UndoableSqliteDict(AbstractUndoableDict[Hashable, _V]):
+    """
+    An undoable dictionary stored in a SQLite database.
+
+    Keys must be ``str``, ``int``, ``float`` or ``bytes``, and values are pickled.
+    The commands of the undo and redo stacks, including the old values, are pickled
+    into the "{table}_commands" table and the stacks only keep the row IDs. Every
+    event is also written to the history table of the same database, in the same
+    transaction as the modification itself. Transactions are committed every
+    ``commit_every`` commands, and on ``flush`` or ``close``.
+
+    Note that the undo and redo stacks are not restored when the database is opened
+    again. The history table is an append-only log of the events for auditing. If
+    the dictionary is garbage collected without ``close``, the pending transaction
+    is committed and the database is closed.
+
+    How ``update`` finds the values that are not changed is set by the class keyword
+    ``update_compare`` as in ``UndoableDict``.
+
+    Parameters
+    ----------
+    path : str, default is ":memory:"
+        Path to the database file.
+    table : str, default is "data"
+        Name of the table of the items. The history is stored in "{table}_history".
+    commit_every : int, default is 1000
+        Number of commands to be committed in a transaction.
+    """
+
+    _mgr = AbstractUndoableDict._mgr
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        table: str = "data",
+        commit_every: int = 1000,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}.")
+        if commit_every < 1:
+            raise ValueError("commit_every must be positive.")
+        self._conn = sqlite3.connect(path)
+        self._table = table
+        self._commit_every = commit_every
+        self._n_pending = 0
+        # index of the next data table swapped out by clear
+        self._trash_next = 0
+        self._trash_pending = False
+        self._drop_trash()
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key PRIMARY KEY, value BLOB)"
+        )
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_history "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT, steps BLOB)"
+        )
+        self._commands = _CommandTable(self)
+        self._conn.commit()
+        self._len: int | None = None
+        mgr = self._mgr
+        mgr.clear()
+        mgr._state.stack_undo = _SqliteStack(self._commands)
+        mgr._state.stack_redo = _SqliteStack(self._commands)
+        self._logger = _event_logger(weakref.ref(self))
+        mgr.called.append(self._logger)
+        self._finalizer = weakref.finalize(self, _commit_and_close, self._conn)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(table={self._table!r}, n_items={len(self)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _check_key(self, key) -> None:
+        if type(key) not in _KEY_TYPES:
+            raise TypeError(f"Key must be str, int, float or bytes, got {key!r}.")
+
+    def __getitem__(self, key: Hashable) -> _V:
+        self._check_key(key)
+        row = self._conn.execute(
+            f"SELECT value FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __contains__(self, key: Any) -> bool:
+        if type(key) not in _KEY_TYPES:
+            return False
+        row = self._conn.execute(
+            f"SELECT 1 FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for (key,) in self._conn.execute(f"SELECT key FROM {self._table}"):
+            yield key
+
+    def __len__(self) -> int:
+        if self._len is None:
+            (self._len,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self._table}"
+            ).fetchone()
+        return self._len
+
+    def _raw_setitem(self, key: Hashable, value: _V) -> None:
+        self._check_key(key)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        cur = self._conn.execute(
+            f"UPDATE {self._table} SET value = ? WHERE key = ?", (data, key)
+        )
+        if cur.rowcount == 0:
+            self._conn.execute(
+                f"INSERT INTO {self._table} (key, value) VALUES (?, ?)", (key, data)
+            )
+            if self._len is not None:
+                self._len += 1
+
+    def _raw_delitem(self, key: Hashable) -> None:
+        self._check_key(key)
+        cur = self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+        if self._len is not None:
+            self._len -= 1
+
+    def _raw_update(self, values: Mapping[Hashable, _V]) -> None:
+        for key in values:
+            self._check_key(key)
+        self._conn.executemany(
+            f"INSERT INTO {self._table} (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                for key, value in values.items()
+            ),
+        )
+        self._len = None
+
+    def _raw_get_storage(self) -> str:
+        # the name of the table the items will be moved to
+        return f"{self._table}__trash{self._trash_next}"
+
+    def _raw_set_storage(self, storage: str | None) -> None:
+        table = self._table
+        if storage is None:
+            # move the items to a trash table
+            self._conn.execute(
+                f"ALTER TABLE {table} RENAME TO {self._raw_get_storage()}"
+            )
+            self._conn.execute(f"CREATE TABLE {table} (key PRIMARY KEY, value BLOB)")
+            self._trash_next += 1
+            self._len = 0
+        else:
+            if storage not in self._trash_tables():
+                raise ValueError(f"Trash table {storage!r} does not exist.")
+            self._conn.execute(f"DROP TABLE {table}")
+            self._conn.execute(f"ALTER TABLE {storage} RENAME TO {table}")
+            # redoing the clear moves the items to the same table again
+            self._trash_next = int(storage[len(f"{table}__trash") :])
+            self._len = None
+
+    def _trash_tables(self) -> list[str]:
+        """Names of all the trash tables."""
+        prefix = f"{self._table}__trash"
+        rows = self._conn.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+            (f"{self._table}\\_\\_trash%",),
+        ).fetchall()
+        return [name for (name,) in rows if name.startswith(prefix)]
+
+    def _drop_trash(self, keep: set[str] = frozenset()) -> None:
+        """Drop the trash tables except for the given ones."""
+        for name in self._trash_tables():
+            if name not in keep:
+                self._conn.execute(f"DROP TABLE {name}")
+        self._trash_pending = False
+        return None
+
+    def _collect_trash(self) -> None:
+        """Drop the trash tables of the clear commands removed from the stacks."""
+        if self._trash_pending:
+            self._drop_trash(keep=self._commands.referenced_trash())
+        return None
+
+    def _log_event(self, cmd: _CommandBase, event: CallType) -> None:
+        """Write an event to the history table."""
+        if event == CallType.call:
+            if isinstance(cmd, CommandGroup):
+                # commands merged by UndoManager.merging
+                event_name = "merge"
+            else:
+                event_name = "call"
+            steps = _describe(cmd)
+        else:
+            event_name, steps = event.value, None
+        self._conn.execute(
+            f"INSERT INTO {self._table}_history (event, steps) VALUES (?, ?)",
+            (event_name, pickle.dumps(steps, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        self._n_pending += 1
+        self._collect_trash()
+        if self._n_pending >= self._commit_every:
+            self.flush()
+        return None
+
+    def history(self) -> list[HistoryEntry]:
+        """
+        Return all the events in the history table.
+
+        ``steps`` is a list of ``(name, args, kwargs)`` of the called commands for
+        "call" and "merge" events, and None for "undo"/"redo" events.
+        """
+        rows = self._conn.execute(
+            f"SELECT seq, event, steps FROM {self._table}_history ORDER BY seq"
+        )
+        return [HistoryEntry(seq, ev, pickle.loads(steps)) for seq, ev, steps in rows]
+
+    def flush(self) -> None:
+        """Commit the pending transaction."""
+        self._collect_trash()
+        self._conn.commit()
+        self._n_pending = 0
+        return None
+
+    def close(self) -> None:
+        """Commit the pending transaction and close the database."""
+        mgr = self._mgr
+        if self._logger in mgr.called:
+            mgr.called.remove(self._logger)
+        mgr.clear()
+        mgr._state.stack_undo = new_stack(mgr._state.storage)
+        mgr._state.stack_redo = new_stack(mgr._state.storage)
+        self._drop_trash()
+        self.flush()
+        self._finalizer()
+        return None
+
+
+def _event_logger(ref: weakref.ref[UndoableSqliteDict]) -> Callable:
+    """Create a callback that writes events without keeping the dictionary alive."""
+
+    def _log_event(cmd: _CommandBase, event: CallType) -> None:
+        if (owner := ref()) is not None:
+            owner._log_event(cmd, event)
+
+    return _log_event
+
+
+def _commit_and_close(conn: sqlite3.Connection) -> None:
+    conn.commit()
+    conn.close()
+    return None
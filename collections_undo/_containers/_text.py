@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from collections_undo._containers._persistent import (
+    _build_leaves,
+    _join,
+    _Leaf,
+    _split,
+    _Tree,
+)
+from collections_undo._stack import UndoManager
+
+# maximum number of characters in a leaf of the rope
+_TEXT_CHUNK = 512
+
+
+def _build_text(text: str) -> _Tree | None:
+    return _build_leaves(
+        [_Leaf(text[i : i + _TEXT_CHUNK]) for i in range(0, len(text), _TEXT_CHUNK)]
+    )
+
+
+def _iter_chunks(tree: _Tree | None) -> Iterator[str]:
+    stack = [] if tree is None else [tree]
+    while stack:
+        tree = stack.pop()
+        if type(tree) is _Leaf:
+            yield tree.items
+        else:
+            stack.append(tree.right)
+            stack.append(tree.left)
+
+
+class UndoableText:
+    """
+    An undoable text backed by a rope.
+
+    The text is stored in a balanced tree of string chunks, so that editing and
+    undoing cost O(log n) even for large documents. Each edit is recorded as the
+    position, the inserted text and the deleted text. Consecutive typing and
+    deletion are coalesced into one command of up to ``max_coalesce`` characters.
+
+    >>> text = UndoableText("Hello")
+    >>> for char in ", world":
+    ...     text.append(char)
+    >>> text.undo()  # undo all the typing at once
+
+    Parameters
+    ----------
+    text : str, default is ""
+        Initial text.
+    max_coalesce : int, default is 256
+        Maximum number of characters of a coalesced edit.
+    """
+
+    _mgr = UndoManager()
+
+    def __init__(self, text: str = "", /, *, max_coalesce: int = 256):
+        if max_coalesce < 1:
+            raise ValueError("max_coalesce must be positive.")
+        self._root = _build_text(text)
+        self._max_coalesce = max_coalesce
+
+    def __repr__(self) -> str:
+        clsname = type(self).__name__
+        return f"{clsname}({str(self)!r})"
+
+    def __str__(self) -> str:
+        return "".join(_iter_chunks(self._root))
+
+    def __len__(self) -> int:
+        return 0 if self._root is None else self._root.size
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, UndoableText):
+            return str(self) == str(other)
+        elif isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __getitem__(self, key: int | slice) -> str:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return str(self)[key]
+            stop = max(start, stop)
+        else:
+            start = range(len(self))[key]
+            stop = start + 1
+        return "".join(_iter_chunks(self._substring(start, stop)))
+
+    def __setitem__(self, key: int | slice, text: str) -> None:
+        start, stop = self._normalize_range(key)
+        return self.replace(start, stop, text)
+
+    def __delitem__(self, key: int | slice) -> None:
+        start, stop = self._normalize_range(key)
+        return self.delete(start, stop)
+
+    def chunks(self) -> Iterator[str]:
+        """Iterate over the chunks of the text."""
+        return _iter_chunks(self._root)
+
+    def insert(self, pos: int, text: str) -> None:
+        """Insert text at the position."""
+        return self.replace(pos, pos, text)
+
+    def append(self, text: str) -> None:
+        """Append text to the end."""
+        n = len(self)
+        return self.replace(n, n, text)
+
+    def delete(self, start: int, stop: int) -> None:
+        """Delete text in [start, stop)."""
+        return self.replace(start, stop, "")
+
+    def replace(self, start: int, stop: int, text: str) -> None:
+        """Replace text in [start, stop) with the given text."""
+        if not isinstance(text, str):
+            raise TypeError(f"Expected str, got {type(text).__name__}.")
+        n = len(self)
+        if not 0 <= start <= stop <= n:
+            raise IndexError(f"Invalid range [{start}, {stop}) for length {n}.")
+        deleted = self[start:stop]
+        if not text and not deleted:
+            return None
+        with self._mgr.reducing():
+            self._edit(start, text, deleted)
+        return None
+
+    def undo(self):
+        """Undo the last edit."""
+        return self._mgr.undo()
+
+    def redo(self):
+        """Redo the last undo operation."""
+        return self._mgr.redo()
+
+    def _normalize_range(self, key: int | slice) -> tuple[int, int]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Extended slice is not supported.")
+            return start, max(start, stop)
+        start = range(len(self))[key]
+        return start, start + 1
+
+    def _substring(self, start: int, stop: int) -> _Tree | None:
+        left = _split(self._root, stop, _TEXT_CHUNK)[0]
+        return _split(left, start, _TEXT_CHUNK)[1]
+
+    def _raw_edit(self, pos: int, inserted: str, n_deleted: int) -> None:
+        left, rest = _split(self._root, pos, _TEXT_CHUNK)
+        right = _split(rest, n_deleted, _TEXT_CHUNK)[1]
+        middle = _build_text(inserted)
+        self._root = _join(_join(left, middle, _TEXT_CHUNK), right, _TEXT_CHUNK)
+        return None
+
+    @_mgr.undoable(name="edit")
+    def _edit(self, pos: int, inserted: str, deleted: str):
+        self._raw_edit(pos, inserted, len(deleted))
+
+    @_edit.undo_def
+    def _edit(self, pos: int, inserted: str, deleted: str):
+        self._raw_edit(pos, deleted, len(inserted))
+
+    @_edit.set_macro_steps
+    def _edit_macro_steps(self, pos: int, inserted: str, deleted: str):
+        return [("replace", (pos, pos + len(deleted), inserted), {})]
+
+    @_edit.reduce_rule
+    def _edit_rule(self, args0, args1):
+        pos0, ins0, del0 = args0["pos"], args0["inserted"], args0["deleted"]
+        pos1, ins1, del1 = args1["pos"], args1["inserted"], args1["deleted"]
+        if len(ins0) + len(ins1) + len(del0) + len(del1) > self._max_coalesce:
+            return None
+        if not del0 and not del1 and pos1 == pos0 + len(ins0):
+            # typing
+            return {"pos": pos0, "inserted": ins0 + ins1, "deleted": ""}
+        if not ins0 and not ins1:
+            if pos1 == pos0:
+                # forward deletion
+                return {"pos": pos0, "inserted": "", "deleted": del0 + del1}
+            if pos1 + len(del1) == pos0:
+                # backspace
+                return {"pos": pos1, "inserted": "", "deleted": del1 + del0}
+        return None
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Hashable, Iterable, NamedTuple
+
+from collections_undo._command import BatchCommand, Command, CommandGroup, _CommandBase
+
+
+class Footprint(NamedTuple):
+    """Keys that a command reads and writes."""
+
+    reads: tuple[Hashable, ...]
+    writes: tuple[Hashable, ...]
+
+
+def _as_interval(key) -> tuple[int, int] | None:
+    """Convert an index key into a half-open interval, or None if it is not."""
+    if isinstance(key, int):
+        return key, key + 1
+    elif isinstance(key, slice):
+        if not isinstance(key.start, int) or not isinstance(key.stop, int):
+            raise ValueError(f"Slice must be normalized, got {key!r}.")
+        key = range(key.start, key.stop, 1 if key.step is None else key.step)
+    if isinstance(key, range):
+        if len(key) == 0:
+            return 0, 0
+        return min(key[0], key[-1]), max(key[0], key[-1]) + 1
+    return None
+
+
+class FootprintIndex:
+    """
+    Index of keys for conflict detection.
+
+    Integers, ranges and slices are regarded as intervals of indices and stored as
+    sorted disjoint intervals. Other keys are stored in a set.
+    """
+
+    __slots__ = ("_keys", "_starts", "_stops")
+
+    def __init__(self, keys: Iterable[Hashable] = ()):
+        self._keys: set[Hashable] = set()
+        self._starts: list[int] = []
+        self._stops: list[int] = []
+        for key in keys:
+            self.add(key)
+
+    def __repr__(self) -> str:
+        intervals = ", ".join(f"{a}:{b}" for a, b in zip(self._starts, self._stops))
+        return f"{type(self).__name__}(keys={self._keys!r}, intervals=[{intervals}])"
+
+    def add(self, key: Hashable) -> None:
+        """Add a key to the index."""
+        if (interval := _as_interval(key)) is None:
+            self._keys.add(key)
+            return None
+        start, stop = interval
+        if start >= stop:
+            return None
+        # intervals in [i, j) overlap or touch the new one
+        i = bisect_left(self._stops, start)
+        j = bisect_right(self._starts, stop)
+        if i < j:
+            start = min(start, self._starts[i])
+            stop = max(stop, self._stops[j - 1])
+        self._starts[i:j] = [start]
+        self._stops[i:j] = [stop]
+        return None
+
+    def update(self, keys: Iterable[Hashable]) -> None:
+        """Add all the keys to the index."""
+        for key in keys:
+            self.add(key)
+        return None
+
+    def overlaps(self, key: Hashable) -> bool:
+        """True if the key overlaps with any of the keys in the index."""
+        if (interval := _as_interval(key)) is None:
+            return key in self._keys
+        start, stop = interval
+        if start >= stop:
+            return False
+        i = bisect_right(self._stops, start)
+        return i < len(self._starts) and self._starts[i] < stop
+
+    def overlaps_any(self, keys: Iterable[Hashable]) -> bool:
+        """True if any of the keys overlaps with the keys in the index."""
+        return any(self.overlaps(key) for key in keys)
+
+
+def command_footprint(cmd: _CommandBase) -> Footprint | None:
+    """Get the footprint of a command, or None if it is not declared."""
+    if isinstance(cmd, Command):
+        if (fp := cmd.func._get_footprint(cmd.args, cmd.kwargs)) is None:
+            return None
+        return Footprint(*fp)
+    elif isinstance(cmd, BatchCommand):
+        cmds = cmd.commands
+    elif isinstance(cmd, CommandGroup):
+        cmds = cmd.commands
+    else:
+        return None
+    reads: list[Hashable] = []
+    writes: list[Hashable] = []
+    for each in cmds:
+        if (fp := command_footprint(each)) is None:
+            return None
+        reads.extend(fp.reads)
+        writes.extend(fp.writes)
+    return Footprint(tuple(reads), tuple(writes))
+
+
+def inverse_command(cmd: _CommandBase) -> _CommandBase:
+    """Create a command that reverts the given command when called."""
+    if isinstance(cmd, Command):
+        func = cmd.func.inverted()
+        func.__name__ = cmd.func.__name__
+        return Command(func, cmd.args, cmd.kwargs, cmd.size)
+    elif isinstance(cmd, BatchCommand):
+        cmds = cmd.commands[::-1]
+    elif isinstance(cmd, CommandGroup):
+        cmds = cmd.commands
+        if not cmd._invert:
+            cmds.reverse()
+    else:
+        raise TypeError(f"Cannot invert {cmd!r}.")
+    return CommandGroup([inverse_command(each) for each in cmds])
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple, TypeVar
+
+from collections_undo._command import (
+    BatchCommand,
+    Command,
+    CommandGroup,
+    _CommandBase,
+)
+
+if TYPE_CHECKING:
+    from collections_undo._stack import UndoManager
+
+_T = TypeVar("_T")
+
+
+class MacroStep(NamedTuple):
+    """A method call in a macro."""
+
+    name: str
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+
+
+class Macro:
+    """
+    A sequence of undoable method calls with the target object abstracted out.
+
+    Each step is stored as the attribute name of the undoable method and the
+    arguments it was called with, so that the same edits can be applied to any
+    object that has the same undoable methods. For methods defined by
+    ``UndoManager.interface``, the state before the call is served again from the
+    new target. Other undoable methods are called with exactly the same arguments
+    unless they declare the method calls by ``set_macro_steps``. Commands whose
+    arguments hold the state of the recorded object, such as the old value of a
+    dictionary item, must declare them, or they are refused with a TypeError.
+
+    Examples
+    --------
+    >>> with a.mgr.recording() as macro:
+    ...     a.set_x(1)
+    ...     a.set_y(2)
+    >>> macro.play_all([b, c, d])  # each object gets one merged undo entry
+    """
+
+    def __init__(self, steps: Iterable[MacroStep] = ()):
+        self._steps = list(steps)
+
+    def __repr__(self) -> str:
+        cls = type(self).__name__
+        s = ", ".join(step.name for step in self._steps)
+        return f"{cls}([{s}])"
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def __iter__(self) -> Iterator[MacroStep]:
+        return iter(self._steps)
+
+    @property
+    def steps(self) -> list[MacroStep]:
+        """List of macro steps."""
+        return list(self._steps)
+
+    @classmethod
+    def from_command(cls, cmd: _CommandBase) -> Macro:
+        """Construct a macro from a command or a command group."""
+        macro = cls()
+        macro._append_command(cmd)
+        return macro
+
+    def _append_command(self, cmd: _CommandBase) -> None:
+        if isinstance(cmd, CommandGroup):
+            cmds = cmd.commands
+            if cmd._invert:
+                cmds.reverse()
+            for each in cmds:
+                self._append_command(each)
+        elif isinstance(cmd, BatchCommand):
+            for each in cmd.commands:
+                self._append_command(each)
+        elif isinstance(cmd, Command):
+            steps = cmd.func._get_macro_steps(cmd.args, cmd.kwargs)
+            if steps is None:
+                raise TypeError(
+                    f"{cmd!r} depends on the state of the recorded object and cannot "
+                    "be recorded in a macro."
+                )
+            self._steps.extend(MacroStep(*step) for step in steps)
+        else:
+            raise TypeError(f"Cannot convert {cmd!r} into a macro step.")
+        return None
+
+    def _resolve(self, obj: Any) -> tuple[list[Any], list[UndoManager]]:
+        """Get the methods of the steps and the managers they record to."""
+        funcs = [getattr(obj, step.name) for step in self._steps]
+        mgrs: dict[int, UndoManager] = {}
+        for func in funcs:
+            if (mgr := getattr(func, "_mgr", None)) is not None:
+                mgrs[id(mgr)] = mgr
+            elif not (obj_mgrs := _managers_of(obj)):
+                raise TypeError(f"{func!r} is not an undoable method.")
+            else:
+                # methods such as __setitem__ call the undoable methods inside
+                mgrs.update((id(mgr), mgr) for mgr in obj_mgrs)
+        return funcs, list(mgrs.values())
+
+    def play(self, obj: Any) -> None:
+        """Apply the macro to an object as a single undoable command."""
+        funcs, mgrs = self._resolve(obj)
+        with ExitStack() as stack:
+            for mgr in mgrs:
+                stack.enter_context(mgr.merging())
+            for func, step in zip(funcs, self._steps):
+                func(*step.args, **step.kwargs)
+        return None
+
+    def play_all(
+        self,
+        objs: Iterable[_T],
+        executor: Executor | None = None,
+    ) -> list[_T]:
+        """
+        Apply the macro to all the objects.
+
+        Parameters
+        ----------
+        objs : iterable
+            Target objects.
+        executor : concurrent.futures.Executor, optional
+            If given, the macro is applied in parallel using the executor. Note that
+            a process pool works on copies of the objects and the undo history stays
+            in the worker processes. The blocking and merging flags of an undo
+            manager are not thread-safe, so if any of the objects share the state of
+            an undo manager, such as linked managers, the macro is applied to the
+            objects one by one in the calling thread.
+
+        Returns
+        -------
+        list
+            The target objects, or their copies if a process pool is used.
+        """
+        if executor is None:
+            return [_play_and_return(self, obj) for obj in objs]
+        objs = list(objs)
+        if not isinstance(executor, ProcessPoolExecutor) and self._shares_state(objs):
+            return [_play_and_return(self, obj) for obj in objs]
+        return list(executor.map(_play_and_return, repeat(self), objs))
+
+    def _shares_state(self, objs: list[Any]) -> bool:
+        """True if any two of the objects record to the same manager state."""
+        owners: dict[int, int] = {}
+        for i, obj in enumerate(objs):
+            for mgr in self._resolve(obj)[1]:
+                if owners.setdefault(id(mgr._state), i) != i:
+                    return True
+        return False
+
+
+def _managers_of(obj: Any) -> list[UndoManager]:
+    """Get all the undo managers of an object."""
+    from collections_undo._stack import UndoManager
+
+    cls = type(obj)
+    return [
+        getattr(obj, name)
+        for name in dir(cls)
+        if isinstance(getattr(cls, name, None), UndoManager)
+    ]
+
+
+def _play_and_return(macro: Macro, obj: _T) -> _T:
+    macro.play(obj)
+    return obj
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Hashable, Mapping, Union
+
+_KeyType = Union[str, Callable[[Mapping[str, Any]], Hashable], None]
+
+
+def _as_names(names: str | tuple[str, ...]) -> tuple[str, ...]:
+    if isinstance(names, str):
+        return (names,)
+    return tuple(names)
+
+
+class ReducePolicy(ABC):
+    """
+    Base class of declarative reduce rules.
+
+    A policy is a callable that can be passed to ``ReversibleFunction.reduce_rule``.
+    If ``key`` is given, the undo manager keeps an index from keys to the positions
+    of recent commands of the same function, so that a command is reduced with the
+    last command of the same key even if commands of other keys are in between.
+    Otherwise, a command is reduced only with the previous command.
+
+    Parameters
+    ----------
+    key : str or callable, optional
+        Parameter name, or a function that returns a hashable key from the bound
+        arguments.
+    window : int, default is 64
+        Maximum distance in the undo stack between a command and the last command
+        of the same key. Commands farther back are not reduced.
+    """
+
+    def __init__(self, key: _KeyType = None, window: int = 64):
+        if window < 1:
+            raise ValueError("window must be positive.")
+        self.key = key
+        self.window = window
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(key={self.key!r}, window={self.window})"
+
+    def __get__(self, obj, objtype=None):
+        return self
+
+    def __call__(
+        self, args0: Mapping[str, Any], args1: Mapping[str, Any]
+    ) -> dict[str, Any] | None:
+        """Merge the bound arguments of two commands, or return None."""
+        if self.key is not None and self.get_key(args0) != self.get_key(args1):
+            return None
+        return self.merge(args0, args1)
+
+    def get_key(self, args: Mapping[str, Any]) -> Hashable:
+        """Get the key of the bound arguments."""
+        if callable(self.key):
+            return self.key(args)
+        return args[self.key]
+
+    @abstractmethod
+    def merge(
+        self, args0: Mapping[str, Any], args1: Mapping[str, Any]
+    ) -> dict[str, Any]:
+        """Merge the bound arguments of two commands."""
+
+
+class _Replace(ReducePolicy):
+    def __init__(self, keep: tuple[str, ...], key: _KeyType = None, window: int = 64):
+        super().__init__(key, window)
+        self.keep = keep
+
+    def merge(self, args0, args1):
+        out = dict(args1)
+        for name in self.keep:
+            out[name] = args0[name]
+        return out
+
+
+class _Accumulate(ReducePolicy):
+    def __init__(self, fields: tuple[str, ...], key: _KeyType = None, window: int = 64):
+        super().__init__(key, window)
+        self.fields = fields
+
+    def merge(self, args0, args1):
+        out = dict(args1)
+        for name in self.fields:
+            out[name] = args0[name] + args1[name]
+        return out
+
+
+def replace(keep: str | tuple[str, ...] = ()) -> ReducePolicy:
+    """
+    Reduce a command with the previous one by replacing the arguments.
+
+    Parameters listed in ``keep`` are taken from the older command, such as the
+    value before the first call.
+
+    >>> @move.reduce_rule(replace(keep="old_value"))
+    """
+    return _Replace(_as_names(keep))
+
+
+def last_write_wins(
+    key: _KeyType,
+    keep: str | tuple[str, ...] = (),
+    window: int = 64,
+) -> ReducePolicy:
+    """
+    Reduce repeated writes to the same key into one command.
+
+    The later arguments win except for the parameters listed in ``keep``, which are
+    taken from the first write of the key.
+
+    >>> _setitem.reduce_rule(last_write_wins("key", keep="old_value"))
+    """
+    return _Replace(_as_names(keep), key=key, window=window)
+
+
+def accumulate(
+    fields: str | tuple[str, ...],
+    key: _KeyType = None,
+    window: int = 64,
+) -> ReducePolicy:
+    """
+    Reduce commands by summing up the given parameters.
+
+    >>> _move.reduce_rule(accumulate("dx"))
+    """
+    return _Accumulate(_as_names(fields), key=key, window=window)
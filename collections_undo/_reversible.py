@@ -1,6 +1,9 @@
 from __future__ import annotations
+import inspect
+import weakref
+from time import perf_counter
 from functools import wraps, partial
-from typing import Any, Callable, Generic, Iterable, TYPE_CHECKING, TypeVar
+from typing import Any, Callable, Generic, Iterable, Mapping, TYPE_CHECKING, TypeVar
 from collections_undo._formatter import get_formatter
 from collections_undo._const import FormatterType, ReduceRuleType, Args
 from typing_extensions import ParamSpec
@@ -15,6 +18,7 @@ _R0 = TypeVar("_R0")
 _RR = TypeVar("_RR")
 
 _Fmt = TypeVar("_Fmt", bound=FormatterType)
+_F = TypeVar("_F", bound=Callable)
 
 
 class NotReversibleError(RuntimeError):
@@ -34,6 +38,81 @@ class Undefined:
         return self
 
 
+class ArgumentBinder:
+    """
+    Map positional and keyword arguments to parameter names.
+
+    The signature is inspected only once on construction so that binding is just
+    tuple indexing.
+    """
+
+    __slots__ = ("signature", "_positional", "_keywords", "_varargs", "_varkw")
+
+    def __init__(self, func: Callable):
+        self.signature = inspect.signature(func)
+        positional: list[str] = []
+        keywords: set[str] = set()
+        self._varargs: str | None = None
+        self._varkw: str | None = None
+        for name, param in self.signature.parameters.items():
+            kind = param.kind
+            if kind is param.POSITIONAL_ONLY:
+                positional.append(name)
+            elif kind is param.POSITIONAL_OR_KEYWORD:
+                positional.append(name)
+                keywords.add(name)
+            elif kind is param.VAR_POSITIONAL:
+                self._varargs = name
+            elif kind is param.KEYWORD_ONLY:
+                keywords.add(name)
+            else:
+                self._varkw = name
+        self._positional = tuple(positional)
+        self._keywords = frozenset(keywords)
+
+    def __call__(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Return a dict of parameter names and the arguments."""
+        npos = len(self._positional)
+        out = dict(zip(self._positional, args))
+        if len(args) > npos:
+            if self._varargs is None:
+                raise TypeError("too many positional arguments")
+            out[self._varargs] = args[npos:]
+        if kwargs:
+            extra: dict[str, Any] = {}
+            for key, value in kwargs.items():
+                if key in self._keywords:
+                    if key in out:
+                        raise TypeError(f"multiple values for argument {key!r}")
+                    out[key] = value
+                elif self._varkw is not None:
+                    extra[key] = value
+                else:
+                    raise TypeError(f"got an unexpected keyword argument {key!r}")
+            if extra:
+                out[self._varkw] = extra
+        return out
+
+    def unbind(self, arguments: Mapping[str, Any]) -> Args:
+        """Convert named arguments back to positional and keyword arguments."""
+        args: list[Any] = []
+        for name in self._positional:
+            if name not in arguments:
+                break
+            args.append(arguments[name])
+        else:
+            if self._varargs is not None:
+                args.extend(arguments.get(self._varargs, ()))
+        used = set(self._positional[: len(args)])
+        kwargs: dict[str, Any] = {}
+        for name, value in arguments.items():
+            if name == self._varkw:
+                kwargs.update(value)
+            elif name not in used and name != self._varargs:
+                kwargs[name] = value
+        return tuple(args), kwargs
+
+
 def _as_method(func, obj):
     if hasattr(func, "__get__"):
         return func.__get__(obj)
@@ -59,7 +138,9 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
         self._mgr = mgr
         self._function_id = id(func)
         wraps(func)(self)
-        self._instances: dict[int, Self] = {}
+        # name of the class attribute, which may differ from the public __name__
+        self._attr_name: str | None = None
+        self._instances: dict[int, weakref.ref[Self]] = {}
 
         # Default argument mapping.
         self._formatter_fw: FormatterType = get_formatter(func)
@@ -67,6 +148,11 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
 
         self._map_args: Callable[[tuple, dict], Args] = _default_map_args
         self._reduce_rule: Callable[[dict, dict], tuple[tuple, dict]] | None = None
+        self._batch_fw: Callable[[list[Args]], Any] | None = None
+        self._batch_rv: Callable[[list[Args]], Any] | None = None
+        self._binder: ArgumentBinder | None = None
+        self._footprint: Callable[_P, tuple[Iterable, Iterable]] | None = None
+        self._macro_steps: Callable[_P, list[tuple] | None] | None = None
 
     def __hash__(self) -> int:
         """ReversibleFunction is immutable in public level so use id for hashing."""
@@ -85,7 +171,10 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
         return f"{type(self).__name__}<{self.__name__}>"
 
     def __set_name__(self, owner: type, name: str) -> None:
-        self.__name__ = name
+        self._attr_name = name
+        if self.__name__ == getattr(self._func_fw, "__name__", None):
+            # not renamed by the ``name`` argument of ``UndoManager.undoable``
+            self.__name__ = name
 
     @property
     def function_id(self) -> int:
@@ -94,11 +183,13 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
 
     def undo_def(self, undo: Callable[_P, _R0]) -> ReversibleFunction[_P, _R, _R0]:
         """Define inverse function and return a new object."""
-        return self.__newlike__(
+        out = self.__newlike__(
             func=self._func_fw,
             inverse_func=undo,
             mgr=self._mgr,
         )
+        out.__name__ = self.__name__
+        return out
 
     def set_formatter(
         self,
@@ -122,6 +213,96 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
         self._formatter_rv = formatter
         return formatter
 
+    def set_batch(self, func: _F, /) -> _F:
+        """
+        Set a batched implementation of the forward function.
+
+        The batched function is called with a list of ``(args, kwargs)`` in the
+        order of calls. It must be equivalent to calling the forward function for
+        each arguments.
+        """
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        self._batch_fw = func
+        return func
+
+    def set_batch_inv(self, func: _F, /) -> _F:
+        """
+        Set a batched implementation of the reverse function.
+
+        The batched function is called with a list of ``(args, kwargs)`` in the
+        order of reverting, that is, the last call comes first.
+        """
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        self._batch_rv = func
+        return func
+
+    def set_footprint(self, func: _F, /) -> _F:
+        """
+        Set a function that declares the keys the function reads and writes.
+
+        The function is called with the same arguments as the forward function and
+        returns a tuple of ``(reads, writes)``. Keys are any hashable objects such as
+        dictionary keys. Integers, ``range`` and normalized ``slice`` objects are
+        regarded as intervals of indices. Two commands commute if neither of them
+        writes a key that the other one reads or writes.
+
+        >>> @_setitem.set_footprint
+        ... def _setitem_footprint(self, key, value, old_value):
+        ...     return (), (key,)
+        """
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        self._footprint = func
+        return func
+
+    def set_macro_steps(self, func: _F, /) -> _F:
+        """
+        Set a function that converts a call into method calls for macros.
+
+        The function is called with the same arguments as the forward function and
+        returns a list of ``(name, args, kwargs)`` of the method calls that apply
+        the same edit to another object, or None if the arguments depend on the
+        state of the original object and the call cannot be recorded in a macro.
+        Without this function, a macro calls the method of the same name with the
+        same arguments.
+
+        >>> @_setitem.set_macro_steps
+        ... def _setitem_macro_steps(self, key, value, old_value):
+        ...     return [("__setitem__", (key, value), {})]
+        """
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        self._macro_steps = func
+        return func
+
+    def _get_macro_steps(
+        self, args: tuple, kwargs: dict[str, Any]
+    ) -> list[tuple[str, tuple, dict[str, Any]]] | None:
+        if self._macro_steps is None:
+            args, kwargs = self._map_args(*args, **kwargs)
+            return [(self._attr_name or self.__name__, args, kwargs)]
+        return self._macro_steps(*args, **kwargs)
+
+    def _get_footprint(self, args: tuple, kwargs: dict[str, Any]):
+        if self._footprint is None:
+            return None
+        reads, writes = self._footprint(*args, **kwargs)
+        return tuple(reads), tuple(writes)
+
+    @property
+    def binder(self) -> ArgumentBinder:
+        """The argument binder of the forward function."""
+        if self._binder is None:
+            self._binder = ArgumentBinder(self._func_fw)
+        return self._binder
+
+    @property
+    def is_batchable(self) -> bool:
+        """True if both batched forward and reverse functions are defined."""
+        return self._batch_fw is not None and self._batch_rv is not None
+
     def format_forward_call(self, *args, **kwargs):
         args, kwargs = self._map_args(*args, **kwargs)
         return self._formatter_fw(*args, **kwargs)
@@ -136,12 +317,65 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
         return out
 
     def _call_raw(self, *args: _P.args, **kwargs: _P.kwargs) -> _R:
-        with self._mgr.blocked(), self._mgr.catch_errors():
-            return self._func_fw(*args, **kwargs)
+        mgr = self._mgr
+        with mgr.blocked(), mgr.catch_errors():
+            if not mgr._state.track_latency:
+                return self._func_fw(*args, **kwargs)
+            t0 = perf_counter()
+            out = self._func_fw(*args, **kwargs)
+        mgr._record_latency(self._function_id, perf_counter() - t0)
+        return out
+
+    def _call_raw_many(
+        self, arguments: Iterable[tuple[tuple, dict[str, Any]]]
+    ) -> _R | None:
+        """
+        Call the function for each arguments in a single blocked section.
+
+        Return the output of the last call, or None if ``arguments`` is empty.
+        """
+        mgr = self._mgr
+        out = None
+        n = 0
+        with mgr.blocked(), mgr.catch_errors():
+            _fw = self._func_fw
+            t0 = perf_counter()
+            for args, kwargs in arguments:
+                out = _fw(*args, **kwargs)
+                n += 1
+        if n > 0 and mgr._state.track_latency:
+            mgr._record_latency(self._function_id, (perf_counter() - t0) / n)
+        return out
 
     def _revert(self, *args: _P.args, **kwargs: _P.kwargs) -> _RR:
-        with self._mgr.blocked(), self._mgr.catch_errors():
-            return self._func_rv(*args, **kwargs)
+        mgr = self._mgr
+        with mgr.blocked(), mgr.catch_errors():
+            if not mgr._state.track_latency:
+                return self._func_rv(*args, **kwargs)
+            t0 = perf_counter()
+            out = self._func_rv(*args, **kwargs)
+        mgr._record_latency(self._function_id, perf_counter() - t0, True)
+        return out
+
+    def _call_batch_raw(self, arguments: list[Args]) -> Any:
+        mgr = self._mgr
+        with mgr.blocked(), mgr.catch_errors():
+            t0 = perf_counter()
+            out = self._batch_fw(arguments)
+        if arguments and mgr._state.track_latency:
+            elapsed = (perf_counter() - t0) / len(arguments)
+            mgr._record_latency(self._function_id, elapsed)
+        return out
+
+    def _revert_batch(self, arguments: list[Args]) -> Any:
+        mgr = self._mgr
+        with mgr.blocked(), mgr.catch_errors():
+            t0 = perf_counter()
+            out = self._batch_rv(arguments)
+        if arguments and mgr._state.track_latency:
+            elapsed = (perf_counter() - t0) / len(arguments)
+            mgr._record_latency(self._function_id, elapsed, True)
+        return out
 
     __call__ = _call_with_callback
 
@@ -150,7 +384,7 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
         if obj is None:
             return self
         _id = id(obj)
-        if (out := self._instances.get(_id, None)) is None:
+        if (ref := self._instances.get(_id, None)) is None or (out := ref()) is None:
             # get inverse function
             if self._func_rv is None:
                 inv_func = None
@@ -158,14 +392,16 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
                 inv_func = self._func_rv.__get__(obj, objtype)
 
             # register instance
-            self._instances[_id] = out = type(self)(
+            out = type(self)(
                 func=self._func_fw.__get__(obj, objtype),
                 mgr=self._mgr.__get__(obj, objtype),
                 inverse_func=inv_func,
             )
+            _cache_instance(self._instances, _id, out)
 
             # copy name
             out.__name__ = self.__name__
+            out._attr_name = self._attr_name
 
             # get formatters
             if self._formatter_fw is self._formatter_rv:
@@ -184,6 +420,20 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
                 out._reduce_rule = _as_method(self._reduce_rule, obj)
             else:
                 out._reduce_rule = None
+
+            # get batched functions
+            if self._batch_fw is not None:
+                out._batch_fw = _as_method(self._batch_fw, obj)
+            if self._batch_rv is not None:
+                out._batch_rv = _as_method(self._batch_rv, obj)
+
+            # get footprint
+            if self._footprint is not None:
+                out._footprint = _as_method(self._footprint, obj)
+
+            # get macro steps
+            if self._macro_steps is not None:
+                out._macro_steps = _as_method(self._macro_steps, obj)
         return out
 
     @classmethod
@@ -215,17 +465,60 @@ class ReversibleFunction(Generic[_P, _R, _RR]):
 
     def inverted(self) -> Self:
         """Create a command with swapped forward and reverse functions."""
-        return self.__newlike__(
+        out = self.__newlike__(
             func=self._func_rv,
             inverse_func=self._func_fw,
             mgr=self._mgr,
         )
+        out._map_args = self._map_args
+        out._attr_name = self._attr_name
+        if self._formatter_rv is self._formatter_fw:
+            out._formatter_fw = partial(_format_inverse, self._formatter_fw)
+        else:
+            out._formatter_fw = self._formatter_rv
+        out._formatter_rv = self._formatter_fw
+        out._footprint = self._footprint
+        # the reverse call is not a method call that can be replayed
+        out._macro_steps = _no_macro_steps
+        return out
 
     def reduce_rule(self, rule: ReduceRuleType):
+        """
+        Set the rule to reduce two commands of this function into one.
+
+        The rule is called with the bound arguments of the older and the newer
+        commands, and returns ``(args, kwargs)`` or a dict of named arguments of the
+        reduced command, or None if the commands cannot be reduced. Policies such as
+        ``last_write_wins`` can be used as rules.
+        """
         self._reduce_rule = rule
         return rule
 
 
+def _cache_instance(instances: dict[int, weakref.ref], _id: int, obj: Any) -> None:
+    """
+    Cache an object bound to an instance.
+
+    The cache only holds a weak reference, so that the instance is not kept alive by
+    the class attribute. Commands that refer to the bound object keep it alive.
+    """
+
+    def _discard(ref: weakref.ref) -> None:
+        if instances.get(_id) is ref:
+            del instances[_id]
+
+    instances[_id] = weakref.ref(obj, _discard)
+    return None
+
+
+def _format_inverse(formatter: FormatterType, *args, **kwargs) -> str:
+    return f"inverse of {formatter(*args, **kwargs)}"
+
+
+def _no_macro_steps(*args, **kwargs) -> None:
+    return None
+
+
 def _default_map_args(*args, **kwargs):
     """The default argument mapping."""
     return args, kwargs
@@ -1,28 +1,48 @@
 from __future__ import annotations
 
+import time
+import weakref
 from contextlib import contextmanager
 from functools import wraps
 from inspect import isgeneratorfunction
+from itertools import groupby
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Generator,
     Hashable,
+    Iterable,
     Literal,
+    MutableSequence,
     TypeVar,
     overload,
 )
 
-from ._command import Command, _CommandBase
+from ._budget import get_memory_budget
+from ._command import BatchCommand, Command, CommandGroup, _CommandBase
 from ._const import empty
+from ._footprint import FootprintIndex, command_footprint, inverse_command
+from ._macro import Macro
+from ._reduce import ReducePolicy
 from ._reversible import ReversibleFunction
-from ._stack_utils import CallbackList, CallType, LengthPair
+from ._stack_utils import (
+    CallbackList,
+    CallType,
+    Checkpoint,
+    LatencyTracker,
+    LengthPair,
+    ReplayInfo,
+    Route,
+)
+from ._store import ColumnarStack, new_stack
 from ._undoable import UndoableGenerator, UndoableInterface, UndoableProperty
 
 if TYPE_CHECKING:
     from typing_extensions import ParamSpec, Self
 
+    from ._budget import MemoryBudget
+
     _P = ParamSpec("_P")
     _R = TypeVar("_R")
     _RR = TypeVar("_RR")
@@ -40,14 +60,16 @@ class ManagerState:
         self,
         measure: Callable[..., float],
         maxsize: float,
+        storage: Literal["list", "columnar"] = "list",
     ) -> None:
         self.measure = measure
         self.maxsize = maxsize
+        self.storage = storage
         self.is_blocked = False
         self.is_merging = False
         self.is_reducing = False
-        self.stack_undo: list[_CommandBase] = []
-        self.stack_redo: list[_CommandBase] = []
+        self.stack_undo: MutableSequence[_CommandBase] = new_stack(storage)
+        self.stack_redo: MutableSequence[_CommandBase] = new_stack(storage)
         self.stack_undo_size = 0.0
         self.stack_redo_size = 0.0
         self.called_callbacks: CallbackList[
@@ -56,19 +78,92 @@ class ManagerState:
         self.errored_callbacks: CallbackList[
             Callable[[_CommandBase, Exception], Any]
         ] = CallbackList()
+        self.budget: MemoryBudget | None = None
+        # positions of recent commands in the undo stack for keyed reduce rules
+        self.reduce_func: ReversibleFunction | None = None
+        self.reduce_index: dict[Hashable, int] = {}
+        # latencies are measured only if needed, such as for checkpoints
+        self.track_latency = False
+        self.latency = LatencyTracker()
+        # positions of the history mapped to the checkpoints
+        self.checkpoints: dict[int, Checkpoint] = {}
+
+    def drop_checkpoints(self, after: int) -> None:
+        """Forget the checkpoints after the given position."""
+        for pos in [pos for pos in self.checkpoints if pos > after]:
+            del self.checkpoints[pos]
+        return None
+
+    def shift_checkpoints(self, start: int, stop: int, n: int) -> None:
+        """Update checkpoints after commands in [start, stop) are replaced by n."""
+        checkpoints: dict[int, Checkpoint] = {}
+        for pos, checkpoint in self.checkpoints.items():
+            if pos <= start:
+                checkpoints[pos] = checkpoint
+            elif pos >= stop:
+                checkpoints[pos - stop + start + n] = checkpoint
+        self.checkpoints = checkpoints
+        return None
+
+    def evict_checkpoints(self) -> None:
+        """Update checkpoints after the oldest command of the undo stack is removed."""
+        self.checkpoints = {
+            pos - 1: checkpoint
+            for pos, checkpoint in self.checkpoints.items()
+            if pos > 0
+        }
+        return None
+
+    def reset_reduce_index(self) -> None:
+        """Forget the positions of recent commands."""
+        self.reduce_func = None
+        self.reduce_index.clear()
+        return None
+
+    def pop_oldest(self) -> _CommandBase | None:
+        """Remove the oldest command from the stacks and return it."""
+        self.reset_reduce_index()
+        if self.stack_undo:
+            cmd = self.stack_undo.pop(0)
+            self.stack_undo_size -= cmd.size
+            self.evict_checkpoints()
+        elif self.stack_redo:
+            # the last command of the history is removed
+            cmd = self.stack_redo.pop(0)
+            self.stack_redo_size -= cmd.size
+            self.drop_checkpoints(len(self.stack_redo))
+        else:
+            return None
+        return cmd
 
 
 class UndoManager:
+    """
+    Undo/redo stack manager.
+
+    Parameters
+    ----------
+    measure : callable, optional
+        Function that returns the size of a command from its arguments.
+    maxsize : float, optional
+        Maximum total size of the undo stack.
+    storage : "list" or "columnar", default is "list"
+        How commands are stored. "columnar" stores function IDs, sizes and arguments
+        in compact columns, which is suitable for very long histories of functions
+        with fixed number of positional arguments.
+    """
+
     def __init__(
         self,
         *,
         measure: Callable[..., float] = always_zero,
         maxsize: float = float("inf"),
+        storage: Literal["list", "columnar"] = "list",
     ):
         self._instances: dict[int, Self] = {}
         if not callable(measure):
             raise TypeError("measure must be callable")
-        self._state = ManagerState(measure, float(maxsize))
+        self._state = ManagerState(measure, float(maxsize), storage)
 
     def set_state(
         self,
@@ -103,12 +198,36 @@ class UndoManager:
         return self.instance_for(obj)
 
     def instance_for(self, obj: Any) -> Self:
-        """Get an undo manager instance for an object."""
+        """
+        Get an undo manager instance for an object.
+
+        The instance is created with the ``measure``, ``maxsize`` and ``storage`` of
+        this manager, and registered to the memory budget of this manager if any.
+        Note that changing this manager later does not affect the instances that
+        are already created. The instance is discarded when the object is garbage
+        collected.
+        """
         _id = id(obj)
         if (stack := self._instances.get(_id, None)) is None:
-            self._instances[_id] = stack = type(self)()
+            self._instances[_id] = stack = type(self)(
+                measure=self._state.measure,
+                maxsize=self._state.maxsize,
+                storage=self._state.storage,
+            )
+            try:
+                weakref.finalize(obj, self._instances.pop, _id, None)
+            except TypeError:
+                # the object does not support weak references
+                pass
+            if (budget := self._state.budget) is not None:
+                budget.register(stack)
         return stack
 
+    @property
+    def budget(self) -> MemoryBudget | None:
+        """The memory budget this manager is registered to."""
+        return self._state.budget
+
     @property
     def is_blocked(self) -> bool:
         """True if manager is blocked."""
@@ -129,12 +248,14 @@ class UndoManager:
         if len(self._state.stack_undo) == 0:
             return empty
         cmd = self._state.stack_undo.pop()
+        self._state.reset_reduce_index()
         out = cmd._revert()
         self._state.stack_redo.append(cmd)
 
         # update size
         self._state.stack_undo_size -= cmd.size
         self._state.stack_redo_size += cmd.size
+        self._update_budget(0.0)
         self.called.evoke(cmd, CallType.undo)
         return out
 
@@ -143,15 +264,191 @@ class UndoManager:
         if len(self._state.stack_redo) == 0:
             return empty
         cmd = self._state.stack_redo.pop()
+        self._state.reset_reduce_index()
         out = cmd._call_raw()
         self._state.stack_undo.append(cmd)
 
         # update size
         self._state.stack_undo_size += cmd.size
         self._state.stack_redo_size -= cmd.size
+        self._update_budget(0.0)
         self.called.evoke(cmd, CallType.redo)
         return out
 
+    def undo_command(self, cmd: _CommandBase | int) -> Any:
+        """
+        Undo a command in the undo stack, which is not necessarily the last one.
+
+        The command can be reverted only if it commutes with all the later commands.
+        This is decided by the keys declared by ``ReversibleFunction.set_footprint``.
+        The inverse of the command is appended to the undo stack so that this
+        operation can also be undone.
+
+        Parameters
+        ----------
+        cmd : command or int
+            The command in the undo stack or its index.
+        """
+        stack = self._state.stack_undo
+        if isinstance(cmd, int):
+            index = range(len(stack))[cmd]
+            cmd = stack[index]
+        else:
+            index = _find_command(stack, cmd)
+
+        if (footprint := command_footprint(cmd)) is None:
+            raise ValueError(f"Footprint of {cmd!r} is not declared.")
+        touched = FootprintIndex()
+        written = FootprintIndex()
+        for later in stack[index + 1 :]:
+            if (later_footprint := command_footprint(later)) is None:
+                raise ValueError(f"Footprint of {later!r} is not declared.")
+            touched.update(later_footprint.reads)
+            touched.update(later_footprint.writes)
+            written.update(later_footprint.writes)
+        if touched.overlaps_any(footprint.writes) or written.overlaps_any(
+            footprint.reads
+        ):
+            raise ValueError(f"{cmd!r} does not commute with the later commands.")
+
+        out = cmd._revert()
+        self.append(inverse_command(cmd))
+        return out
+
+    @property
+    def position(self) -> int:
+        """Current position in the history, that is, the length of the undo stack."""
+        return len(self._state.stack_undo)
+
+    def checkpoint(self, restore: Callable[[], Any], cost: float = 0.0) -> None:
+        """
+        Register a checkpoint at the current position.
+
+        A checkpoint is a function that restores the current state directly, such
+        as loading a snapshot. ``goto`` uses it if it is estimated to be faster than
+        undoing or redoing the commands. The checkpoint is discarded when the
+        commands before the position are changed.
+
+        Registering a checkpoint enables latency tracking (see
+        ``set_latency_tracking``).
+
+        Parameters
+        ----------
+        restore : callable
+            Function that restores the state at the current position.
+        cost : float, default is 0.0
+            Estimated time in seconds to restore the state. It is updated every time
+            the checkpoint is restored.
+        """
+        self._state.checkpoints[self.position] = Checkpoint(restore, cost)
+        self._state.track_latency = True
+        return None
+
+    def set_latency_tracking(self, enabled: bool) -> None:
+        """
+        Enable/disable measuring the latency of the commands.
+
+        Latencies are used by ``estimate`` and ``goto``. They are not measured by
+        default to avoid the overhead, until a checkpoint is registered.
+        """
+        self._state.track_latency = bool(enabled)
+        return None
+
+    def estimate(self, target_position: int) -> float:
+        """
+        Estimate the time in seconds needed to move to the given position.
+
+        The estimation is based on the rolling averages of the latency of each
+        function and the costs of the checkpoints. Commands are estimated to take
+        no time if latency tracking has never been enabled.
+        """
+        return self._plan(target_position).cost
+
+    def goto(self, target_position: int) -> None:
+        """
+        Move to the given position of the history.
+
+        Commands are undone or redone, or a checkpoint is restored first, whichever
+        is estimated to be the fastest.
+        """
+        route = self._plan(target_position)
+        if (pos := route.checkpoint) is not None:
+            checkpoint = self._state.checkpoints[pos]
+            t0 = time.perf_counter()
+            with self.blocked():
+                checkpoint.restore()
+            elapsed = time.perf_counter() - t0
+            checkpoint.cost += 0.5 * (elapsed - checkpoint.cost)
+            self._move_to(pos)
+        while self.position > target_position:
+            self.undo()
+        while self.position < target_position:
+            self.redo()
+        return None
+
+    def _plan(self, target: int) -> Route:
+        """Find the fastest route to the target position."""
+        state = self._state
+        n_undo = len(state.stack_undo)
+        n_total = n_undo + len(state.stack_redo)
+        if not 0 <= target <= n_total:
+            raise ValueError(f"Position must be in [0, {n_total}], got {target}.")
+        # extra cost of starting from each position (0 for the current one)
+        starts = {pos: checkpoint.cost for pos, checkpoint in state.checkpoints.items()}
+        starts[n_undo] = 0.0
+        lo, hi = min(starts), max(starts)
+        latency = state.latency
+        best = Route(float("inf"))
+        # walk outward from the target, loading one command at a time, and stop
+        # once no farther start can be reached or beat the best route so far.
+        for step in (-1, 1):
+            pos = target
+            cost = 0.0
+            while True:
+                if (extra := starts.get(pos)) is not None:
+                    total = cost + extra
+                    if total < best.cost or (total == best.cost and pos == n_undo):
+                        best = Route(total, None if pos == n_undo else pos)
+                if (pos <= lo if step < 0 else pos >= hi) or cost > best.cost:
+                    break
+                if step < 0:
+                    pos -= 1
+                    cost += _command_cost(self._history_at(pos), latency, False)
+                else:
+                    cost += _command_cost(self._history_at(pos), latency, True)
+                    pos += 1
+        return best
+
+    def _history_at(self, index: int) -> _CommandBase:
+        """Return the command at the given index of the whole history."""
+        stack_undo = self._state.stack_undo
+        if index < len(stack_undo):
+            return stack_undo[index]
+        stack_redo = self._state.stack_redo
+        return stack_redo[len(stack_undo) + len(stack_redo) - 1 - index]
+
+    def _move_to(self, position: int) -> None:
+        """Move commands between the stacks without calling them."""
+        state = self._state
+        state.reset_reduce_index()
+        while len(state.stack_undo) > position:
+            cmd = state.stack_undo.pop()
+            state.stack_redo.append(cmd)
+            state.stack_undo_size -= cmd.size
+            state.stack_redo_size += cmd.size
+        while len(state.stack_undo) < position:
+            cmd = state.stack_redo.pop()
+            state.stack_undo.append(cmd)
+            state.stack_undo_size += cmd.size
+            state.stack_redo_size -= cmd.size
+        return None
+
+    def _record_latency(
+        self, function_id: int, elapsed: float, reverse: bool = False
+    ) -> None:
+        self._state.latency.record(function_id, elapsed, reverse)
+        return None
+
     def link(self, other: Self) -> None:
         if not isinstance(other, UndoManager):
             raise TypeError(f"Cannot link {other!r}.")
@@ -163,13 +460,74 @@ class UndoManager:
             raise ValueError("Either UndoManager must be empty.")
         return None
 
-    # def run_all(self) -> Any:
-    #     """Run all the command."""
-    #     for cmd in self._state.stack_undo:
-    #         out = cmd.func._call_raw(*cmd.args, **cmd.kwargs)
-    #     self._state.stack_redo = self._state.stack_undo.copy()
-    #     self._state.stack_redo.reverse()
-    #     return out
+    def run_all(self) -> ReplayInfo:
+        """
+        Run all the commands in the undo stack from the oldest one.
+
+        Undo/redo stacks are not updated and callbacks are not evoked.
+        """
+        return self._run_commands(self._state.stack_undo)
+
+    def replay(
+        self, commands: Iterable[_CommandBase], target: Any = None
+    ) -> ReplayInfo:
+        """
+        Replay commands and push them to the undo stack.
+
+        Commands are called in a single blocked section without evoking callbacks.
+        Consecutive calls of the same function are called together, using the
+        batched implementation if it is defined, which is much faster than calling
+        ``redo`` for each command.
+
+        Parameters
+        ----------
+        commands : iterable of commands
+            Commands to replay, such as the undo stack of another manager.
+        target : object, optional
+            If given, commands of the undoable methods and interfaces are rebound to
+            this object, such as a fresh object in the same state as the recorded
+            one was before the commands. Other commands are replayed as they are.
+
+        Returns
+        -------
+        ReplayInfo
+            Number of replayed commands, number of function groups and the elapsed
+            time in seconds.
+        """
+        if target is None:
+            cmds = list(commands)
+        else:
+            cmds = [_rebind(cmd, target) for cmd in commands]
+        info = self._run_commands(cmds)
+        size_before = self.stack_size
+        self._state.reset_reduce_index()
+        self._state.drop_checkpoints(len(self._state.stack_undo))
+        self._state.stack_undo.extend(cmds)
+        self._state.stack_redo.clear()
+        self._state.stack_undo_size += sum(cmd.size for cmd in cmds)
+        self._state.stack_redo_size = 0.0
+        self._trim()
+        self._update_budget(self.stack_size - size_before)
+        return info
+
+    def _run_commands(self, cmds: list[_CommandBase]) -> ReplayInfo:
+        n_groups = 0
+        t0 = time.perf_counter()
+        with self.blocked():
+            for func, group in groupby(cmds, key=_command_func):
+                if func is None:
+                    # groups and batches are not merged with their neighbors
+                    for cmd in group:
+                        cmd._call_raw()
+                        n_groups += 1
+                    continue
+                elif func._batch_fw is not None:
+                    func._call_batch_raw([(cmd.args, cmd.kwargs) for cmd in group])
+                else:
+                    func._call_raw_many((cmd.args, cmd.kwargs) for cmd in group)
+                n_groups += 1
+        elapsed = time.perf_counter() - t0
+        return ReplayInfo(n_commands=len(cmds), n_groups=n_groups, elapsed=elapsed)
 
     @property
     def stack_undo(self) -> list[_CommandBase]:
@@ -204,29 +562,80 @@ class UndoManager:
         if self.is_blocked:
             return None
 
-        if self._state.is_reducing and len(self._state.stack_undo) > 0:
-            last_cmd = self._state.stack_undo[-1]
-            if isinstance(last_cmd, Command):
-                new_cmd = last_cmd.reduce_with(cmd)
-                popped_cmd = self._state.stack_undo.pop(-1)
-                self._state.stack_undo_size -= popped_cmd.size
-            else:
-                new_cmd = cmd
-            self._state.stack_undo.append(new_cmd)
+        size_before = self.stack_size
+        if self._state.is_reducing and (pos := self._reduce(cmd)) is not None:
+            self._state.drop_checkpoints(pos)
         else:
+            self._state.drop_checkpoints(len(self._state.stack_undo))
             self._state.stack_undo.append(cmd)
+            self._state.stack_undo_size += cmd.size
+            if not self._state.is_reducing:
+                self._state.reset_reduce_index()
 
         self._state.stack_redo.clear()
+        self._state.stack_redo_size = 0.0
         self.called.evoke(cmd, CallType.call)
 
-        # update size
-        self._state.stack_undo_size += cmd.size
-        self._state.stack_redo_size = 0.0
+        self._trim()
+        self._update_budget(self.stack_size - size_before)
+        return None
 
-        # pop items until size is less than maxsize
+    def _reduce(self, cmd: _CommandBase) -> int | None:
+        """Reduce the command into the undo stack and return the position."""
+        state = self._state
+        stack = state.stack_undo
+        if not isinstance(cmd, Command) or (rule := cmd.func._reduce_rule) is None:
+            state.reset_reduce_index()
+            return None
+        if not isinstance(rule, ReducePolicy) or rule.key is None:
+            # reduce with the previous command
+            state.reset_reduce_index()
+            pos = len(stack) - 1
+            if pos < 0:
+                return None
+        else:
+            # reduce with the last command of the same key
+            if state.reduce_func is not cmd.func:
+                state.reset_reduce_index()
+                state.reduce_func = cmd.func
+            key = rule.get_key(cmd.func.binder(cmd.args, cmd.kwargs))
+            index = state.reduce_index
+            n = len(stack)
+            pos = index.pop(key, -1)
+            if n - pos > rule.window:
+                pos = -1  # too far back in the stack
+            index[key] = n
+            # keys are ordered by the last use, so forget the oldest ones
+            while n - index[first := next(iter(index))] > rule.window:
+                del index[first]
+            if pos < 0:
+                return None
+
+        last_cmd = stack[pos]
+        if not isinstance(last_cmd, Command) or last_cmd.func is not cmd.func:
+            return None
+        if (new_cmd := last_cmd.reduce_with(cmd)) is None:
+            return None
+        new_cmd.size = state.measure(*new_cmd.args, **new_cmd.kwargs)
+        stack[pos] = new_cmd
+        state.stack_undo_size += new_cmd.size - last_cmd.size
+        if state.reduce_func is cmd.func:
+            state.reduce_index[key] = pos
+        return pos
+
+    def _trim(self) -> None:
+        """Pop items until size is less than maxsize."""
         while self._state.stack_undo_size > self._state.maxsize:
             cmd = self._state.stack_undo.pop(0)
             self._state.stack_undo_size -= cmd.size
+            self._state.reset_reduce_index()
+            self._state.evict_checkpoints()
+        return None
+
+    def _update_budget(self, delta: float) -> None:
+        """Report the change of stack size to the memory budget."""
+        if (budget := self._state.budget) is not None:
+            budget._update(self._state, delta)
         return None
 
     def _append_command(
@@ -241,9 +650,13 @@ class UndoManager:
 
     def clear(self) -> None:
         """Clear the stack."""
+        size_before = self._state.stack_undo_size + self._state.stack_redo_size
+        self._state.reset_reduce_index()
+        self._state.checkpoints.clear()
         self._state.stack_undo.clear()
         self._state.stack_redo.clear()
         self._state.stack_undo_size = self._state.stack_redo_size = 0.0
+        self._update_budget(-size_before)
         return None
 
     @overload
@@ -386,7 +799,11 @@ class UndoManager:
         invert: bool = False,
     ) -> None:
         """Merge a command set into the undo stack."""
+        start, stop, _ = slice(start, stop).indices(len(self._state.stack_undo))
+        stop = max(start, stop)
         cmds = self._state.stack_undo[start:stop]
+        self._state.reset_reduce_index()
+        self._state.shift_checkpoints(start, stop, 1)
         merged = Command.merge(cmds, formatter=formatter, invert=invert)
         del self._state.stack_undo[start:stop]
         self._state.stack_undo.insert(start, merged)
@@ -419,6 +836,31 @@ class UndoManager:
                 self.called.evoke(self._state.stack_undo[-1], CallType.call)
         return None
 
+    @contextmanager
+    def recording(
+        self, formatter: Callable | None = None
+    ) -> Generator[Macro, None, None]:
+        """
+        Record all the commands in this context as a macro.
+
+        Commands are merged as in ``merging`` and the yielded macro is filled when
+        the context exits.
+
+        Examples
+        --------
+        >>> with mgr.recording() as macro:
+        ...     obj.f(0)
+        ...     obj.g(1)
+        >>> macro.play(other)
+        """
+        macro = Macro()
+        len_before = len(self._state.stack_undo)
+        with self.merging(formatter=formatter):
+            yield macro
+        for cmd in self._state.stack_undo[len_before:]:
+            macro._append_command(cmd)
+        return None
+
     def set_merging(self, enabled: bool) -> None:
         """Enable/disable merging."""
         self._state.is_merging = bool(enabled)
@@ -461,6 +903,66 @@ class UndoManager:
         return None
 
 
+def _command_func(cmd: _CommandBase) -> ReversibleFunction | None:
+    if isinstance(cmd, Command):
+        return cmd.func
+    return None
+
+
+def _rebind_function(func: ReversibleFunction, target: Any) -> ReversibleFunction:
+    """Get the function of the same undoable method of the target."""
+    name = func._attr_name or func.__name__
+    attr = getattr(type(target), name, None)
+    if isinstance(attr, ReversibleFunction):
+        matched = getattr(func._func_fw, "__func__", None) is attr._func_fw
+        new = getattr(target, name)
+    elif isinstance(attr, UndoableInterface):
+        matched = getattr(func._func_fw, "__name__", None) == name
+        new = getattr(target, name).func
+    else:
+        return func
+    if not matched:
+        # such as an inverted command
+        raise TypeError(f"Cannot rebind {func!r} to {target!r}.")
+    return new
+
+
+def _rebind(cmd: _CommandBase, target: Any) -> _CommandBase:
+    """Rebind the command to the target object."""
+    if isinstance(cmd, Command):
+        func = _rebind_function(cmd.func, target)
+        return Command(func, cmd.args, cmd.kwargs, cmd.size)
+    elif isinstance(cmd, BatchCommand):
+        func = _rebind_function(cmd.func, target)
+        return BatchCommand(func, cmd.arguments, cmd.size, cmd.sizes)
+    elif isinstance(cmd, CommandGroup):
+        cmds = [_rebind(each, target) for each in cmd]
+        return CommandGroup(cmds, cmd._formatter, cmd._invert)
+    raise TypeError(f"Cannot rebind {cmd!r} to {target!r}.")
+
+
+def _find_command(stack: MutableSequence[_CommandBase], cmd: _CommandBase) -> int:
+    """Find the index of the command in the stack, the latest one first."""
+    if isinstance(stack, ColumnarStack):
+        # commands are rebuilt on access so they are compared by value
+        return stack.rindex(cmd)
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index] is cmd:
+            return index
+    raise ValueError(f"{cmd!r} is not in the undo stack.")
+
+
+def _command_cost(cmd: _CommandBase, latency: LatencyTracker, reverse: bool) -> float:
+    """Estimated time to call or revert the command."""
+    if isinstance(cmd, Command):
+        return latency.get(cmd.func.function_id, reverse)
+    elif isinstance(cmd, BatchCommand):
+        return latency.get(cmd.func.function_id, reverse) * len(cmd.arguments)
+    elif isinstance(cmd, CommandGroup):
+        return sum(_command_cost(each, latency, reverse) for each in cmd)
+    return 0.0
+
+
 def _join_stack(stack: list, max: int = 10):
     _splitter = ",\n    "
     if len(stack) > max:
@@ -492,4 +994,5 @@ def get_undo_manager(name: Hashable) -> UndoManager:
     if mgr := _GLOBAL_UNDO_MANAGERS.get(name):
         return mgr
     mgr = _GLOBAL_UNDO_MANAGERS[name] = UndoManager()
+    get_memory_budget().register(mgr)
     return mgr
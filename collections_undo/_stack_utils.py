@@ -1,7 +1,9 @@
 from __future__ import annotations
 from enum import Enum
 from typing import (
+    Any,
     Callable,
+    Hashable,
     Iterator,
     MutableSequence,
     NamedTuple,
@@ -72,3 +74,80 @@ class LengthPair(NamedTuple):
 
     undo: int
     redo: int
+
+
+class ReplayInfo(NamedTuple):
+    """Summary of replayed commands."""
+
+    n_commands: int
+    n_groups: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Number of commands replayed per second."""
+        if self.elapsed <= 0:
+            return float("inf")
+        return self.n_commands / self.elapsed
+
+
+class LatencyTracker:
+    """
+    Rolling averages of the latencies of function calls.
+
+    Latencies are recorded for each function and direction (call or revert) as
+    exponential moving averages. For functions that have never been measured, the
+    average of the other direction or of all the functions is used.
+    """
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self._alpha = alpha
+        self._latency: dict[tuple[Hashable, bool], float] = {}
+        self._overall: dict[bool, float] = {}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(n_functions={len(self._latency)})"
+
+    def _ema(self, old: float | None, value: float) -> float:
+        if old is None:
+            return value
+        return old + self._alpha * (value - old)
+
+    def record(self, key: Hashable, elapsed: float, reverse: bool = False) -> None:
+        """Record the time spent on a call."""
+        _key = (key, reverse)
+        self._latency[_key] = self._ema(self._latency.get(_key), elapsed)
+        self._overall[reverse] = self._ema(self._overall.get(reverse), elapsed)
+        return None
+
+    def get(self, key: Hashable, reverse: bool = False) -> float:
+        """Get the estimated latency of a call."""
+        if (out := self._latency.get((key, reverse))) is not None:
+            return out
+        if (out := self._latency.get((key, not reverse))) is not None:
+            return out
+        if (out := self._overall.get(reverse)) is not None:
+            return out
+        return self._overall.get(not reverse, 0.0)
+
+
+class Checkpoint:
+    """A callback that restores the state at a position of the history."""
+
+    __slots__ = ("restore", "cost")
+
+    def __init__(self, restore: Callable[[], Any], cost: float = 0.0) -> None:
+        if not callable(restore):
+            raise TypeError(f"{restore!r} is not callable")
+        self.restore = restore
+        self.cost = cost
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.restore!r}, cost={self.cost!r})"
+
+
+class Route(NamedTuple):
+    """Estimated cost of moving to a position of the history."""
+
+    cost: float
+    checkpoint: int | None = None
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import time
+from array import array
+from typing import Any, Iterable, Iterator, MutableSequence, Sequence, overload
+
+from collections_undo._command import _EMPTY_KWARGS, Command, _CommandBase
+from collections_undo._reversible import ReversibleFunction
+
+# typecodes of packed argument columns
+_TYPECODES: dict[type, str] = {int: "q", float: "d"}
+
+
+class _Table:
+    """Argument columns of a function with a fixed number of positional arguments."""
+
+    __slots__ = ("func", "columns", "n_rows", "n_dead")
+
+    def __init__(self, func: ReversibleFunction, args: tuple[Any, ...]):
+        self.func = func
+        self.columns: list[array | list] = []
+        for arg in args:
+            if (typecode := _TYPECODES.get(type(arg))) is not None:
+                self.columns.append(array(typecode))
+            else:
+                self.columns.append([])
+        self.n_rows = 0
+        self.n_dead = 0
+
+    def append(self, args: tuple[Any, ...]) -> int:
+        for i, (column, arg) in enumerate(zip(self.columns, args)):
+            if type(column) is array:
+                if _TYPECODES.get(type(arg)) == column.typecode:
+                    try:
+                        column.append(arg)
+                        continue
+                    except OverflowError:
+                        pass
+                # not packable any more
+                self.columns[i] = column = list(column)
+            column.append(arg)
+        self.n_rows += 1
+        return self.n_rows - 1
+
+    def get(self, row: int) -> tuple[Any, ...]:
+        return tuple(column[row] for column in self.columns)
+
+    def release(self, row: int) -> None:
+        for column in self.columns:
+            if type(column) is list:
+                column[row] = None
+        self.n_dead += 1
+        return None
+
+
+class _ObjectTable:
+    """Column of commands that cannot be stored in a function table."""
+
+    __slots__ = ("objects", "n_rows", "n_dead")
+
+    def __init__(self):
+        self.objects: list[_CommandBase | None] = []
+        self.n_rows = 0
+        self.n_dead = 0
+
+    def append(self, cmd: _CommandBase) -> int:
+        self.objects.append(cmd)
+        self.n_rows += 1
+        return self.n_rows - 1
+
+    def release(self, row: int) -> None:
+        self.objects[row] = None
+        self.n_dead += 1
+        return None
+
+
+class ColumnarStack(MutableSequence[_CommandBase]):
+    """
+    A command stack that stores commands in columns.
+
+    Function IDs, sizes and timestamps are stored in ``array.array`` columns and the
+    positional arguments are stored in columns of each function, which are packed
+    into arrays if they are all ints or floats. ``Command`` objects are created only
+    when they are accessed. Commands that do not have a fixed signature, such as
+    command groups, are stored as they are.
+    """
+
+    def __init__(self, commands: Iterable[_CommandBase] = ()):
+        self._tables: list[_Table | _ObjectTable] = [_ObjectTable()]
+        self._table_ids: dict[tuple[int, int], int] = {}
+        self._tids = array("q")
+        self._rows = array("q")
+        self._sizes = array("d")
+        self._times = array("d")
+        self.extend(commands)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def __len__(self) -> int:
+        return len(self._tids)
+
+    def _get(self, index: int) -> _CommandBase:
+        table = self._tables[self._tids[index]]
+        row = self._rows[index]
+        if isinstance(table, _ObjectTable):
+            return table.objects[row]
+        return Command(table.func, table.get(row), _EMPTY_KWARGS, self._sizes[index])
+
+    @overload
+    def __getitem__(self, index: int) -> _CommandBase:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[_CommandBase]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        return self._get(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[_CommandBase]:
+        for i in range(len(self)):
+            yield self._get(i)
+
+    def __contains__(self, cmd: object) -> bool:
+        try:
+            self.rindex(cmd)
+        except ValueError:
+            return False
+        return True
+
+    def rindex(self, cmd: _CommandBase) -> int:
+        """
+        Return the index of the last command that matches the given command.
+
+        Commands in function tables are rebuilt on every access, so they are
+        matched by value: the function must be the same and the arguments must be
+        identical, except for numbers that are compared by value. Other commands
+        are matched by identity.
+        """
+        if type(cmd) is Command and not cmd.kwargs:
+            tid = self._table_ids.get((id(cmd.func), len(cmd.args)), 0)
+        else:
+            tid = 0
+        table = self._tables[tid]
+        for index in range(len(self) - 1, -1, -1):
+            if self._tids[index] != tid:
+                continue
+            row = self._rows[index]
+            if isinstance(table, _ObjectTable):
+                if table.objects[row] is cmd:
+                    return index
+            elif all(map(_is_same_arg, table.get(row), cmd.args)):
+                return index
+        raise ValueError(f"{cmd!r} is not in the stack.")
+
+    def __setitem__(self, index, cmd):
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment is not supported.")
+        index = range(len(self))[index]
+        del self[index]
+        self.insert(index, cmd)
+
+    def __delitem__(self, index: int | slice) -> None:
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+        else:
+            indices = [range(len(self))[index]]
+        for i in indices:
+            self._tables[self._tids[i]].release(self._rows[i])
+        if isinstance(index, slice) and indices.step == 1:
+            sl = slice(indices.start, indices.stop)
+            for column in (self._tids, self._rows, self._sizes, self._times):
+                del column[sl]
+        else:
+            for i in sorted(indices, reverse=True):
+                for column in (self._tids, self._rows, self._sizes, self._times):
+                    del column[i]
+        self._compact()
+        return None
+
+    def _store(self, cmd: _CommandBase) -> tuple[int, int]:
+        """Store the command in a table and return the table ID and the row."""
+        if not isinstance(cmd, _CommandBase):
+            raise TypeError(f"{cmd!r} is not a command")
+        if type(cmd) is Command and not cmd.kwargs:
+            key = (id(cmd.func), len(cmd.args))
+            if (tid := self._table_ids.get(key)) is None:
+                tid = self._table_ids[key] = len(self._tables)
+                self._tables.append(_Table(cmd.func, cmd.args))
+            return tid, self._tables[tid].append(cmd.args)
+        return 0, self._tables[0].append(cmd)
+
+    def insert(self, index: int, cmd: _CommandBase) -> None:
+        tid, row = self._store(cmd)
+        self._tids.insert(index, tid)
+        self._rows.insert(index, row)
+        self._sizes.insert(index, cmd.size)
+        self._times.insert(index, time.time())
+        return None
+
+    def append(self, cmd: _CommandBase) -> None:
+        tid, row = self._store(cmd)
+        self._tids.append(tid)
+        self._rows.append(row)
+        self._sizes.append(cmd.size)
+        self._times.append(time.time())
+        return None
+
+    def clear(self) -> None:
+        self._tables = [_ObjectTable()]
+        self._table_ids.clear()
+        for column in (self._tids, self._rows, self._sizes, self._times):
+            del column[:]
+        return None
+
+    def function_ids(self) -> list[int | None]:
+        """Function ID of each command (None for commands without function)."""
+        ids: list[int | None] = []
+        for table in self._tables:
+            if isinstance(table, _ObjectTable):
+                ids.append(None)
+            else:
+                ids.append(table.func.function_id)
+        return [ids[tid] for tid in self._tids]
+
+    @property
+    def sizes(self) -> Sequence[float]:
+        """Sizes of the commands."""
+        return array("d", self._sizes)
+
+    @property
+    def timestamps(self) -> Sequence[float]:
+        """Time when each command was added to the stack."""
+        return array("d", self._times)
+
+    def _compact(self) -> None:
+        """Remove released rows from tables that are mostly dead."""
+        for tid, table in enumerate(self._tables):
+            if table.n_dead < 64 or table.n_dead * 2 < table.n_rows:
+                continue
+            positions = [i for i, t in enumerate(self._tids) if t == tid]
+            if isinstance(table, _ObjectTable):
+                table.objects = [table.objects[self._rows[i]] for i in positions]
+            else:
+                for j, column in enumerate(table.columns):
+                    values = [column[self._rows[i]] for i in positions]
+                    if type(column) is array:
+                        table.columns[j] = array(column.typecode, values)
+                    else:
+                        table.columns[j] = values
+            for row, i in enumerate(positions):
+                self._rows[i] = row
+            table.n_rows = len(positions)
+            table.n_dead = 0
+        return None
+
+
+def _is_same_arg(a: Any, b: Any) -> bool:
+    if a is b:
+        return True
+    # numbers may be unpacked from an array as new objects
+    return type(a) is type(b) and type(a) in (int, float) and a == b
+
+
+def new_stack(storage: str) -> MutableSequence[_CommandBase]:
+    """Create an empty command stack of given storage type."""
+    if storage == "list":
+        return []
+    elif storage == "columnar":
+        return ColumnarStack()
+    raise ValueError(f"Unknown storage type: {storage!r}.")
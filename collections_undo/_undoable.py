@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import weakref
 from functools import partial, wraps
 from typing import TYPE_CHECKING, Any, Callable, Generator, Generic, Literal, TypeVar
 
 from typing_extensions import ParamSpec, TypeGuard
 
 from collections_undo._const import Args, FormatterType, empty
-from collections_undo._reversible import ReversibleFunction
+from collections_undo._reversible import ReversibleFunction, _cache_instance
 
 if TYPE_CHECKING:
     from collections_undo._stack import UndoManager
@@ -25,6 +26,7 @@ def _dummy_func(*args, **kwargs) -> None:
 
 
 _Fmt = TypeVar("_Fmt", bound=FormatterType)
+_F = TypeVar("_F", bound=Callable)
 
 
 class UndoableInterface(Generic[_P, _R, _Args]):
@@ -43,6 +45,7 @@ class UndoableInterface(Generic[_P, _R, _Args]):
         freceive: Callable[_P, _R] | None = None,
         fserve: Callable[_P, _Args] | None = None,
         mgr: UndoManager = None,
+        fbatch: Callable[[list[Args]], Any] | None = None,
     ):
         if freceive is None:
             freceive = _dummy_func
@@ -52,11 +55,13 @@ class UndoableInterface(Generic[_P, _R, _Args]):
             fserve = _dummy_func
         self._freceive = freceive
         self._fserve = fserve
+        self._fbatch = fbatch
         self._mgr = mgr
         self._func = None
-        self._instances: dict[int, UndoableInterface] = {}
+        self._instances: dict[int, weakref.ref[UndoableInterface]] = {}
         self._formatter_fw = None
         self._formatter_rv = None
+        self._ffootprint = None
 
     def server(self, fserve: Callable[_P, _Args]) -> UndoableInterface[_P, _R, _Args]:
         """Set the server function."""
@@ -64,9 +69,11 @@ class UndoableInterface(Generic[_P, _R, _Args]):
             fserve=fserve,
             freceive=self._freceive,
             mgr=self._mgr,
+            fbatch=self._fbatch,
         )
         itf._formatter_fw = self._formatter_fw
         itf._formatter_rv = self._formatter_rv
+        itf._ffootprint = self._ffootprint
         return itf
 
     def receiver(self, freceive: Callable[_P, _R]) -> UndoableInterface[_P, _R, _Args]:
@@ -75,9 +82,31 @@ class UndoableInterface(Generic[_P, _R, _Args]):
             fserve=self._fserve,
             freceive=freceive,
             mgr=self._mgr,
+            fbatch=self._fbatch,
         )
         itf._formatter_fw = self._formatter_fw
         itf._formatter_rv = self._formatter_rv
+        itf._ffootprint = self._ffootprint
+        return itf
+
+    def batch_receiver(
+        self, fbatch: Callable[[list[Args]], Any]
+    ) -> UndoableInterface[_P, _R, _Args]:
+        """
+        Set the batched receiver function.
+
+        The batched receiver is called with a list of ``(args, kwargs)`` and must be
+        equivalent to calling the receiver for each of them in order.
+        """
+        itf = UndoableInterface(
+            fserve=self._fserve,
+            freceive=self._freceive,
+            mgr=self._mgr,
+            fbatch=fbatch,
+        )
+        itf._formatter_fw = self._formatter_fw
+        itf._formatter_rv = self._formatter_rv
+        itf._ffootprint = self._ffootprint
         return itf
 
     def set_formatter(
@@ -100,6 +129,18 @@ class UndoableInterface(Generic[_P, _R, _Args]):
         self._formatter_rv = formatter
         return formatter
 
+    def set_footprint(self, func: _F, /) -> _F:
+        """
+        Set a function that declares the keys the receiver reads and writes.
+
+        The function is called with the arguments of the receiver. See
+        ``ReversibleFunction.set_footprint`` for details.
+        """
+        if not callable(func):
+            raise TypeError(f"{func!r} is not callable")
+        self._ffootprint = func
+        return func
+
     @property
     def func(self) -> ReversibleFunction[_P, _R, _R]:
         """Return the reversible function."""
@@ -121,16 +162,24 @@ class UndoableInterface(Generic[_P, _R, _Args]):
         if obj is None:
             return self
         _id = id(obj)
-        if (out := self._instances.get(_id, None)) is None:
-            self._instances[_id] = out = UndoableInterface(
+        if (ref := self._instances.get(_id, None)) is None or (out := ref()) is None:
+            if self._fbatch is None:
+                fbatch = None
+            else:
+                fbatch = self._fbatch.__get__(obj, objtype)
+            out = UndoableInterface(
                 freceive=self._freceive.__get__(obj, objtype),
                 fserve=self._fserve.__get__(obj, objtype),
                 mgr=self._mgr.__get__(obj, objtype),
+                fbatch=fbatch,
             )
+            _cache_instance(self._instances, _id, out)
             if self._formatter_fw is not None:
                 out._formatter_fw = partial(self._formatter_fw, obj)
             if self._formatter_rv is not None:
                 out._formatter_rv = partial(self._formatter_rv, obj)
+            if self._ffootprint is not None:
+                out._ffootprint = partial(self._ffootprint, obj)
         return out
 
     def __repr__(self) -> str:
@@ -163,6 +212,33 @@ class UndoableInterface(Generic[_P, _R, _Args]):
 
         fn._map_args = _mapping
         fn._reduce_rule = self._reduce_rule
+
+        if self._fbatch is not None:
+            # batched forward/reverse functions
+            def fw_batch(arguments: list[Args]):
+                return self._fbatch([args[0] for args, _ in arguments])
+
+            def rv_batch(arguments: list[Args]):
+                return self._fbatch(
+                    [args[1] for args, _ in arguments if args[1] is not None]
+                )
+
+            fn._batch_fw = fw_batch
+            fn._batch_rv = rv_batch
+
+        if self._ffootprint is not None:
+            # both the new and the old states are written
+            def footprint(new: Args, old: Args):
+                reads, writes = [], []
+                for each in (new, old):
+                    if each is not None:
+                        args, kwargs = each
+                        _reads, _writes = self._ffootprint(*args, **kwargs)
+                        reads.extend(_reads)
+                        writes.extend(_writes)
+                return reads, writes
+
+            fn._footprint = footprint
         return fn
 
     @staticmethod
@@ -299,7 +375,7 @@ class UndoableGenerator(Generic[_P, _R, _RR]):
         self._formatter_fw = None
         self._formatter_rv = None
         self._mgr = mgr
-        self._instances: dict[int, UndoableGenerator] = {}
+        self._instances: dict[int, weakref.ref[UndoableGenerator]] = {}
         wraps(func)(self)
 
     @property
@@ -325,11 +401,12 @@ class UndoableGenerator(Generic[_P, _R, _RR]):
         if obj is None:
             return self
         _id = id(obj)
-        if (out := self._instances.get(_id, None)) is None:
-            self._instances[_id] = out = UndoableGenerator(
+        if (ref := self._instances.get(_id, None)) is None or (out := ref()) is None:
+            out = UndoableGenerator(
                 self._gen_func.__get__(obj, objtype),
                 mgr=self._mgr.__get__(obj, objtype),
             )
+            _cache_instance(self._instances, _id, out)
             if self._formatter_fw is not None:
                 out._formatter_fw = partial(self._formatter_fw, obj)
             if self._formatter_rv is not None:
@@ -5,17 +5,31 @@ Using UndoManager in a way similar to Python object.
 from ._containers import (
     AbstractUndoableDict,
     AbstractUndoableList,
+    AbstractUndoableNDArray,
     AbstractUndoableSet,
+    UndoableArrayList,
     UndoableDict,
+    UndoableIntSet,
     UndoableList,
+    UndoableNDArray,
+    UndoablePersistentList,
     UndoableSet,
+    UndoableSqliteDict,
+    UndoableText,
 )
 
 __all__ = [
     "AbstractUndoableDict",
     "AbstractUndoableList",
+    "AbstractUndoableNDArray",
     "AbstractUndoableSet",
+    "UndoableArrayList",
+    "UndoablePersistentList",
+    "UndoableSqliteDict",
+    "UndoableText",
     "UndoableDict",
+    "UndoableIntSet",
     "UndoableList",
+    "UndoableNDArray",
     "UndoableSet",
 ]
@@ -0,0 +1,3 @@
+from ._reduce import ReducePolicy, accumulate, last_write_wins, replace
+
+__all__ = ["ReducePolicy", "replace", "last_write_wins", "accumulate"]
@@ -0,0 +1,117 @@
+import pytest
+from collections_undo.containers import UndoableArrayList
+
+
+def test_setitem():
+    lst = UndoableArrayList("q", range(6))
+    lst[1] = 10
+    lst[2:4] = [20, 30, 40]
+    assert lst._array.tolist() == [0, 10, 20, 30, 40, 4, 5]
+    lst[::3] = [-1, -2, -3]
+    assert lst._array.tolist() == [-1, 10, 20, -2, 40, 4, -3]
+    indices, new, old = lst._mgr.stack_undo[-1].args
+    assert indices == range(0, 7, 3)
+    assert len(new) == len(old) == 3 * lst.itemsize
+    with pytest.raises(ValueError):
+        lst[::2] = [1]
+    with pytest.raises(TypeError):
+        lst[0] = 1.5
+
+    lst.undo()
+    assert lst._array.tolist() == [0, 10, 20, 30, 40, 4, 5]
+    lst.undo()
+    assert lst._array.tolist() == [0, 10, 2, 3, 4, 5]
+    lst.undo()
+    assert lst._array.tolist() == [0, 1, 2, 3, 4, 5]
+    lst.redo()
+    lst.redo()
+    lst.redo()
+    assert lst._array.tolist() == [-1, 10, 20, -2, 40, 4, -3]
+
+
+def test_insert_delete():
+    lst = UndoableArrayList("d", [0.0, 1.0, 2.0])
+    lst.append(3.0)
+    lst.insert(-100, -1.0)
+    lst.extend([4.0, 5.0])
+    del lst[1]
+    del lst[::2]
+    assert lst._array.tolist() == [1.0, 3.0, 5.0]
+    assert lst.pop() == 5.0
+    lst.clear()
+    assert len(lst) == 0
+    for _ in range(7):
+        lst.undo()
+    assert lst._array.tolist() == [0.0, 1.0, 2.0]
+    for _ in range(7):
+        lst.redo()
+    assert len(lst) == 0
+
+
+def test_view_and_sort():
+    lst = UndoableArrayList("i", [3, 1, 2])
+    lst.sort()
+    view = lst.view()
+    assert view.tolist() == [1, 2, 3]
+    with pytest.raises(TypeError):
+        view[0] = 10
+    lst[0] = 10
+    assert view[0] == 10  # view shares the buffer
+    view.release()
+    lst.undo()
+    lst.undo()
+    assert lst._array.tolist() == [3, 1, 2]
+
+
+def test_extended_slice():
+    lst = UndoableArrayList("q", range(10_000))
+    lst[::1000] = range(10)
+    del lst[-1::-999]
+    indices, old = lst._mgr.stack_undo[-1].args
+    assert indices == range(9, 10_000, 999)
+    assert len(old) == len(indices) * lst.itemsize
+    expected = list(range(10_000))
+    expected[::1000] = range(10)
+    del expected[-1::-999]
+    assert lst._array.tolist() == expected
+    lst.undo()
+    expected = list(range(10_000))
+    expected[::1000] = range(10)
+    assert lst._array.tolist() == expected
+    lst.undo()
+    assert lst._array.tolist() == list(range(10_000))
+    lst.redo()
+    lst.redo()
+    assert len(lst) == 10_000 - len(indices)
+
+
+def test_packed_append_and_sort():
+    from array import array
+
+    lst = UndoableArrayList("q", [3, 1, 2])
+    lst.append(0)
+    index, data = lst._mgr.stack_undo[-1].args
+    assert index == 3
+    assert data == array("q", [0]).tobytes()
+    with lst.appending():
+        for i in range(4, 8):
+            lst.append(i)
+    assert lst._mgr.stack_lengths == (2, 0)
+    (start, values) = lst._mgr.stack_undo[-1].args
+    assert values == array("q", [4, 5, 6, 7])
+    with pytest.raises(TypeError):
+        lst.append(1.5)
+
+    lst.sort(reverse=True)
+    assert lst._array.tolist() == [7, 6, 5, 4, 3, 2, 1, 0]
+    new, old = lst._mgr.stack_undo[-1].args
+    assert isinstance(new, bytes) and isinstance(old, bytes)
+    lst.undo()
+    assert lst._array.tolist() == [3, 1, 2, 0, 4, 5, 6, 7]
+    lst.undo()
+    lst.undo()
+    assert lst._array.tolist() == [3, 1, 2]
+    lst.redo()
+    lst.redo()
+    lst.redo()
+    assert lst._array.tolist() == [7, 6, 5, 4, 3, 2, 1, 0]
@@ -0,0 +1,154 @@
+import gc
+
+from collections_undo import (
+    MemoryBudget,
+    UndoManager,
+    get_memory_budget,
+    get_undo_manager,
+)
+
+
+def _nargs(*args, **kwargs):
+    return len(args) + len(kwargs)
+
+
+def _make_func(mgr: UndoManager):
+    @mgr.undoable
+    def f(*args):
+        pass
+
+    @f.undo_def
+    def f(*args):
+        pass
+
+    return f
+
+
+def test_incremental_accounting():
+    budget = MemoryBudget()
+    mgr0 = UndoManager(measure=_nargs)
+    mgr1 = UndoManager(measure=_nargs)
+    f0 = _make_func(mgr0)
+    f1 = _make_func(mgr1)
+    f0(0, 0)
+    budget.register(mgr0)
+    budget.register(mgr1)
+    assert len(budget) == 2
+    assert budget.total_size == 2
+    f1(0, 0, 0)
+    assert budget.total_size == 5
+    mgr1.undo()
+    assert budget.total_size == 5
+    f1(0)
+    assert budget.total_size == 3
+    mgr0.clear()
+    assert budget.total_size == 1
+    budget.unregister(mgr1)
+    assert budget.total_size == 0
+    assert mgr1.budget is None
+
+
+def test_lru_eviction():
+    budget = MemoryBudget(maxsize=9)
+    mgr0 = UndoManager(measure=_nargs)
+    mgr1 = UndoManager(measure=_nargs)
+    budget.register(mgr0)
+    budget.register(mgr1)
+    f0 = _make_func(mgr0)
+    f1 = _make_func(mgr1)
+    f0(0, 0)
+    f0(0, 0)
+    f1(0, 0, 0)
+    assert budget.total_size == 7
+    f1(0, 0, 0)
+    # mgr0 is the least recently used manager
+    assert budget.total_size == 8
+    assert mgr0.stack_lengths == (1, 0)
+    assert mgr1.stack_lengths == (2, 0)
+    mgr0.undo()
+    f1(0, 0, 0, 0)
+    assert budget.total_size == 7
+    assert mgr0.empty
+    assert mgr1.stack_lengths == (2, 0)
+    budget.maxsize = 4
+    assert budget.total_size == 4
+    assert mgr1.stack_lengths == (1, 0)
+
+
+def test_instances_are_registered():
+    budget = MemoryBudget(maxsize=5)
+
+    class A:
+        mgr = UndoManager(measure=_nargs)
+
+        @mgr.undoable
+        def f(self, x):
+            pass
+
+        @f.undo_def
+        def f(self, x):
+            pass
+
+    budget.register(A.mgr)
+    a0, a1 = A(), A()
+    assert a0.mgr.budget is budget
+    for i in range(3):
+        a0.f(i)
+    for i in range(3):
+        a1.f(i)
+    assert budget.total_size == 5
+    assert a0.mgr.stack_lengths == (2, 0)
+    assert a1.mgr.stack_lengths == (3, 0)
+
+
+def test_instances_inherit_state():
+    class A:
+        mgr = UndoManager(measure=_nargs, maxsize=3, storage="columnar")
+
+    a = A()
+    assert a.mgr is not A.mgr
+    assert a.mgr._state.measure is _nargs
+    assert a.mgr._state.maxsize == 3
+    assert a.mgr._state.storage == "columnar"
+
+
+def test_dead_instances_are_forgotten():
+    budget = MemoryBudget(maxsize=2)
+
+    class A:
+        mgr = UndoManager(measure=_nargs)
+
+        @mgr.undoable
+        def f(self, x):
+            pass
+
+        @f.undo_def
+        def f(self, x):
+            pass
+
+    budget.register(A.mgr)
+    a0 = A()
+    a0.mgr.clear()
+    assert len(budget) == 2
+    del a0
+    gc.collect()
+    assert len(budget) == 1
+    assert len(A.mgr._instances) == 0
+
+    a0, a1 = A(), A()
+    a0.f(0)
+    a0.f(1)
+    del a0  # the commands keep the object alive
+    gc.collect()
+    assert len(A.mgr._instances) == 1
+    a1.f(0)
+    a1.f(1)  # all the commands of a0 are evicted
+    gc.collect()
+    assert list(A.mgr._instances.values()) == [a1.mgr]
+    assert len(budget) == 2
+    assert budget.total_size == 2
+
+
+def test_global_budget():
+    mgr = get_undo_manager("test_global_budget")
+    assert mgr.budget is get_memory_budget()
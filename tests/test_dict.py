@@ -1,3 +1,5 @@
+import pytest
+from collections_undo import empty
 from collections_undo.containers import UndoableDict
 
 def test_dict():
@@ -34,3 +36,150 @@ def test_update():
     assert d._dict == {"a": 1, "b": 2, "c": 3}
     d.redo()
     assert d._dict == {"a": 1, "b": 2, "c": 10, "d": 11}
+
+
+def test_batched_setitem():
+    d = UndoableDict({"a": 1})
+    with d._mgr.merging():
+        d["a"] = 2
+        d["b"] = 3
+        d["a"] = 4
+        d["c"] = 5
+    assert d._dict == {"a": 4, "b": 3, "c": 5}
+    assert len(d._mgr.stack_undo[-1].commands) == 1
+    d.undo()
+    assert d._dict == {"a": 1}
+    d.redo()
+    assert d._dict == {"a": 4, "b": 3, "c": 5}
+
+
+def test_reduce_setitem():
+    d = UndoableDict(a=0)
+    with d._mgr.reducing():
+        d["a"] = 1
+        d["b"] = 1
+        d["a"] = 2
+        d["b"] = 2
+    assert d._mgr.stack_lengths == (2, 0)
+    d._mgr.undo()
+    assert d == {"a": 2}
+    d._mgr.undo()
+    assert d == {"a": 0}
+
+
+def test_undo_command():
+    d = UndoableDict()
+    d["a"] = 1
+    d["b"] = 2
+    d["a"] = 3
+    d["c"] = 4
+    mgr = d._mgr
+    # "b" is not touched by the later commands
+    mgr.undo_command(1)
+    assert d == {"a": 3, "c": 4}
+    assert mgr.stack_lengths == (5, 0)
+    mgr.undo()
+    assert d == {"a": 3, "b": 2, "c": 4}
+    with pytest.raises(ValueError):
+        mgr.undo_command(0)  # "a" is overwritten later
+    assert d == {"a": 3, "b": 2, "c": 4}
+
+
+def test_undo_command_by_identity():
+    d = UndoableDict()
+    d["a"] = 1
+    mgr = d._mgr
+    first = mgr.stack_undo[0]
+    del d["a"]
+    d["a"] = 1
+    with pytest.raises(ValueError):
+        mgr.undo_command(first)  # "a" is deleted later
+    assert d == {"a": 1}
+    mgr.undo_command(mgr.stack_undo[-1])
+    assert d == {}
+
+
+def test_clear_swaps_storage():
+    d = UndoableDict(a=1, b=2)
+    storage = d._dict
+    d.clear()
+    assert d._mgr.stack_undo[-1].args == (storage,)
+    d["c"] = 3
+    assert storage == {"a": 1, "b": 2}
+    d.undo()
+    d.undo()
+    assert d._dict is storage
+    d.redo()
+    assert len(d) == 0
+    d.redo()
+    assert d == {"c": 3}
+
+
+def test_update_delta():
+    value = [1]
+    d = UndoableDict(a=value, b=2)
+    d.update(a=value, b=3, c=4)
+    assert d._mgr.stack_undo[-1].args == (("b", "c"), (3, 4), (2, empty))
+    d.update(a=value)
+    assert d._mgr.stack_lengths == (1, 0)
+
+    class EqualityDict(UndoableDict, update_compare="equality"):
+        pass
+
+    d = EqualityDict(a=[1], b=2)
+    d.update(a=[1], b=2.0, c=3)
+    assert d._mgr.stack_undo[-1].args == (("c",), (3,), (empty,))
+    d.undo()
+    assert d == {"a": [1], "b": 2}
+
+    # the constructor is compatible with dict
+    assert UndoableDict(update_compare=1) == {"update_compare": 1}
+    with pytest.raises(ValueError):
+
+        class InvalidDict(UndoableDict, update_compare="value"):
+            pass
+
+
+def test_update_equality_ambiguous():
+    class Ambiguous:
+        def __eq__(self, other):
+            raise ValueError("The truth value is ambiguous.")
+
+    class EqualityDict(UndoableDict, update_compare="equality"):
+        pass
+
+    old, new = Ambiguous(), Ambiguous()
+    d = EqualityDict(a=old)
+    d.update(a=new)
+    assert d["a"] is new
+    d.undo()
+    assert d["a"] is old
+
+
+def test_default_set_storage():
+    from collections_undo._containers._dict import AbstractUndoableDict
+
+    class D(AbstractUndoableDict):
+        def __init__(self, **kwargs):
+            self._data = kwargs
+
+        def __iter__(self):
+            return iter(self._data)
+
+        def __len__(self):
+            return len(self._data)
+
+        def __getitem__(self, key):
+            return self._data[key]
+
+        def _raw_setitem(self, key, value):
+            self._data[key] = value
+
+        def _raw_delitem(self, key):
+            del self._data[key]
+
+    d = D(a=1, b=2)
+    d._raw_set_storage(None)
+    assert len(d) == 0
+    with pytest.raises(TypeError):
+        d._raw_set_storage({})
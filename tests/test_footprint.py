@@ -0,0 +1,89 @@
+import pytest
+from collections_undo import UndoManager
+from collections_undo._footprint import FootprintIndex
+from collections_undo.containers import UndoableDict, UndoableList
+
+
+def test_index():
+    index = FootprintIndex(["a", 3, range(10, 20), slice(30, 40)])
+    assert index.overlaps("a")
+    assert not index.overlaps("b")
+    assert index.overlaps(3)
+    assert not index.overlaps(4)
+    assert index.overlaps(range(0, 11))
+    assert not index.overlaps(range(4, 10))
+    assert index.overlaps(slice(39, 50))
+    assert not index.overlaps(range(20, 30))
+    assert not index.overlaps(range(5, 5))
+    assert index.overlaps(slice(5, -1, -2))  # 5, 3, 1
+    assert not index.overlaps(slice(2, -1, -2))  # 2, 0
+
+    index.add(range(4, 10))
+    assert index._starts == [3, 30]
+    assert index._stops == [20, 40]
+
+
+def test_undo_command_list():
+    lst = UndoableList([0, 1, 2, 3])
+    lst[0] = 10
+    lst[2:4] = [20, 30]
+    lst[1] = 40
+    lst._mgr.undo_command(0)
+    assert list(lst) == [0, 40, 20, 30]
+    lst._mgr.undo()
+    assert list(lst) == [10, 40, 20, 30]
+
+    lst.insert(0, -1)
+    with pytest.raises(ValueError):
+        lst._mgr.undo_command(2)  # the later insertion shifts the items
+
+
+def test_undo_command_reversed_slice():
+    lst = UndoableList(range(6))
+    lst[1] = 10
+    del lst[::-2]
+    assert list(lst) == [0, 2, 4]
+    with pytest.raises(ValueError):
+        lst._mgr.undo_command(0)  # the deletion touches the index 1
+    lst[1] = 40
+    lst[::-2] = [41, 1]
+    lst._mgr.undo_command(2)
+    assert list(lst) == [1, 2, 41]
+    for _ in range(5):
+        lst.undo()
+    assert list(lst) == [0, 1, 2, 3, 4, 5]
+
+
+def test_inverse_command_format():
+    lst = UndoableList([0, 0])
+    lst[0] = 10
+    lst._mgr.undo_command(0)
+    assert repr(lst._mgr.stack_undo[-1]) == "Command<inverse of _setitem(0, 10)>"
+
+    d = UndoableDict()
+    d["a"] = 1
+    d._mgr.undo_command(0)
+    assert d == {}
+    assert repr(d._mgr.stack_undo[-1]).startswith("Command<inverse of _setitem")
+
+
+def test_undo_command_columnar():
+    mgr = UndoManager(storage="columnar")
+    state = {}
+
+    @mgr.undoable
+    def set_value(key, value):
+        state[key] = value
+
+    @set_value.undo_def
+    def set_value(key, value):
+        del state[key]
+
+    @set_value.set_footprint
+    def _set_value_footprint(key, value):
+        return (), (key,)
+
+    set_value("a", 1)
+    set_value("b", 2)
+    mgr.undo_command(mgr.stack_undo[0])
+    assert state == {"b": 2}
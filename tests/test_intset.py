@@ -0,0 +1,72 @@
+import pytest
+from collections_undo.containers import UndoableIntSet
+
+
+def test_intset():
+    s = UndoableIntSet([1, 5, 20])
+    s.add(3)
+    s.discard(5)
+    assert set(s) == {1, 3, 20}
+    assert len(s) == 3
+    assert 20 in s and 5 not in s and -1 not in s and "a" not in s
+    s.undo()
+    assert set(s) == {1, 3, 5, 20}
+    s.undo()
+    assert set(s) == {1, 5, 20}
+    s.redo()
+    assert set(s) == {1, 3, 5, 20}
+    with pytest.raises(ValueError):
+        s.add(-1)
+    with pytest.raises(TypeError):
+        s.add(1.0)
+
+
+def test_intset_operators():
+    s = UndoableIntSet([1, 2, 3])
+    s |= {3, 4, 100}
+    assert set(s) == {1, 2, 3, 4, 100}
+    s &= {2, 3, 4, 5, 100}
+    assert set(s) == {2, 3, 4, 100}
+    s ^= {4, 5}
+    assert set(s) == {2, 3, 5, 100}
+    s -= UndoableIntSet([3, 100])
+    assert set(s) == {2, 5}
+    s.clear()
+    assert len(s) == 0
+    assert s._mgr.stack_lengths == (5, 0)
+    s.undo()
+    s.undo()
+    assert set(s) == {2, 3, 5, 100}
+    s.undo()
+    s.undo()
+    s.undo()
+    assert set(s) == {1, 2, 3}
+    assert len(s) == 3
+
+
+def test_intset_compact_command():
+    n = 1_000_000
+    s = UndoableIntSet(range(n))
+    s -= range(0, n, 2)
+    assert len(s) == n // 2
+    offset, mask, compressed = s._mgr.stack_undo[-1].args
+    assert offset == 0
+    assert compressed
+    assert len(mask) < 10_000
+    s.undo()
+    assert len(s) == n
+    s.redo()
+    assert 1 in s and 2 not in s
+
+
+def test_intset_non_members():
+    s = UndoableIntSet([0, 1, 2])
+    s &= [-1, 1, 2, "a"]
+    assert set(s) == {1, 2}
+    s -= [-5, 2, None]
+    assert set(s) == {1}
+    with pytest.raises(ValueError):
+        s |= [-1]
+    s.undo()
+    s.undo()
+    assert set(s) == {0, 1, 2}
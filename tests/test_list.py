@@ -83,3 +83,217 @@ def test_reverse():
     assert l._list == [1, 2, 3]
     l.redo()
     assert l._list == [3, 2, 1]
+
+
+def test_batched_setitem():
+    class CountingList(UndoableList):
+        n_calls = 0
+
+        def _raw_setitem(self, key, val):
+            CountingList.n_calls += 1
+            super()._raw_setitem(key, val)
+
+    l = CountingList(range(10))
+    with l._mgr.merging():
+        for i in range(2, 8):
+            l[i] = -i
+        l[3] = 100
+    assert l._list == [0, 1, -2, 100, -4, -5, -6, -7, 8, 9]
+    assert len(l._mgr.stack_undo[-1].commands) == 1
+    CountingList.n_calls = 0
+    l.undo()
+    assert l._list == list(range(10))
+    assert CountingList.n_calls == 1
+    l.redo()
+    assert l._list == [0, 1, -2, 100, -4, -5, -6, -7, 8, 9]
+    assert CountingList.n_calls == 2
+
+    with l._mgr.merging():
+        l[0] = "a"
+        l[5] = "b"
+        l[1:3] = ["x", "y"]
+    assert l._list == ["a", "x", "y", 100, -4, "b", -6, -7, 8, 9]
+    l.undo()
+    assert l._list == [0, 1, -2, 100, -4, -5, -6, -7, 8, 9]
+
+
+def test_bulk_raw_calls():
+    class CountingList(UndoableList):
+        n_calls = 0
+
+        def _raw_insert(self, index, val):
+            raise AssertionError("_raw_insert should not be called")
+
+        def _raw_insert_many(self, index, values):
+            CountingList.n_calls += 1
+            super()._raw_insert_many(index, values)
+
+        def _raw_delete_range(self, start, stop):
+            CountingList.n_calls += 1
+            super()._raw_delete_range(start, stop)
+
+    l = CountingList([0, 1])
+    l.extend(x for x in range(2, 6))
+    del l[1:4]
+    assert l._list == [0, 4, 5]
+    l.clear()
+    assert l._list == []
+    assert CountingList.n_calls == 3
+    l.undo()
+    l.undo()
+    l.undo()
+    assert l._list == [0, 1]
+    assert CountingList.n_calls == 6
+    l.redo()
+    assert l._list == [0, 1, 2, 3, 4, 5]
+
+
+def test_sort_and_reverse():
+    l = UndoableList([3, 1, 4, 1, 5, 9, 2, 6])
+    l.sort()
+    assert l._list == [1, 1, 2, 3, 4, 5, 6, 9]
+    assert l._mgr.stack_undo[-1].args[0].tolist() == [1, 3, 6, 0, 2, 4, 7, 5]
+    l.reverse()
+    assert l._list == [9, 6, 5, 4, 3, 2, 1, 1]
+    assert l._mgr.stack_undo[-1].args == ()
+    l.sort(key=lambda x: x % 3, reverse=True)
+    assert l._list == [5, 2, 4, 1, 1, 9, 6, 3]
+    l.undo()
+    assert l._list == [9, 6, 5, 4, 3, 2, 1, 1]
+    l.undo()
+    assert l._list == [1, 1, 2, 3, 4, 5, 6, 9]
+    l.undo()
+    assert l._list == [3, 1, 4, 1, 5, 9, 2, 6]
+    l.redo()
+    l.redo()
+    l.redo()
+    assert l._list == [5, 2, 4, 1, 1, 9, 6, 3]
+
+
+def test_slice_diff():
+    l = UndoableList(range(10))
+    l[:] = [0, 1, -2, -3, 4, 5, 6, -7, 8, 9]
+    key, starts, new_runs, old_runs = l._mgr.stack_undo[-1].args
+    assert key == slice(0, 10, 1)
+    assert starts.tolist() == [2, 7]
+    assert new_runs == [[-2, -3], [-7]]
+    assert old_runs == [[2, 3], [7]]
+    l[::2] = [0, -2.0, 4, 6, 8]  # type change is also a change
+    assert l._mgr.stack_undo[-1].args[1].tolist() == [2]
+    l.undo()
+    assert l._list == [0, 1, -2, -3, 4, 5, 6, -7, 8, 9]
+    l.undo()
+    assert l._list == list(range(10))
+    l.redo()
+    l.redo()
+    assert l._list == [0, 1, -2.0, -3, 4, 5, 6, -7, 8, 9]
+    assert type(l[2]) is float
+
+
+def test_slice_diff_identity():
+    a = [0]
+    b = [0]
+    l = UndoableList([a, 2, 3])
+    l[0:1] = [b]
+    assert l[0] is b
+    l.undo()
+    assert l[0] is a
+    l[:] = list(l)  # nothing is changed
+    assert l._mgr.stack_lengths == (0, 1)
+
+
+def test_slice_negative_step():
+    l = UndoableList("uvwxyz")
+    l[::-1] = list("abcdef")
+    assert l._list == list("fedcba")
+    l.undo()
+    assert l._list == list("uvwxyz")
+    l.redo()
+    assert l._list == list("fedcba")
+    l.undo()
+    l[::-2] = list("abc")
+    assert l._list == list("ucwbya")
+    l.undo()
+    assert l._list == list("uvwxyz")
+    l.redo()
+    assert l._list == list("ucwbya")
+
+
+def test_slice_length_change():
+    l = UndoableList([0, 1, 2, 3])
+    l[1:3] = ["x"]
+    assert l._list == [0, "x", 3]
+    l[1:2] = ["a", "b", "c"]
+    assert l._list == [0, "a", "b", "c", 3]
+    l.undo()
+    assert l._list == [0, "x", 3]
+    l.undo()
+    assert l._list == [0, 1, 2, 3]
+    l.redo()
+    l.redo()
+    assert l._list == [0, "a", "b", "c", 3]
+
+
+def test_appending():
+    l = UndoableList([0, 1])
+    l.append(2)
+    with l.appending():
+        for i in range(3, 1000):
+            l.append(i)
+    l.append(1000)
+    assert l._list == list(range(1001))
+    assert l._mgr.stack_lengths == (3, 0)
+    start, values = l._mgr.stack_undo[1].args
+    assert start == 3
+    assert values == list(range(3, 1000))
+    l.undo()
+    l.undo()
+    assert l._list == [0, 1, 2]
+    l.redo()
+    assert l._list == list(range(1000))
+    l.undo()
+    l.undo()
+    assert l._list == [0, 1]
+
+
+def test_appending_only_reduces_appends():
+    lst = UndoableList([0])
+    with lst.appending():
+        lst.append(1)
+        lst[0] = 10
+        lst.append(2)
+        lst.append(3)
+    assert lst._mgr.stack_lengths == (3, 0)
+    lst.undo()
+    assert lst._list == [10, 1]
+    lst.undo()
+    lst.undo()
+    assert lst._list == [0]
+    lst.redo()
+    lst.redo()
+    lst.redo()
+    assert lst._list == [10, 1, 2, 3]
+
+
+def test_appending_commands_run_alone():
+    lst = UndoableList([0])
+    with lst.appending():
+        lst.append(1)
+        lst.append(2)
+    lst._list.clear()
+    lst._list.append(0)
+    lst._mgr.run_all()
+    assert lst._list == [0, 1, 2]
+    lst._mgr.clear()
+
+    def restore():
+        lst._list[:] = [0, 1, 2]
+
+    lst._mgr.checkpoint(restore)
+    with lst.appending():
+        lst.append(3)
+    lst.append(4)
+    lst._mgr.goto(0)
+    assert lst._list == [0, 1, 2]
+    lst._mgr.goto(2)
+    assert lst._list == [0, 1, 2, 3, 4]
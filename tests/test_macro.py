@@ -0,0 +1,176 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from collections_undo import Macro, UndoManager
+from collections_undo.containers import UndoableDict, UndoableList
+
+
+class Point:
+    mgr = UndoManager()
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    @mgr.interface
+    def set_x(self, x):
+        self.x = x
+
+    @set_x.server
+    def set_x(self, x):
+        return (self.x,), {}
+
+    @mgr.undoable
+    def move_y(self, dy):
+        self.y += dy
+
+    @move_y.undo_def
+    def move_y(self, dy):
+        self.y -= dy
+
+
+def test_record_and_play():
+    p = Point()
+    with p.mgr.recording() as macro:
+        p.set_x(3)
+        p.move_y(2)
+        p.move_y(1)
+    assert p.mgr.stack_lengths == (1, 0)
+    assert [step.name for step in macro] == ["set_x", "move_y", "move_y"]
+
+    q = Point(10, 10)
+    macro.play(q)
+    assert (q.x, q.y) == (3, 13)
+    assert q.mgr.stack_lengths == (1, 0)
+    q.mgr.undo()
+    assert (q.x, q.y) == (10, 10)
+    q.mgr.redo()
+    assert (q.x, q.y) == (3, 13)
+
+
+def test_from_command():
+    p = Point()
+    with p.mgr.merging():
+        p.set_x(1)
+        p.move_y(-1)
+    macro = Macro.from_command(p.mgr.stack_undo[-1])
+    assert len(macro) == 2
+    q = Point(5, 5)
+    macro.play(q)
+    assert (q.x, q.y) == (1, 4)
+
+
+def test_play_all_parallel():
+    p = Point()
+    with p.mgr.recording() as macro:
+        p.set_x(-1)
+        p.move_y(5)
+
+    points = [Point(i, i) for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        out = macro.play_all(points, executor=executor)
+    assert out == points
+    for i, pt in enumerate(points):
+        assert (pt.x, pt.y) == (-1, i + 5)
+        assert pt.mgr.stack_lengths == (1, 0)
+        pt.mgr.undo()
+        assert (pt.x, pt.y) == (i, i)
+
+
+class SlowPoint:
+    mgr = UndoManager()
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    @mgr.interface
+    def set_x(self, x):
+        self.x = x
+
+    @set_x.server
+    def set_x(self, x):
+        return (self.x,), {}
+
+    @mgr.undoable
+    def move_y(self, dy):
+        time.sleep(0.001)
+        self.y += dy
+
+    @move_y.undo_def
+    def move_y(self, dy):
+        self.y -= dy
+
+
+def test_play_all_parallel_shared_manager():
+    p = SlowPoint()
+    with p.mgr.recording() as macro:
+        p.set_x(-1)
+        p.move_y(5)
+
+    shared = UndoManager()
+    points = [SlowPoint(i, i) for i in range(8)]
+    for pt in points:
+        pt.mgr.link(shared)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        macro.play_all(points, executor=executor)
+    assert shared.stack_lengths == (8, 0)
+    for i, pt in enumerate(points):
+        assert (pt.x, pt.y) == (-1, i + 5)
+    for _ in range(8):
+        shared.undo()
+    for i, pt in enumerate(points):
+        assert (pt.x, pt.y) == (i, i)
+
+
+def test_play_onto_non_empty_target():
+    d = UndoableDict()
+    with d._mgr.recording() as macro:
+        d["a"] = 2
+        d["b"] = 3
+        del d["a"]
+    target = UndoableDict(a=10, b=20)
+    macro.play(target)
+    assert target == {"b": 3}
+    target.undo()
+    assert target == {"a": 10, "b": 20}
+    target.redo()
+    assert target == {"b": 3}
+
+
+def test_play_list_onto_non_empty_target():
+    lst = UndoableList()
+    with lst._mgr.recording() as macro:
+        lst.append(1)
+        lst[0:1] = [5]
+        lst.clear()
+        lst.append(2)
+    target = UndoableList([7, 8])
+    macro.play(target)
+    assert list(target) == [2]
+    target.undo()
+    assert list(target) == [7, 8]
+
+
+def test_play_slice_assignment_onto_other_target():
+    src = UndoableList([1, 2, 3])
+    with pytest.raises(TypeError):
+        with src._mgr.recording():
+            src[:] = [1, 9, 3]  # the unchanged items are not recorded
+    with src._mgr.recording() as macro:
+        src[:] = [4, 5, 6]
+        src[::-2] = [0, 1]
+    assert list(src) == [1, 5, 0]
+    target = UndoableList([7, 8, 9])
+    macro.play(target)
+    assert list(target) == [1, 5, 0]
+    target.undo()
+    assert list(target) == [7, 8, 9]
+
+
+def test_refuse_old_state():
+    d = UndoableDict(a=1)
+    with pytest.raises(TypeError):
+        with d._mgr.recording():
+            d.update(a=2, b=3)
@@ -0,0 +1,302 @@
+import pytest
+from collections_undo.containers import UndoableNDArray
+
+np = pytest.importorskip("numpy")
+
+
+def test_setitem_region():
+    data = np.arange(100, dtype=np.float32).reshape(10, 10)
+    arr = UndoableNDArray(data)
+    buf = arr._array
+    arr[2:5, 7] = -1
+    region, new, old = arr._mgr.stack_undo[-1].args
+    assert arr._mgr.stack_undo[-1].func.__name__ == "__setitem__"
+    assert region == (slice(2, 5), slice(7, 8))
+    assert new.shape == old.shape == (3, 1)
+    assert new.flags.c_contiguous
+    assert arr._mgr.stack_size == new.nbytes + old.nbytes == 24
+    arr[::-3, ::4] = 0
+    arr[-1] = np.arange(10)
+    expected = data.copy()
+    expected[2:5, 7] = -1
+    expected[::-3, ::4] = 0
+    expected[-1] = np.arange(10)
+    assert np.array_equal(arr.view(), expected)
+    arr.undo()
+    arr.undo()
+    arr.undo()
+    assert np.array_equal(arr.view(), data)
+    assert arr._array is buf
+    arr.redo()
+    assert np.array_equal(arr[2:5, 7], [-1, -1, -1])
+
+
+def test_setitem_advanced():
+    data = np.zeros((5, 6), dtype=np.int64)
+    arr = UndoableNDArray(data)
+    arr[[3, 1], [4, 2]] = [1, 2]
+    region = arr._mgr.stack_undo[-1].args[0]
+    assert region == (slice(1, 4), slice(2, 5))
+    mask = np.zeros((5, 6), dtype=bool)
+    mask[0, 5] = True
+    arr[mask] = 7
+    assert arr[3, 4] == 1 and arr[1, 2] == 2 and arr[0, 5] == 7
+    arr[np.zeros((5, 6), dtype=bool)] = 1
+    assert arr._mgr.stack_lengths == (2, 0)
+    arr.undo()
+    arr.undo()
+    assert np.array_equal(arr.view(), data)
+
+
+def test_touched_region():
+    arr = UndoableNDArray(np.zeros((5, 6, 4)))
+    mask2d = np.zeros((5, 6), dtype=bool)
+    mask2d[1, 4] = mask2d[3, 2] = True
+    keys = [
+        ([-1, 1],),
+        (slice(None, None, -2), [0, -3]),
+        (mask2d, slice(1, 3)),
+        (..., [2, 1]),
+        ([[0], [4]], None, [1, 5], 3),
+        (np.array([True, False, True, False, False]), ..., np.array([1, 2])),
+        (np.array([], dtype=np.intp),),
+    ]
+    for key in keys:
+        touched = np.zeros(arr.shape, dtype=bool)
+        touched[key] = True
+        indices = np.nonzero(touched)
+        if indices[0].size == 0:
+            expected = None
+        else:
+            expected = tuple(slice(int(i.min()), int(i.max()) + 1) for i in indices)
+        assert arr._touched_region(key) == expected, key
+
+
+def test_array_protocol():
+    arr = UndoableNDArray(np.arange(3))
+    out = np.array(arr, copy=True)
+    out[0] = 10
+    assert arr[0] == 0
+    out = np.asarray(arr)
+    assert not out.flags.writeable
+    assert np.asarray(arr, dtype=np.float64).dtype == np.float64
+    if np.lib.NumpyVersion(np.__version__) >= "2.0.0":
+        with pytest.raises(ValueError):
+            np.array(arr, dtype=np.float64, copy=False)
+
+
+def test_copy_and_reshape():
+    arr = UndoableNDArray(np.arange(6))
+    arr[0:2][0] = 1  # modifies a copy
+    assert arr[0] == 0
+    with pytest.raises(ValueError):
+        arr.view()[0] = 1
+    arr.reshape(2, -1)
+    assert arr.shape == (2, 3)
+    arr.undo()
+    assert arr.shape == (6,)
+
+
+def test_augmented_item_assignment():
+    arr = UndoableNDArray(np.arange(6))
+    arr[1:3] += 1
+    arr[[0, 2]] += 10
+    assert arr.view().tolist() == [10, 2, 13, 3, 4, 5]
+    arr.undo()
+    assert arr.view().tolist() == [0, 2, 3, 3, 4, 5]
+    arr.undo()
+    assert arr.view().tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_concatenate():
+    arr = UndoableNDArray(np.zeros((2, 3)))
+    for i in range(1, 20):
+        arr.concatenate(np.full((1, 3), i))
+    assert arr.shape == (21, 3)
+    assert arr._buffer.shape[0] < 40
+    buffer = arr._buffer
+    arr.undo()
+    arr.undo()
+    assert arr.shape == (19, 3)
+    assert arr._buffer is buffer
+    arr.redo()
+    assert np.array_equal(arr[-1], [18, 18, 18])
+    arr.concatenate(np.full((20, 1), -1), axis=1)
+    assert arr.shape == (20, 4)
+    arr.undo()
+    assert arr.shape == (20, 3)
+    arr.concatenate([[0.5, 0.5, 0.5]])
+    assert arr.shape == (21, 3)
+    arr[0] = 1
+    arr.undo()
+    arr.undo()
+    arr.undo()
+    assert arr.shape == (19, 3)
+    assert np.array_equal(arr[:2], np.zeros((2, 3)))
+
+
+def test_concatenate_upcast():
+    arr = UndoableNDArray([1, 2])
+    with pytest.raises(TypeError):
+        arr.concatenate([0.5])
+    assert arr.dtype.kind == "i"
+    assert arr._mgr.stack_lengths == (0, 0)
+    arr.concatenate(np.array([3], dtype=np.int8))
+    assert arr.dtype.kind == "i"
+    arr.undo()
+    assert arr.shape == (2,)
+    assert arr.dtype.kind == "i"
+    with pytest.raises(ValueError):
+        arr.concatenate([1], axis=1)
+
+
+def test_concatenate_downcast():
+    arr = UndoableNDArray(np.zeros(2, dtype=np.int8))
+    arr.concatenate(np.array([3, -128], dtype=np.int64))  # values fit in int8
+    assert arr.view().tolist() == [0, 0, 3, -128]
+    with pytest.raises(TypeError):
+        arr.concatenate(np.array([300], dtype=np.int64))
+    arr = UndoableNDArray(np.zeros(2, dtype=np.float32))
+    arr.concatenate([0.5, np.nan])
+    with pytest.raises(TypeError):
+        arr.concatenate([0.1])  # not exact in float32
+    assert arr.shape == (4,)
+    assert arr._mgr.stack_lengths == (1, 0)
+
+
+def test_invertible_inplace_op():
+    data = np.arange(10, dtype=np.uint8) * 30
+    arr = UndoableNDArray(data)
+    arr += 100
+    arr -= 7
+    arr ^= 0b1010
+    assert [cmd.args[0] for cmd in arr._mgr.stack_undo] == [
+        "add",
+        "subtract",
+        "bitwise_xor",
+    ]
+    assert arr._mgr.stack_size == 0
+    arr.undo()
+    arr.undo()
+    arr.undo()
+    assert np.array_equal(arr.view(), data)
+
+    data = np.array([1.5, -3.0, np.inf, np.nan, 0.0])
+    arr = UndoableNDArray(data)
+    arr *= 4
+    arr /= 0.5
+    assert arr._mgr.stack_undo[-1].args == ("true_divide", 0.5, "multiply", 0.5)
+    arr.undo()
+    arr.undo()
+    assert np.array_equal(arr.view(), data, equal_nan=True)
+
+
+def test_inplace_op_fallback():
+    data = np.array([1.0, 2.0, 1e-310])
+    arr = UndoableNDArray(data)
+    arr /= 4  # 1e-310 loses precision
+    arr += 0.1  # not exact
+    arr *= 3  # not a power of two
+    assert all(cmd.args[0] == (slice(0, 3),) for cmd in arr._mgr.stack_undo)
+    arr.undo()
+    arr.undo()
+    arr.undo()
+    assert np.array_equal(arr.view(), data)
+    arr = UndoableNDArray([1, 2])
+    with pytest.raises(TypeError):
+        arr += 0.5
+    assert arr._mgr.stack_lengths == (0, 0)
+
+
+def test_inplace_op_identity():
+    arr = UndoableNDArray(np.arange(4))
+    arr += 0
+    arr -= 0
+    arr *= 1
+    arr //= 1
+    arr &= -1
+    arr[1:3] = [1, 2]
+    assert arr._mgr.stack_lengths == (0, 0)
+    farr = UndoableNDArray([1.5, 0.0, np.nan])
+    farr += 0
+    farr *= 1
+    farr /= 1
+    assert farr._mgr.stack_lengths == (0, 0)
+    farr[1] = -0.0  # the sign of zero is a change
+    farr += 0
+    assert farr._mgr.stack_lengths == (2, 0)
+    assert not np.signbit(farr[1])
+    farr.undo()
+    assert np.signbit(farr[1])
+
+
+def test_inplace_op_default():
+    from collections_undo.containers import AbstractUndoableNDArray
+
+    class MyArray(AbstractUndoableNDArray):
+        def __init__(self, data):
+            self._data = np.array(data)
+
+        @property
+        def shape(self):
+            return self._data.shape
+
+        def __getitem__(self, key):
+            return self._data[key].copy()
+
+        def __len__(self):
+            return len(self._data)
+
+        def _raw_setitem(self, key, val):
+            self._data[key] = val
+
+        def _raw_reshape(self, shape):
+            self._data = self._data.reshape(shape)
+
+        def _raw_concatenate(self, other, axis=0):
+            self._data = np.concatenate([self._data, other], axis=axis)
+
+        def _raw_truncate(self, size, axis=0):
+            self._data = self._data[(slice(None),) * axis + (slice(0, size),)]
+
+    arr = MyArray([1.0, 2.0])
+    arr *= 3
+    assert arr._data.tolist() == [3.0, 6.0]
+    arr.undo()
+    assert arr._data.tolist() == [1.0, 2.0]
+
+
+def test_default_truncate():
+    from collections_undo.containers import AbstractUndoableNDArray
+
+    class MyArray(AbstractUndoableNDArray):
+        def __init__(self, data):
+            self._data = np.array(data)
+
+        @property
+        def shape(self):
+            return self._data.shape
+
+        def __getitem__(self, key):
+            return self._data[key].copy()
+
+        def __len__(self):
+            return len(self._data)
+
+        def _raw_setitem(self, key, val):
+            self._data[key] = val
+
+        def _raw_reshape(self, shape):
+            self._data = self._data.reshape(shape)
+
+        def _raw_concatenate(self, other, axis=0):
+            self._data = np.concatenate([self._data, other], axis=axis)
+
+    arr = MyArray([1, 2])
+    arr[0] = 10
+    arr.undo()
+    assert arr._data.tolist() == [1, 2]
+    with pytest.raises(TypeError):
+        arr.concatenate(np.array([3]))
+    assert arr._data.tolist() == [1, 2]
+    assert arr._mgr.stack_lengths == (0, 1)
@@ -0,0 +1,86 @@
+import random
+
+from collections_undo._containers._persistent import _Leaf
+from collections_undo.containers import UndoablePersistentList
+
+
+def _check_tree(tree):
+    if tree is None or type(tree) is _Leaf:
+        return
+    assert abs(tree.left.height - tree.right.height) <= 1
+    assert tree.size == tree.left.size + tree.right.size
+    _check_tree(tree.left)
+    _check_tree(tree.right)
+
+
+def test_random_operations():
+    rng = random.Random(0)
+    lst = UndoablePersistentList(range(100))
+    ref = list(range(100))
+    history = [list(ref)]
+    for i in range(300):
+        op = rng.randrange(5)
+        n = len(ref)
+        if op == 0 and n > 0:
+            idx = rng.randrange(n)
+            lst[idx] = -i
+            ref[idx] = -i
+        elif op == 1:
+            idx = rng.randrange(n + 1)
+            lst.insert(idx, i)
+            ref.insert(idx, i)
+        elif op == 2 and n > 0:
+            idx = rng.randrange(n)
+            del lst[idx]
+            del ref[idx]
+        elif op == 3:
+            a, b = sorted(rng.randrange(n + 1) for _ in range(2))
+            values = list(range(rng.randrange(70)))
+            lst[a:b] = values
+            ref[a:b] = values
+        else:
+            a, b = sorted(rng.randrange(n + 1) for _ in range(2))
+            del lst[a:b]
+            del ref[a:b]
+        history.append(list(ref))
+        assert list(lst) == ref
+        _check_tree(lst._root)
+    assert lst[10:20] == ref[10:20]
+    assert lst[::3] == ref[::3]
+
+    for expected in reversed(history[:-1]):
+        lst.undo()
+        assert list(lst) == expected
+    for expected in history[1:]:
+        lst.redo()
+        assert list(lst) == expected
+
+
+def test_clear_shares_structure():
+    lst = UndoablePersistentList(range(1000))
+    root = lst._root
+    lst.clear()
+    assert len(lst) == 0
+    assert lst._mgr.stack_undo[-1].args == (None, root)
+    lst.undo()
+    assert lst._root is root
+
+    c = lst.copy()
+    lst.append(1000)
+    assert len(c) == 1000
+    assert len(lst) == 1001
+    # the unchanged chunks are shared
+    assert lst._root.left is root.left
+
+
+def test_sort_and_reverse():
+    lst = UndoablePersistentList([3, 1, 2])
+    lst.sort()
+    lst.reverse()
+    lst.extend([0, 5])
+    assert list(lst) == [3, 2, 1, 0, 5]
+    lst.undo()
+    lst.undo()
+    assert list(lst) == [1, 2, 3]
+    lst.undo()
+    assert list(lst) == [3, 1, 2]
@@ -59,3 +59,30 @@ def test_isub():
     assert s._set == {1, 2, 3}
     s.redo()
     assert s._set == {1}
+
+
+def test_clear_swaps_storage():
+    s = UndoableSet([1, 2, 3])
+    storage = s._set
+    s.clear()
+    s.add(4)
+    assert storage == {1, 2, 3}
+    s.undo()
+    s.undo()
+    assert s._set is storage
+    s.redo()
+    s.redo()
+    assert s._set == {4}
+
+
+def test_operator_delta():
+    s = UndoableSet([1, 2, 3])
+    s |= [3, 4]
+    assert s._mgr.stack_undo[-1].args == (frozenset({4}), frozenset())
+    s ^= [1, 5]
+    assert s._mgr.stack_undo[-1].args == (frozenset({5}), frozenset({1}))
+    s -= [0, 6]
+    assert s._mgr.stack_lengths == (2, 0)
+    s.undo()
+    s.undo()
+    assert s._set == {1, 2, 3}
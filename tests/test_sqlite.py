@@ -0,0 +1,169 @@
+import gc
+import sqlite3
+import weakref
+
+import pytest
+from collections_undo import empty
+from collections_undo.containers import UndoableSqliteDict
+
+
+def test_sqlite_dict():
+    d = UndoableSqliteDict()
+    d["a"] = 1
+    d["b"] = [2]
+    d[3] = "c"
+    assert d == {"a": 1, "b": [2], 3: "c"}
+    del d["a"]
+    assert d == {"b": [2], 3: "c"}
+    d.undo()
+    assert d == {"a": 1, "b": [2], 3: "c"}
+    d.update({"a": 10, "d": 4})
+    assert d == {"a": 10, "b": [2], 3: "c", "d": 4}
+    d.undo()
+    assert d == {"a": 1, "b": [2], 3: "c"}
+    d.redo()
+    assert len(d) == 4
+    with pytest.raises(TypeError):
+        d[(1, 2)] = 0
+    with pytest.raises(KeyError):
+        d["x"]
+    d.close()
+
+
+def test_sqlite_clear_after_update():
+    d = UndoableSqliteDict()
+    d.update(a=1, b=2)
+    d.clear()
+    d.undo()
+    assert len(d) == 2
+    assert dict(d.items()) == {"a": 1, "b": 2}
+    d.close()
+
+
+def test_sqlite_clear():
+    d = UndoableSqliteDict()
+    d.update(a=1, b=2)
+    d.clear()
+    d["c"] = 3
+    d.clear()
+    assert len(d) == 0
+    d.undo()
+    assert d == {"c": 3}
+    d.undo()
+    d.undo()
+    assert d == {"a": 1, "b": 2}
+    d.redo()
+    d.redo()
+    d.redo()
+    assert len(d) == 0
+    d.close()
+
+
+def test_sqlite_history(tmp_path):
+    path = str(tmp_path / "test.db")
+    d = UndoableSqliteDict(path, commit_every=3)
+    d["a"] = 1
+    d["b"] = 2
+    # nothing is committed yet
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM data").fetchone() == (0,)
+    d.undo()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM data").fetchone() == (1,)
+        assert conn.execute("SELECT COUNT(*) FROM data_history").fetchone() == (3,)
+    with d._mgr.merging():
+        d["c"] = 3
+        d["d"] = 4
+    assert [entry.event for entry in d.history()] == [
+        "call",
+        "call",
+        "undo",
+        "call",
+        "call",
+        "merge",
+    ]
+    assert d.history()[0].steps == [("__setitem__", ("a", 1, empty), {})]
+    assert len(d.history()[-1].steps) == 2
+    d.close()
+
+    d = UndoableSqliteDict(path)
+    assert d == {"a": 1, "c": 3, "d": 4}
+    assert len(d.history()) == 6
+    d.close()
+
+
+def test_sqlite_commands_in_database():
+    d = UndoableSqliteDict()
+    d["a"] = [1]
+    d["a"] = [2]
+    with d._mgr.merging():
+        d["b"] = 3
+        del d["a"]
+    n_commands = "SELECT COUNT(*) FROM data_commands"
+    assert d._conn.execute(n_commands).fetchone() == (3,)
+    assert list(d._mgr._state.stack_undo._rows) == [1, 2, 3]
+    d.undo()
+    assert d == {"a": [2]}
+    d.undo()
+    d.undo()
+    assert len(d) == 0
+    assert d._conn.execute(n_commands).fetchone() == (3,)
+    d.redo()
+    d.redo()
+    d.redo()
+    assert d == {"b": 3}
+    d._mgr.clear()
+    assert d._conn.execute(n_commands).fetchone() == (0,)
+    d.close()
+
+
+def test_sqlite_drop_evicted_trash():
+    d = UndoableSqliteDict()
+    mgr = d._mgr
+    mgr.set_state(measure=lambda *args: 1, maxsize=2)
+    d.update(a=1)
+    d.clear()
+    assert d._trash_tables() == ["data__trash0"]
+    d["b"] = 2
+    d["c"] = 3  # the clear command is evicted
+    d.flush()
+    assert d._trash_tables() == []
+    d.clear()
+    assert d._trash_tables() == ["data__trash1"]
+    d.undo()
+    assert d == {"b": 2, "c": 3}
+    with pytest.raises(ValueError):
+        d._raw_set_storage("data__trash0")
+    d.close()
+    assert d._log_event not in mgr.called
+
+
+def test_sqlite_update_compare():
+    class EqualityDict(UndoableSqliteDict, update_compare="equality"):
+        pass
+
+    d = EqualityDict()
+    d.update(a=[1])
+    d.update(a=[1])
+    assert d._mgr.stack_lengths == (1, 0)
+    d.close()
+
+
+def test_sqlite_collected_without_close(tmp_path):
+    path = str(tmp_path / "data.db")
+    d = UndoableSqliteDict(path)
+    d["a"] = 1
+    d.clear()
+    d["b"] = 2
+    conn = d._conn
+    n_instances = len(UndoableSqliteDict._mgr._instances)
+    ref = weakref.ref(d)
+    del d
+    gc.collect()
+    assert ref() is None
+    assert len(UndoableSqliteDict._mgr._instances) == n_instances - 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    d = UndoableSqliteDict(path)
+    assert d == {"b": 2}
+    d.close()
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock
 
+import pytest
 from collections_undo import UndoManager, empty
 from collections_undo import arguments as args
 
@@ -466,3 +467,499 @@ def test_generator():
     assert a._state == -1
     a.mgr.redo()
     assert a._state == 1
+
+
+def test_run_all():
+    mgr = UndoManager()
+    state = []
+
+    @mgr.undoable
+    def append(x):
+        state.append(x)
+
+    @append.undo_def
+    def append(x):
+        state.pop()
+
+    for i in range(5):
+        append(i)
+    state.clear()
+    info = mgr.run_all()
+    assert state == [0, 1, 2, 3, 4]
+    assert info.n_commands == 5
+    assert info.n_groups == 1
+    assert info.throughput > 0
+    assert mgr.stack_lengths == (5, 0)
+
+
+def test_replay():
+    mock = MagicMock()
+    mgr0 = UndoManager()
+    mgr1 = UndoManager()
+    state = []
+
+    @mgr0.undoable
+    def append(x):
+        state.append(x)
+
+    @append.undo_def
+    def append(x):
+        state.pop()
+
+    @mgr0.undoable
+    def insert0(x):
+        state.insert(0, x)
+
+    @insert0.undo_def
+    def insert0(x):
+        state.pop(0)
+
+    append(0)
+    append(1)
+    insert0(-1)
+    append(2)
+    assert state == [-1, 0, 1, 2]
+    state.clear()
+
+    mgr1.called.append(mock)
+    info = mgr1.replay(mgr0.stack_undo)
+    mock.assert_not_called()
+    assert state == [-1, 0, 1, 2]
+    assert info.n_commands == 4
+    assert info.n_groups == 3
+    assert mgr1.stack_lengths == (4, 0)
+    mgr1.undo()
+    assert state == [-1, 0, 1]
+    mgr1.undo()
+    assert state == [0, 1]
+
+
+def test_replay_adjacent_groups():
+    mgr = UndoManager()
+    state = []
+
+    @mgr.undoable
+    def append(x):
+        state.append(x)
+
+    @append.undo_def
+    def append(x):
+        state.pop()
+
+    with mgr.merging():
+        append(0)
+        append(1)
+    with mgr.merging():
+        append(2)
+    append(3)
+    state.clear()
+    info = mgr.run_all()
+    assert state == [0, 1, 2, 3]
+    assert info.n_commands == 3
+    assert info.n_groups == 3
+
+
+def test_replay_onto_target():
+    from collections_undo.containers import UndoableDict
+
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.x = 0
+            self.y = 0
+
+        @mgr.undoable
+        def add(self, dx):
+            self.x += dx
+
+        @add.undo_def
+        def add(self, dx):
+            self.x -= dx
+
+        @mgr.interface
+        def set_y(self, y):
+            self.y = y
+
+        @set_y.server
+        def set_y(self, y):
+            return (self.y,), {}
+
+    a0, a1 = A(), A()
+    a0.add(1)
+    a0.set_y(5)
+    with a0.mgr.merging():
+        a0.add(2)
+        a0.set_y(6)
+    a1.mgr.replay(a0.mgr.stack_undo, target=a1)
+    assert (a1.x, a1.y) == (3, 6)
+    assert (a0.x, a0.y) == (3, 6)
+    assert a1.mgr.stack_lengths == (3, 0)
+    a1.mgr.undo()
+    assert (a1.x, a1.y) == (1, 5)
+    assert (a0.x, a0.y) == (3, 6)
+
+    d0 = UndoableDict()
+    d0["a"] = 1
+    d0["b"] = 2
+    del d0["a"]
+    d1 = UndoableDict()
+    d1._mgr.replay(d0._mgr.stack_undo, target=d1)
+    assert d1 == {"b": 2}
+    d1.undo()
+    d1.undo()
+    assert d1 == {"a": 1}
+    assert d0 == {"b": 2}
+
+
+def test_undoable_name():
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.x = 0
+
+        @mgr.undoable(name="add")
+        def _add(self, dx):
+            self.x += dx
+
+        @_add.undo_def
+        def _add(self, dx):
+            self.x -= dx
+
+    a0, a1 = A(), A()
+    with a0.mgr.recording() as macro:
+        a0._add(1)
+    assert a0.mgr.stack_undo[-1].commands[0].func.__name__ == "add"
+    assert [step.name for step in macro] == ["_add"]
+    macro.play(a1)
+    a1.mgr.replay(a0.mgr.stack_undo, target=a1)
+    assert (a0.x, a1.x) == (1, 2)
+
+
+def test_replay_batch():
+    mgr = UndoManager()
+    state = []
+    batches = []
+
+    @mgr.undoable
+    def append(x):
+        state.append(x)
+
+    @append.undo_def
+    def append(x):
+        state.pop()
+
+    @append.set_batch
+    def _append_batch(arguments):
+        batches.append(len(arguments))
+        state.extend(each[0] for each, _ in arguments)
+
+    for i in range(5):
+        append(i)
+    state.clear()
+    mgr.run_all()
+    assert state == [0, 1, 2, 3, 4]
+    assert batches == [5]
+
+
+def test_batch_command_sizes():
+    from collections_undo._command import BatchCommand
+
+    def nargs(*args, **kwargs):
+        return len(args) + len(kwargs)
+
+    mgr = UndoManager(measure=nargs)
+
+    @mgr.undoable
+    def f(*args):
+        pass
+
+    @f.undo_def
+    def f(*args):
+        pass
+
+    @f.set_batch
+    def _f_batch(arguments):
+        pass
+
+    @f.set_batch_inv
+    def _f_batch_inv(arguments):
+        pass
+
+    with mgr.merging():
+        f(0)
+        f(0, 0)
+        f(0, 0, 0)
+    (batch,) = list(mgr.stack_undo[-1])
+    assert isinstance(batch, BatchCommand)
+    assert batch.size == 6
+    assert [cmd.size for cmd in batch.commands] == [1, 2, 3]
+
+
+def test_bind_args():
+    mgr = UndoManager()
+
+    @mgr.undoable
+    def f(a, b=0, *args, c, **kwargs):
+        pass
+
+    @f.undo_def
+    def f(a, b=0, *args, c, **kwargs):
+        pass
+
+    f(1, c=2)
+    f(1, 2, 3, 4, c=5, d=6)
+    cmd0, cmd1 = mgr.stack_undo
+    assert cmd0.bind_args().arguments == {"a": 1, "c": 2}
+    assert cmd1.bind_args().arguments == {
+        "a": 1,
+        "b": 2,
+        "args": (3, 4),
+        "c": 5,
+        "kwargs": {"d": 6},
+    }
+    assert cmd0.bind_args().arguments == (
+        cmd0.bind_args().signature.bind(*cmd0.args, **cmd0.kwargs).arguments
+    )
+    assert f.binder is f.binder
+
+
+def test_reduce_last_write_wins():
+    from collections_undo.reduce import last_write_wins
+
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.values = {}
+
+        def set(self, key, value):
+            return self._set(key, value, self.values.get(key))
+
+        @mgr.undoable
+        def _set(self, key, value, old):
+            self.values[key] = value
+
+        @_set.undo_def
+        def _set(self, key, value, old):
+            self.values[key] = old
+
+        _set.reduce_rule(last_write_wins("key", keep="old"))
+
+    a = A()
+    with a.mgr.reducing():
+        for i in range(1, 4):
+            a.set("a", i)
+            a.set("b", i * 10)
+
+    assert a.values == {"a": 3, "b": 30}
+    assert a.mgr.stack_lengths == (2, 0)
+    assert a.mgr.stack_undo[0].args == ("a", 3, None)
+    assert a.mgr.stack_undo[1].args == ("b", 30, None)
+    a.mgr.undo()
+    assert a.values == {"a": 3, "b": None}
+    a.mgr.undo()
+    assert a.values == {"a": None, "b": None}
+    a.mgr.redo()
+    a.mgr.redo()
+    assert a.values == {"a": 3, "b": 30}
+
+    # commands before undo/redo are not reduced any more
+    with a.mgr.reducing():
+        a.set("a", 4)
+    assert a.mgr.stack_lengths == (3, 0)
+
+
+def test_reduce_window():
+    from collections_undo.reduce import last_write_wins
+
+    mgr = UndoManager()
+    values = {}
+
+    @mgr.undoable
+    def _set(key, value):
+        values[key] = value
+
+    @_set.undo_def
+    def _set(key, value):
+        values.pop(key)
+
+    _set.reduce_rule(last_write_wins("key", window=3))
+
+    with mgr.reducing():
+        _set("a", 0)
+        _set("b", 0)
+        _set("c", 0)
+        _set("a", 1)  # distance 3
+        assert mgr.stack_lengths == (3, 0)
+        _set("d", 0)
+        _set("e", 0)
+        _set("a", 2)  # distance 5
+        assert mgr.stack_lengths == (6, 0)
+        # recent keys are still reduced
+        for i in range(10):
+            _set("e", i)
+            _set("a", i)
+        assert mgr.stack_lengths == (6, 0)
+    assert len(mgr._state.reduce_index) <= 3
+
+
+def test_reduce_accumulate():
+    from collections_undo.reduce import accumulate
+
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.x = 0
+
+        @mgr.undoable
+        def move(self, dx):
+            self.x += dx
+
+        @move.undo_def
+        def move(self, dx):
+            self.x -= dx
+
+        move.reduce_rule(accumulate("dx"))
+
+    a = A()
+    with a.mgr.reducing():
+        a.move(1)
+        a.move(2)
+        a.move(4)
+    assert a.x == 7
+    assert a.mgr.stack_lengths == (1, 0)
+    a.mgr.undo()
+    assert a.x == 0
+
+
+def test_estimate_and_goto():
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.x = 0
+
+        @mgr.undoable
+        def add(self, dx):
+            self.x += dx
+
+        @add.undo_def
+        def add(self, dx):
+            self.x -= dx
+
+    a = A()
+    a.add(1)
+    assert a.mgr._state.latency.get(A.add.function_id) == 0.0  # not tracked
+    a.mgr.undo()
+    a.mgr.set_latency_tracking(True)
+    for _ in range(10):
+        a.add(1)
+    assert a.mgr.estimate(10) == 0.0
+    assert 0.0 < a.mgr.estimate(0)
+    assert a.mgr.estimate(5) < a.mgr.estimate(0)
+    with pytest.raises(ValueError):
+        a.mgr.estimate(11)
+
+    a.mgr.goto(4)
+    assert a.x == 4
+    assert a.mgr.stack_lengths == (4, 6)
+    a.mgr.goto(7)
+    assert a.x == 7
+    assert a.mgr.stack_lengths == (7, 3)
+
+    def restore():
+        a.x = 1
+
+    a.mgr.goto(1)
+    a.mgr.checkpoint(restore)
+    a.mgr.goto(10)
+    a.x = 100  # restored from the checkpoint regardless of the current state
+    a.mgr.goto(2)
+    assert a.x == 2
+    assert a.mgr.stack_lengths == (2, 8)
+
+    # checkpoint is discarded when the history before it changes
+    a.mgr.goto(0)
+    a.add(1)
+    assert a.mgr._state.checkpoints == {}
+
+
+def test_plan_loads_only_needed_commands():
+    class CountingList(list):
+        n_loaded = 0
+
+        def __getitem__(self, key):
+            CountingList.n_loaded += 1
+            return super().__getitem__(key)
+
+        def __iter__(self):
+            raise AssertionError("history must not be copied")
+
+    class A:
+        mgr = UndoManager()
+
+        def __init__(self):
+            self.x = 0
+
+        @mgr.undoable
+        def add(self, dx):
+            self.x += dx
+
+        @add.undo_def
+        def add(self, dx):
+            self.x -= dx
+
+    a = A()
+    a.mgr.set_latency_tracking(True)
+    for _ in range(10):
+        a.add(1)
+    state = a.mgr._state
+    state.stack_undo = CountingList(state.stack_undo)
+    state.stack_redo = CountingList(state.stack_redo)
+    a.mgr.estimate(8)
+    assert CountingList.n_loaded == 2
+    a.mgr.goto(7)
+    assert a.x == 7
+    assert a.mgr.stack_lengths == (7, 3)
+
+
+def test_pickle_command_arguments():
+    import pickle
+
+    from collections_undo._command import _EMPTY_KWARGS, Arguments
+
+    assert pickle.loads(pickle.dumps(_EMPTY_KWARGS)) is _EMPTY_KWARGS
+    arguments = pickle.loads(pickle.dumps(Arguments(x=1, y=2)))
+    assert dict(arguments) == {"x": 1, "y": 2}
+    assert arguments.y == 2
+
+
+def test_checkpoint_after_eviction():
+    class A:
+        mgr = UndoManager(measure=lambda *args: 1, maxsize=3)
+
+        def __init__(self):
+            self.x = 0
+
+        @mgr.undoable
+        def add(self, dx):
+            self.x += dx
+
+        @add.undo_def
+        def add(self, dx):
+            self.x -= dx
+
+    def restore():
+        a.x = 0
+
+    a = A()
+    a.mgr.checkpoint(restore)
+    for _ in range(5):
+        a.add(1)
+    assert a.mgr.stack_lengths == (3, 0)
+    assert a.mgr._state.checkpoints == {}
+    a.mgr.goto(0)
+    assert a.x == 2
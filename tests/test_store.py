@@ -0,0 +1,125 @@
+from collections_undo import UndoManager
+from collections_undo._store import ColumnarStack
+
+
+def test_columnar_manager():
+    mgr = UndoManager(storage="columnar", measure=lambda *args: 1, maxsize=100)
+    state = {"x": 0}
+
+    @mgr.undoable
+    def move(dx):
+        state["x"] += dx
+
+    @move.undo_def
+    def move(dx):
+        state["x"] -= dx
+
+    @mgr.interface
+    def set_name(name):
+        state["name"] = name
+
+    @set_name.server
+    def set_name(name):
+        return (state.get("name"),), {}
+
+    for _ in range(10):
+        move(1)
+    set_name("a")
+    assert isinstance(mgr._state.stack_undo, ColumnarStack)
+    assert state["x"] == 10
+    assert mgr.stack_lengths == (11, 0)
+    assert mgr.stack_size == 11
+    assert mgr.stack_undo[0].args == (1,)
+    mgr.undo()
+    assert state["name"] is None
+    mgr.undo()
+    mgr.undo()
+    assert state["x"] == 8
+    mgr.redo()
+    assert state["x"] == 9
+    assert mgr.stack_lengths == (9, 2)
+    with mgr.merging():
+        move(5)
+        move(5)
+    assert state["x"] == 19
+    mgr.undo()
+    assert state["x"] == 9
+
+
+def test_packed_columns():
+    mgr = UndoManager()
+
+    @mgr.undoable
+    def f(a, b, c):
+        pass
+
+    @f.undo_def
+    def f(a, b, c):
+        pass
+
+    stack = ColumnarStack()
+    f(0, 0.5, "s")
+    stack.append(mgr.stack_undo[-1])
+    columns = stack._tables[1].columns
+    assert columns[0].typecode == "q"
+    assert columns[1].typecode == "d"
+    assert isinstance(columns[2], list)
+    f(1.5, 2**70, None)
+    stack.append(mgr.stack_undo[-1])
+    columns = stack._tables[1].columns
+    assert isinstance(columns[0], list)
+    assert isinstance(columns[1], list)
+    assert [cmd.args for cmd in stack] == [(0, 0.5, "s"), (1.5, 2**70, None)]
+
+
+def test_compaction():
+    mgr = UndoManager()
+
+    @mgr.undoable
+    def f(a):
+        pass
+
+    @f.undo_def
+    def f(a):
+        pass
+
+    f(0)
+    cmd = mgr.stack_undo[0]
+    stack = ColumnarStack()
+    for i in range(1000):
+        stack.append(cmd.__class__(cmd.func, (i,), {}))
+    for _ in range(900):
+        stack.pop(0)
+    assert len(stack) == 100
+    assert stack._tables[1].n_rows < 1000
+    assert [cmd.args[0] for cmd in stack] == list(range(900, 1000))
+    del stack[10:90:2]
+    assert len(stack) == 60
+    assert stack[10].args == (911,)
+    stack.clear()
+    assert len(stack) == 0
+
+
+def test_columnar_command_equality():
+    stack = ColumnarStack()
+    mgr = UndoManager()
+
+    @mgr.undoable
+    def f(x, y):
+        pass
+
+    @f.undo_def
+    def f(x, y):
+        pass
+
+    f(1, "a")
+    f(2**40, 0.5)
+    for cmd in mgr.stack_undo:
+        stack.append(cmd)
+    assert stack[0] is not mgr.stack_undo[0]
+    assert stack[0] != mgr.stack_undo[0]  # commands are compared by identity
+    assert stack.rindex(mgr.stack_undo[0]) == 0
+    assert stack.rindex(mgr.stack_undo[1]) == 1
+    assert mgr.stack_undo[1] in stack
+    f(3, "b")
+    assert mgr.stack_undo[2] not in stack
@@ -0,0 +1,74 @@
+import pytest
+from collections_undo.containers import UndoableText
+
+
+def test_edit():
+    t = UndoableText("My name is ")
+    t.append("John")
+    assert t == "My name is John"
+    del t[-4:]
+    t.append("Mary")
+    t[0:2] = "Your"
+    assert t == "Your name is Mary"
+    assert t[5:9] == "name"
+    assert t[-1] == "y"
+    with pytest.raises(IndexError):
+        t.delete(3, 100)
+
+    t.undo()
+    assert t == "My name is Mary"
+    t.undo()
+    assert t == "My name is "
+    t.undo()
+    assert t == "My name is John"
+    t.undo()
+    assert t == "My name is "
+    t.redo()
+    t.redo()
+    assert t == "My name is "
+
+
+def test_coalesce():
+    t = UndoableText("abc")
+    for char in "def":
+        t.append(char)
+    t.insert(0, "X")  # not contiguous
+    for _ in range(3):
+        t.delete(len(t) - 1, len(t))  # backspace
+    for _ in range(2):
+        t.delete(1, 2)  # forward deletion
+    assert t == "Xc"
+    assert t._mgr.stack_lengths == (4, 0)
+    assert t._mgr.stack_undo[0].args == (3, "def", "")
+    t.undo()
+    assert t == "Xabc"
+    t.undo()
+    assert t == "Xabcdef"
+    t.undo()
+    assert t == "abcdef"
+    t.undo()
+    assert t == "abc"
+
+
+def test_large_text():
+    line = "".join(chr(ord("a") + i % 26) for i in range(99)) + "\n"
+    text = line * 20000  # 2 MB
+    t = UndoableText(text)
+    assert len(t) == len(text)
+    for i in range(100):
+        pos = (i * 7919) % len(t)
+        t.insert(pos, "<>")
+        t.delete(pos // 2, pos // 2 + 3)
+    assert t._root.height < 40
+    for _ in range(200):
+        t.undo()
+    assert t == text
+
+
+def test_coalesce_limit():
+    t = UndoableText(max_coalesce=4)
+    for char in "abcdefghij":
+        t.append(char)
+    assert [cmd.args[1] for cmd in t._mgr.stack_undo] == ["abcd", "efgh", "ij"]
+    t.undo()
+    assert t == "abcdefgh"